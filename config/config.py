@@ -15,7 +15,37 @@ class Config:
     
     # Vector Database Configuration
     CHROMA_DB_PATH = "./chroma_db"
-    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # Lightweight model
+    EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # Lightweight model (English only)
+    MULTILINGUAL_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # English + Bangla, also 384-d
+    BANGLA_SCRIPT_THRESHOLD = 0.5  # Share of Bengali-script letters above which a query counts as Bangla
+    COLLECTION_NAME = "kfg_policies_v3"         # Cosine-space collection (embeddings stored normalized)
+    LEGACY_COLLECTION_NAME = "kfg_policies_v2"  # Pre-cosine L2 collection, source for utils/migrate_to_cosine.py
+    AUTO_MIGRATE_LEGACY_COLLECTION = True       # Copy the legacy collection into an empty COLLECTION_NAME at startup
+    COLLECTION_ALIAS_PATH = "./chroma_db/collection_alias.json"  # Points COLLECTION_NAME at its active version
+    ALIAS_CHECK_INTERVAL = 2.0    # Seconds between checks for a version swapped in, or chunks written, by another process
+    
+    # HNSW index profile, fixed when a collection is created (tune with utils/tune_hnsw.py)
+    HNSW_M = 16                   # Graph links per node: higher = better recall, more memory
+    HNSW_CONSTRUCTION_EF = 100    # Candidate list size while building
+    HNSW_SEARCH_EF = 10           # Candidate list size while querying: higher = better recall, slower
+    
+    # Search backend (Chroma stays the durable store either way)
+    VECTOR_BACKEND = "auto"       # "auto", "chroma", "flat" (exact in-memory NumPy index) or "faiss"
+    FLAT_INDEX_MAX_ROWS = 20000   # "auto" uses the flat index up to this many chunks (see utils/benchmark_backends.py)
+    FLAT_INDEX_MMAP = False       # Keep the flat matrix in a memory-mapped .npy file shared by worker processes
+    FLAT_INDEX_PATH = "./vector_index"   # Also holds the FAISS index files
+    VECTOR_STORAGE_DTYPE = "float32"     # Flat index only: "float32", "int8" (1/4 memory) or "float16" (1/2, slower on CPU)
+    RESCORE_CANDIDATE_MULTIPLIER = 4     # float16/int8: rescore n_results * this candidates in float32
+    FLAT_MAX_TOMBSTONE_FRACTION = 0.2    # Compact the flat index once this share of rows is deleted
+    FAISS_INDEX_TYPE = "hnsw"     # VECTOR_BACKEND = "faiss" (optional faiss-cpu): "hnsw" or "ivfpq"
+    FAISS_HNSW_M = 32
+    FAISS_EF_CONSTRUCTION = 200
+    FAISS_EF_SEARCH = 64
+    FAISS_IVF_LISTS = 0           # Inverted lists (0 = 4 * sqrt(rows))
+    FAISS_NPROBE = 16             # Lists scanned per query
+    FAISS_PQ_M = 48               # Sub-quantizers (must divide the embedding size; 384 / 48 = 8 dims each)
+    FAISS_PQ_BITS = 8
+    FAISS_MAX_TOMBSTONE_FRACTION = 0.2  # Compact the HNSW index once this share of rows is deleted
     
     # Document Processing - Enhanced organization paths
     DOCUMENTS_PATH = "./documents"
@@ -24,6 +54,11 @@ class Config:
     METADATA_PATH = "./kfg_policy/metadata"    # Document metadata
     ORIGINAL_PATH = "./kfg_policy"             # Original policy files
     PROCESSED_PATH = "./kfg_policy/processed"
+    CATALOG_DB_PATH = "./kfg_policy/catalog.db"  # SQLite document catalog (replaces per-file metadata JSON)
+    CORPUS_SCAN_TTL = 5.0  # Seconds a corpus directory snapshot is reused before re-checking mtimes
+    CORPUS_SCAN_RESTAT_FILES = True  # Also re-stat files in unchanged directories (catches in-place rewrites)
+    USE_TEXT_STORE = True  # Keep chunk bodies in the mmap text store instead of Chroma's documents column
+    TEXT_STORE_PATH = "./kfg_policy/text_store"
     
     # Chunking - File-based chunking for complete policy context
     CHUNK_SIZE = 0  # No chunking - each file is one chunk
@@ -47,16 +82,73 @@ class Config:
     MAX_CONTEXT_LENGTH = 8000    # Increased for better context and complete policy coverage
     MIN_SIMILARITY_SCORE = 0.2   # Lowered minimum similarity for better coverage
     
+    # API Usage Tracking
+    USAGE_DB_PATH = "./api_usage.db"  # Append-only usage log with incremental rollups (SQLite WAL)
+    LEGACY_USAGE_FILE = "./api_usage.json"  # Old JSON totals, imported by: python utils/cost_monitor.py --migrate-legacy
+    COST_FLUSH_INTERVAL = 2.0         # Seconds between background flushes of buffered usage events
+    COST_FLUSH_BATCH_SIZE = 50        # Flush early once this many events are buffered
+    
+    # Latency tracing
+    LATENCY_WINDOW_SIZE = 2048        # Recent requests kept per stage for p50/p95/p99
+    TRACE_EXPORT_PATH = None          # OTLP/JSON lines file for dashboards, e.g. "./logs/traces.jsonl"
+    
+    # Metrics endpoint (Prometheus text format)
+    ENABLE_METRICS_SERVER = False     # Start the /metrics HTTP endpoint with the chatbot
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = 9108
+    SHOW_ADMIN_PANEL = False          # Metrics panel in the Streamlit sidebar (also via ?admin=1)
+    
+    # HTTP API (ui/api/server.py)
+    API_HOST = "127.0.0.1"            # Loopback only: the API has no authentication (use "0.0.0.0" behind a proxy)
+    API_PORT = 8000
+    API_WORKERS = 1                   # Worker processes, each with its own preloaded chatbot
+    API_MAX_CONCURRENCY = 8           # Requests processed at once per worker
+    API_MAX_QUEUE = 32                # Requests allowed to wait for a slot before answering 429
+    API_QUEUE_TIMEOUT = 10.0          # Seconds a request may wait for a slot before answering 429
+    EMBED_BATCH_MAX_SIZE = 32         # Texts per batched query-embedding call
+    EMBED_BATCH_MAX_WAIT_MS = 0.0     # Extra time to hold a batch open (0 = batch only what is already queued)
+    
+    # Per-model pricing in USD per 1M tokens (cached = prompt tokens served from the API's context cache)
+    MODEL_PRICING = {
+        "deepseek-chat": {"input": 0.27, "cached_input": 0.07, "output": 1.10},
+        "deepseek-reasoner": {"input": 0.55, "cached_input": 0.14, "output": 2.19}
+    }
+    
     # Document Processing
     ENABLE_OCR = True
+    OCR_LANGUAGES = "eng+ben"        # Tesseract language packs
+    OCR_MAX_WORKERS = None           # OCR process pool size (None = CPU count)
+    OCR_MIN_TEXT_CHARS = 25          # PDF pages with less text-layer content than this are OCR'd
+    OCR_CACHE_PATH = "./kfg_policy/ocr_cache"  # Page-level OCR cache keyed by page image hash
     ENABLE_TRANSLATION = False  # Disable for cost control
     SAVE_PROCESSING_RESULTS = True
     
+    # Near-Duplicate Detection (reissued circulars/notices)
+    NEAR_DUPLICATE_THRESHOLD = 0.8     # Estimated Jaccard similarity to treat two documents as versions
+    MINHASH_NUM_PERM = 128             # MinHash signature length
+    MINHASH_BANDS = 16                 # LSH bands (rows per band = NUM_PERM / BANDS)
+    MINHASH_SHINGLE_SIZE = 5           # Word shingle length
+    INDEX_DUPLICATE_VERSIONS = False   # Index older versions too (search still collapses them)
+    COLLAPSE_DUPLICATES_IN_SEARCH = True
+    
     # Enhanced Search Settings
     ENABLE_CATEGORY_FILTERING = True
     ENABLE_TYPE_FILTERING = True
     MAX_SEARCH_RESULTS = 10
     
+    # Result Diversification (Maximal Marginal Relevance)
+    MMR_LAMBDA = 0.7                 # 1.0 = pure relevance, 0.0 = pure diversity
+    MMR_CANDIDATE_MULTIPLIER = 4     # Candidate pool = n_results * multiplier when diversifying
+    DIVERSIFY_CHAT_RESULTS = False   # Use MMR for the unfiltered chat search path
+    
+    # Custom Prompt Fast Path (answers curated questions without retrieval or LLM)
+    ENABLE_CUSTOM_PROMPT_FASTPATH = True
+    CUSTOM_PROMPT_MIN_SCORE = 0.9          # Match score needed to answer from a custom prompt
+    CUSTOM_PROMPT_REQUIRE_FULL_COVERAGE = True  # Keyword matches must cover every topic word of the query
+    CUSTOM_PROMPT_SEMANTIC_MATCHING = False  # Also match prompt exemplars by embedding similarity
+    PROMPT_STORE_PATH = "./kfg_policy/custom_prompts.db"  # Persistent, versioned prompt store
+    PROMPT_STORE_CHECK_INTERVAL = 0.0      # Seconds between store version checks (0 = every request)
+    
     # Confidence Analysis Settings
     HIGH_CONFIDENCE_THRESHOLD = 0.7    # Documents with 0.7+ similarity are high confidence
     MEDIUM_CONFIDENCE_THRESHOLD = 0.5  # Documents with 0.5-0.7 similarity are medium confidence
@@ -3,6 +3,13 @@ Custom Policy Prompts Configuration
 Provides specific, accurate answers for common KFG policy questions
 """
 
+import threading
+import time
+
+from config.config import Config
+from config.prompt_matcher import PromptMatcher
+from config.prompt_store import PromptStore
+
 class CustomPrompts:
     """Custom prompts for specific policy questions"""
     
@@ -62,31 +69,116 @@ class CustomPrompts:
     }
     
     # Add more custom prompts here as needed
-    CUSTOM_PROMPTS = {
+    BUILTIN_PROMPTS = {
         "medical_allowance": MEDICAL_ALLOWANCE,
         "ta_da_policy": TA_DA_POLICY,
         "leave_policy": LEAVE_POLICY
     }
     
+    # Active prompt set: built-ins overlaid with prompts from the persistent store
+    CUSTOM_PROMPTS = dict(BUILTIN_PROMPTS)
+    
+    # Compiled keyword matcher, built on first use and updated incrementally
+    _matcher = None
+    _embedding_fn = None
+    
+    # Persistent store shared by all worker processes
+    _store = None
+    _loaded_version = None
+    _last_check = 0.0
+    _lock = threading.RLock()
+    
     @classmethod
-    def get_custom_response(cls, query: str) -> dict:
-        """Get custom response if query matches any custom prompt keywords"""
-        query_lower = query.lower()
+    def get_store(cls) -> PromptStore:
+        """Get the persistent prompt store"""
+        with cls._lock:
+            if cls._store is None:
+                cls._store = PromptStore(Config.PROMPT_STORE_PATH)
+            return cls._store
+    
+    @classmethod
+    def refresh(cls, force: bool = False) -> bool:
+        """Reload prompts if another process changed the store; returns True on reload"""
+        now = time.monotonic()
+        if not force and cls._loaded_version is not None and now - cls._last_check < Config.PROMPT_STORE_CHECK_INTERVAL:
+            return False
+        cls._last_check = now
         
-        for prompt_key, prompt_data in cls.CUSTOM_PROMPTS.items():
-            for keyword in prompt_data["keywords"]:
-                if keyword in query_lower:
-                    return {
-                        "has_custom_response": True,
-                        "response": prompt_data["response"],
-                        "confidence": prompt_data["confidence_boost"],
-                        "source": prompt_data["source"],
-                        "prompt_type": prompt_key
-                    }
+        store = cls.get_store()
+        if not force and store.get_version() == cls._loaded_version:
+            return False
+        
+        with cls._lock:
+            stored_prompts, version = store.load_all()
+            cls.CUSTOM_PROMPTS.clear()
+            cls.CUSTOM_PROMPTS.update(cls.BUILTIN_PROMPTS)
+            cls.CUSTOM_PROMPTS.update(stored_prompts)
+            cls._matcher = None
+            cls._loaded_version = version
+        return True
+    
+    @classmethod
+    def get_matcher(cls) -> PromptMatcher:
+        """Get the compiled matcher for the current prompt set"""
+        with cls._lock:
+            if cls._matcher is None:
+                cls._matcher = PromptMatcher(cls.CUSTOM_PROMPTS, embedding_fn=cls._embedding_fn)
+            return cls._matcher
+    
+    @classmethod
+    def enable_semantic_matching(cls, embedding_fn) -> None:
+        """Index prompt exemplars with an embedding function (texts -> vectors)"""
+        cls._embedding_fn = embedding_fn
+        cls.get_matcher().enable_semantic(embedding_fn)
+    
+    @classmethod
+    def get_custom_response(cls, query: str, min_score: float = 0.0,
+                            require_full_coverage: bool = False) -> dict:
+        """Get the best scoring custom response for a query (not the first keyword hit)"""
+        cls.refresh()
+        match = cls.get_matcher().best_match(query, min_score=min_score,
+                                             require_full_coverage=require_full_coverage)
+        if match is None:
+            return {"has_custom_response": False}
         
-        return {"has_custom_response": False}
+        # The payload comes with the match: a reload may have replaced CUSTOM_PROMPTS since
+        prompt_key = match["prompt_key"]
+        prompt_data = match["prompt"]
+        return {
+            "has_custom_response": True,
+            "response": prompt_data["response"],
+            "confidence": prompt_data["confidence_boost"],
+            "source": prompt_data["source"],
+            "prompt_type": prompt_key,
+            "score": match["score"],
+            "match_type": match["match_type"],
+            "matched_keywords": match["matched_keywords"],
+            "unmatched_terms": match["unmatched_terms"]
+        }
+    
+    @classmethod
+    def add_custom_prompt(cls, prompt_key: str, prompt_data: dict) -> int:
+        """Persist a custom prompt and update the matcher incrementally; returns the store version"""
+        cls.refresh()
+        version = cls.get_store().upsert(prompt_key, prompt_data)
+        with cls._lock:
+            cls.CUSTOM_PROMPTS[prompt_key] = prompt_data
+            if cls._matcher is not None:
+                cls._matcher.add_prompt(prompt_key, prompt_data)
+            # Only skip the reload if nobody else wrote in between
+            if cls._loaded_version is not None and version == cls._loaded_version + 1:
+                cls._loaded_version = version
+        return version
+    
+    @classmethod
+    def remove_custom_prompt(cls, prompt_key: str) -> int:
+        """Delete a stored custom prompt (built-ins reappear if overridden); returns the store version"""
+        version = cls.get_store().delete(prompt_key)
+        cls.refresh(force=True)
+        return version
     
     @classmethod
     def get_all_prompts(cls) -> dict:
         """Get all available custom prompts"""
+        cls.refresh()
         return cls.CUSTOM_PROMPTS 
\ No newline at end of file
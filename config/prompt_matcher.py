@@ -0,0 +1,310 @@
+"""
+Compiled Custom Prompt Matcher
+Aho-Corasick keyword automaton with scored best-match selection and an optional
+embedding-similarity index over prompt exemplars
+"""
+
+import re
+from collections import deque
+from typing import Callable, Dict, List, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Words that carry no topic signal when measuring how much of a query a keyword covers
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'what', 'whats', 'which', 'who', 'how', 'much',
+    'many', 'for', 'of', 'to', 'in', 'on', 'at', 'by', 'my', 'me', 'i', 'we', 'our', 'you',
+    'your', 'about', 'do', 'does', 'can', 'could', 'please', 'tell', 'give', 'get', 'and',
+    'or', 'kfg', 'as', 'per', 'there', 'any', 'rules', 'rule', 'policy', 'policies', 'details',
+    'detail', 'explain', 'information', 'info', 'regarding', 'know', 'want', 'company'
+}
+
+
+# Keywords added incrementally before the delta automaton is merged into the main one
+DELTA_MERGE_THRESHOLD = 512
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse everything that is not a word character to single spaces"""
+    return " ".join(re.findall(r'\w+', text.lower()))
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over word-start anchored keywords"""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.base_out: List[List[tuple]] = [[]]
+        self.out: List[List[tuple]] = [[]]
+        self.keyword_count = 0
+        self._dirty = False
+
+    def insert(self, prompt_key: str, normalized_keyword: str):
+        """Add one keyword to the trie; failure links are rebuilt lazily"""
+        # Leading space anchors matches at a word start ("leave" does not match "sleave")
+        node = 0
+        for char in " " + normalized_keyword:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.base_out.append([])
+                self.out.append([])
+            node = next_node
+        self.base_out[node].append((prompt_key, normalized_keyword))
+        self.keyword_count += 1
+        self._dirty = True
+
+    def build(self):
+        """Breadth-first construction of failure links and merged outputs"""
+        queue = deque()
+        for child in self.goto[0].values():
+            self.fail[child] = 0
+            self.out[child] = list(self.base_out[child])
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.base_out[child] + self.out[self.fail[child]]
+                queue.append(child)
+
+        self._dirty = False
+
+    def scan(self, normalized_text: str):
+        """Yield (prompt_key, keyword) for every keyword occurrence in the text"""
+        if self._dirty:
+            self.build()
+        node = 0
+        for char in " " + normalized_text:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            if self.out[node]:
+                yield from self.out[node]
+
+
+class PromptMatcher:
+    """Matches queries against custom prompt keywords in a single pass over the query"""
+
+    def __init__(self, prompts: Dict[str, Dict[str, Any]] = None,
+                 embedding_fn: Callable[[List[str]], Any] = None):
+        self._prompts: Dict[str, Dict[str, Any]] = {}
+
+        # Keywords live in a large main automaton plus a small delta automaton for
+        # incremental additions, so adding a prompt only rebuilds the (small) delta
+        self._main = KeywordAutomaton()
+        self._delta = KeywordAutomaton()
+        self._all_keywords: List[tuple] = []
+
+        # Optional semantic index: one row per exemplar, mapped back to its prompt key
+        self._embedding_fn = embedding_fn
+        self._exemplar_keys: List[str] = []
+        self._exemplar_vectors = None
+
+        for prompt_key, prompt_data in (prompts or {}).items():
+            self._prompts[prompt_key] = prompt_data
+            for keyword in prompt_data.get('keywords', []):
+                self._insert_keyword(prompt_key, keyword, self._main)
+        if embedding_fn is not None:
+            self.enable_semantic(embedding_fn)
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+    # -- building -----------------------------------------------------------------
+
+    def _insert_keyword(self, prompt_key: str, keyword: str, automaton: KeywordAutomaton):
+        normalized = normalize_text(keyword)
+        if normalized:
+            automaton.insert(prompt_key, normalized)
+            self._all_keywords.append((prompt_key, normalized))
+
+    def _merge_delta(self):
+        """Fold the delta automaton into a freshly built main automaton"""
+        main = KeywordAutomaton()
+        keywords, self._all_keywords = self._all_keywords, []
+        for prompt_key, normalized in keywords:
+            if prompt_key in self._prompts:
+                main.insert(prompt_key, normalized)
+                self._all_keywords.append((prompt_key, normalized))
+        main.build()
+        self._main, self._delta = main, KeywordAutomaton()
+
+    def add_prompt(self, prompt_key: str, prompt_data: Dict[str, Any]):
+        """Add or replace a prompt without rebuilding the whole trie"""
+        if prompt_key in self._prompts:
+            self.remove_prompt(prompt_key)
+        self._prompts[prompt_key] = prompt_data
+        for keyword in prompt_data.get('keywords', []):
+            self._insert_keyword(prompt_key, keyword, self._delta)
+
+        if self._delta.keyword_count > DELTA_MERGE_THRESHOLD:
+            self._merge_delta()
+
+        if self._embedding_fn is not None:
+            self._add_exemplars(prompt_key, self._exemplars(prompt_data))
+
+    def remove_prompt(self, prompt_key: str):
+        """Remove a prompt; stale trie outputs are ignored at match time"""
+        self._prompts.pop(prompt_key, None)
+        if self._exemplar_keys and prompt_key in self._exemplar_keys:
+            keep = [i for i, key in enumerate(self._exemplar_keys) if key != prompt_key]
+            self._exemplar_keys = [self._exemplar_keys[i] for i in keep]
+            self._exemplar_vectors = self._exemplar_vectors[keep] if keep else None
+
+    # -- semantic index -------------------------------------------------------------
+
+    @staticmethod
+    def _exemplars(prompt_data: Dict[str, Any]) -> List[str]:
+        """Texts representing a prompt in embedding space"""
+        return list(prompt_data.get('examples', [])) + list(prompt_data.get('keywords', []))
+
+    def _encode(self, texts: List[str]):
+        vectors = np.asarray(self._embedding_fn(texts), dtype=np.float32)
+        return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8)
+
+    def _add_exemplars(self, prompt_key: str, texts: List[str]):
+        if not texts:
+            return
+        vectors = self._encode(texts)
+        self._exemplar_keys.extend([prompt_key] * len(texts))
+        if self._exemplar_vectors is None:
+            self._exemplar_vectors = vectors
+        else:
+            self._exemplar_vectors = np.vstack([self._exemplar_vectors, vectors])
+
+    def enable_semantic(self, embedding_fn: Callable[[List[str]], Any]):
+        """Attach an embedding function and index every prompt's exemplars"""
+        if np is None:
+            raise ImportError("numpy is required for semantic prompt matching")
+        self._embedding_fn = embedding_fn
+        self._exemplar_keys, self._exemplar_vectors = [], None
+        keys, texts = [], []
+        for prompt_key, prompt_data in self._prompts.items():
+            exemplars = self._exemplars(prompt_data)
+            keys.extend([prompt_key] * len(exemplars))
+            texts.extend(exemplars)
+        if texts:
+            self._exemplar_keys = keys
+            self._exemplar_vectors = self._encode(texts)
+
+    # -- matching ---------------------------------------------------------------------
+
+    def _keyword_hits(self, normalized_query: str) -> Dict[str, List[str]]:
+        """All (prompt_key -> matched keywords) found in one pass over the query"""
+        hits: Dict[str, List[str]] = {}
+        for automaton in (self._main, self._delta):
+            if not automaton.keyword_count:
+                continue
+            for prompt_key, keyword in automaton.scan(normalized_query):
+                if prompt_key not in self._prompts:
+                    continue
+                matched = hits.setdefault(prompt_key, [])
+                if keyword not in matched:
+                    matched.append(keyword)
+        # Drop outputs of keywords that were removed when a prompt was replaced
+        for prompt_key in list(hits):
+            valid = {normalize_text(k) for k in self._prompts[prompt_key].get('keywords', [])}
+            hits[prompt_key] = [k for k in hits[prompt_key] if k in valid]
+            if not hits[prompt_key]:
+                del hits[prompt_key]
+        return hits
+
+    @staticmethod
+    def _keyword_score(normalized_query: str, keywords: List[str]) -> tuple:
+        """Share of the query's topic words covered by the matched keywords, plus the words left over"""
+        content_words = [w for w in normalized_query.split() if w not in STOPWORDS] or normalized_query.split()
+        covered = set()
+        for keyword in keywords:
+            covered.update(keyword.split())
+        unmatched = [word for word in content_words if not any(word.startswith(k) for k in covered)]
+        score = (len(content_words) - len(unmatched)) / max(len(content_words), 1)
+        return min(1.0, score), unmatched
+
+    def _semantic_scores(self, query: str) -> Dict[str, float]:
+        """Best exemplar cosine similarity per prompt"""
+        if self._embedding_fn is None or self._exemplar_vectors is None:
+            return {}
+        query_vector = self._encode([query])[0]
+        similarities = self._exemplar_vectors @ query_vector
+        scores: Dict[str, float] = {}
+        for prompt_key, similarity in zip(self._exemplar_keys, similarities.tolist()):
+            if similarity > scores.get(prompt_key, -1.0):
+                scores[prompt_key] = similarity
+        return scores
+
+    def rank(self, query: str, use_semantic: bool = True) -> List[Dict[str, Any]]:
+        """All matching prompts ordered by score (best first)
+
+        Each candidate carries its prompt payload under 'prompt', read once
+        here so callers never look it up again in a prompt set that may have
+        been reloaded meanwhile.
+        """
+        normalized_query = normalize_text(query)
+        candidates: Dict[str, Dict[str, Any]] = {}
+
+        for prompt_key, keywords in self._keyword_hits(normalized_query).items():
+            prompt = self._prompts.get(prompt_key)
+            if prompt is None:
+                continue
+            score, unmatched = self._keyword_score(normalized_query, keywords)
+            candidates[prompt_key] = {
+                'prompt_key': prompt_key,
+                'prompt': prompt,
+                'score': score,
+                'matched_keywords': keywords,
+                # Topic words the prompt does not address ("duration" in "maternity leave duration")
+                'unmatched_terms': unmatched,
+                'match_type': 'keyword',
+                # Longer matched phrases are more specific ("maternity leave" over "leave")
+                'specificity': max(len(k.split()) for k in keywords)
+            }
+
+        if use_semantic:
+            for prompt_key, similarity in self._semantic_scores(query).items():
+                prompt = self._prompts.get(prompt_key)
+                current = candidates.get(prompt_key)
+                if prompt is not None and (current is None or similarity > current['score']):
+                    candidates[prompt_key] = {
+                        'prompt_key': prompt_key,
+                        'prompt': prompt,
+                        'score': float(similarity),
+                        'matched_keywords': current['matched_keywords'] if current else [],
+                        'unmatched_terms': [],
+                        'match_type': 'semantic',
+                        'specificity': current['specificity'] if current else 0
+                    }
+
+        return sorted(
+            candidates.values(),
+            key=lambda c: (c['score'], c['specificity'], c['prompt'].get('confidence_boost', 0)),
+            reverse=True
+        )
+
+    def best_match(self, query: str, min_score: float = 0.0,
+                   require_full_coverage: bool = False) -> Optional[Dict[str, Any]]:
+        """Highest scoring prompt, or None when nothing reaches min_score
+
+        With require_full_coverage a keyword match is only returned when it
+        covers every topic word of the query, so a more specific question
+        ("maternity leave duration", "TA-DA for drivers") is not answered
+        with a generic prompt.
+        """
+        ranked = self.rank(query)
+        if not ranked or ranked[0]['score'] < min_score:
+            return None
+        if require_full_coverage and ranked[0]['unmatched_terms']:
+            return None
+        return ranked[0]
@@ -0,0 +1,136 @@
+"""
+Persistent Custom Prompt Store
+SQLite (WAL mode) store for dynamically added prompts, versioned so every worker
+process can detect changes with a single cheap query and reload
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    prompt_key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prompt_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt_key TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    data TEXT,
+    changed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_prompt_history_key ON prompt_history(prompt_key, version);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('version', 0);
+"""
+
+
+class PromptStore:
+    """File-backed custom prompt store with a monotonically increasing version"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get (or open) the connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_version(self) -> int:
+        """Current store version (single primary-key lookup)"""
+        return self._connect().execute(
+            "SELECT value FROM store_meta WHERE key = 'version'"
+        ).fetchone()[0]
+
+    def _bump_version(self, conn: sqlite3.Connection) -> int:
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'version'")
+        return conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+
+    def load_all(self) -> tuple:
+        """All stored prompts and the version they correspond to, read in one transaction"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            version = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()[0]
+            rows = conn.execute("SELECT prompt_key, data FROM prompts").fetchall()
+        return {key: json.loads(data) for key, data in rows}, version
+
+    def upsert(self, prompt_key: str, prompt_data: Dict[str, Any]) -> int:
+        """Insert or replace a prompt; returns the new store version"""
+        data = json.dumps(prompt_data, ensure_ascii=False)
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = self._bump_version(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO prompts (prompt_key, data, version, updated_at) VALUES (?, ?, ?, ?)",
+                (prompt_key, data, version, now)
+            )
+            conn.execute(
+                "INSERT INTO prompt_history (prompt_key, version, action, data, changed_at) VALUES (?, ?, 'upsert', ?, ?)",
+                (prompt_key, version, data, now)
+            )
+        return version
+
+    def delete(self, prompt_key: str) -> int:
+        """Delete a prompt; returns the new store version"""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = self._bump_version(conn)
+            conn.execute("DELETE FROM prompts WHERE prompt_key = ?", (prompt_key,))
+            conn.execute(
+                "INSERT INTO prompt_history (prompt_key, version, action, data, changed_at) VALUES (?, ?, 'delete', NULL, ?)",
+                (prompt_key, version, now)
+            )
+        return version
+
+    def history(self, prompt_key: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Change history, newest first"""
+        sql = "SELECT prompt_key, version, action, data, changed_at FROM prompt_history"
+        params: list = []
+        if prompt_key:
+            sql += " WHERE prompt_key = ?"
+            params.append(prompt_key)
+        sql += " ORDER BY version DESC LIMIT ?"
+        params.append(limit)
+        rows = self._connect().execute(sql, params).fetchall()
+        return [
+            {
+                'prompt_key': key,
+                'version': version,
+                'action': action,
+                'data': json.loads(data) if data else None,
+                'changed_at': changed_at
+            }
+            for key, version, action, data, changed_at in rows
+        ]
+
+    def get_prompt_version(self, prompt_key: str, version: int) -> Optional[Dict[str, Any]]:
+        """A prompt as it was at a given version (for rollback)"""
+        row = self._connect().execute(
+            "SELECT data FROM prompt_history WHERE prompt_key = ? AND version <= ? ORDER BY version DESC LIMIT 1",
+            (prompt_key, version)
+        ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
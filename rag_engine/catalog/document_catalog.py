@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Document Catalog for KFG Policy Documents
+Single SQLite store for document metadata shared by the fixer, vector store and chatbot
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys stored in dedicated (indexed) columns; everything else lives in the JSON blob
+CATALOG_COLUMNS = [
+    'document_id', 'filename', 'original_filename', 'organized_filename',
+    'category', 'document_type', 'date', 'content_hash',
+    'file_size', 'word_count', 'char_count', 'entities',
+    'processing_date', 'updated_at'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    original_filename TEXT,
+    organized_filename TEXT,
+    category TEXT,
+    document_type TEXT,
+    date TEXT,
+    content_hash TEXT,
+    file_size INTEGER DEFAULT 0,
+    word_count INTEGER DEFAULT 0,
+    char_count INTEGER DEFAULT 0,
+    entities TEXT DEFAULT '{}',
+    metadata TEXT DEFAULT '{}',
+    processing_date TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_documents_category ON documents(category);
+CREATE INDEX IF NOT EXISTS idx_documents_type ON documents(document_type);
+CREATE INDEX IF NOT EXISTS idx_documents_date ON documents(date);
+CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(content_hash);
+CREATE INDEX IF NOT EXISTS idx_documents_organized ON documents(organized_filename);
+"""
+
+
+def compute_content_hash(text: str) -> str:
+    """SHA-256 of document text, used to detect changed or duplicate content"""
+    return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
+
+
+class DocumentCatalog:
+    """SQLite (WAL mode) catalog of document metadata with indexed lookup columns"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.CATALOG_DB_PATH
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection per thread; SQLite connections must not be shared across threads
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get (or open) the connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        """Create tables and indexes if they do not exist"""
+        conn = self._connect()
+        with conn:
+            conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the connection of the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _row_to_metadata(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Rebuild the full metadata dict from a catalog row"""
+        metadata = json.loads(row['metadata'] or '{}')
+        for column in CATALOG_COLUMNS:
+            if column == 'entities':
+                metadata['entities'] = json.loads(row['entities'] or '{}')
+            elif row[column] is not None:
+                metadata[column] = row[column]
+        return metadata
+
+    def _metadata_to_row(self, document_id: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Split a metadata dict into indexed columns and the JSON remainder"""
+        extra = {k: v for k, v in metadata.items() if k not in CATALOG_COLUMNS}
+        return {
+            'document_id': document_id,
+            'filename': metadata.get('filename', document_id),
+            'original_filename': metadata.get('original_filename', metadata.get('filename', document_id)),
+            'organized_filename': metadata.get('organized_filename'),
+            'category': metadata.get('category'),
+            'document_type': metadata.get('document_type'),
+            'date': metadata.get('date'),
+            'content_hash': metadata.get('content_hash'),
+            'file_size': metadata.get('file_size', 0) or 0,
+            'word_count': metadata.get('word_count', 0) or 0,
+            'char_count': metadata.get('char_count', 0) or 0,
+            'entities': json.dumps(metadata.get('entities', {}), ensure_ascii=False),
+            'metadata': json.dumps(extra, ensure_ascii=False),
+            'processing_date': metadata.get('processing_date'),
+            'updated_at': datetime.now().isoformat()
+        }
+
+    def upsert_document(self, document_id: str, metadata: Dict[str, Any]):
+        """Insert or replace the catalog entry for a document"""
+        self.upsert_documents([(document_id, metadata)])
+
+    def upsert_documents(self, documents: List[tuple]):
+        """Insert or replace many (document_id, metadata) entries in one transaction"""
+        rows = [self._metadata_to_row(doc_id, metadata) for doc_id, metadata in documents]
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        placeholders = ", ".join(f":{c}" for c in columns)
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO documents ({', '.join(columns)}) VALUES ({placeholders})",
+                rows
+            )
+
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get metadata for a single document"""
+        row = self._connect().execute(
+            "SELECT * FROM documents WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        return self._row_to_metadata(row) if row else None
+
+    def get_by_organized_filename(self, organized_filename: str) -> Optional[Dict[str, Any]]:
+        """Get metadata for a document by its organized file name"""
+        row = self._connect().execute(
+            "SELECT * FROM documents WHERE organized_filename = ?", (organized_filename,)
+        ).fetchone()
+        return self._row_to_metadata(row) if row else None
+
+    def get_all_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """Get metadata for every document keyed by document_id"""
+        rows = self._connect().execute("SELECT * FROM documents").fetchall()
+        return {row['document_id']: self._row_to_metadata(row) for row in rows}
+
+    def find_documents(self, category: str = None, document_type: str = None,
+                       content_hash: str = None, limit: int = None) -> List[Dict[str, Any]]:
+        """Query documents using the indexed columns"""
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if document_type:
+            clauses.append("document_type = ?")
+            params.append(document_type)
+        if content_hash:
+            clauses.append("content_hash = ?")
+            params.append(content_hash)
+
+        sql = "SELECT * FROM documents"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date DESC, document_id"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    def count(self) -> int:
+        """Total number of catalogued documents"""
+        return self._connect().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def category_counts(self) -> Dict[str, int]:
+        """Number of documents per category"""
+        rows = self._connect().execute(
+            "SELECT category, COUNT(*) AS n FROM documents GROUP BY category ORDER BY category"
+        ).fetchall()
+        return {row['category']: row['n'] for row in rows if row['category']}
+
+    def type_counts(self) -> Dict[str, int]:
+        """Number of documents per document type"""
+        rows = self._connect().execute(
+            "SELECT document_type, COUNT(*) AS n FROM documents GROUP BY document_type ORDER BY document_type"
+        ).fetchall()
+        return {row['document_type']: row['n'] for row in rows if row['document_type']}
+
+    def filenames_by(self, column: str) -> Dict[str, List[str]]:
+        """Group filenames by category or document_type"""
+        if column not in ('category', 'document_type'):
+            raise ValueError(f"Unsupported grouping column: {column}")
+        rows = self._connect().execute(
+            f"SELECT {column} AS key, filename FROM documents ORDER BY {column}, filename"
+        ).fetchall()
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row['key'], []).append(row['filename'])
+        return grouped
+
+    def get_categories(self) -> List[str]:
+        """Distinct categories"""
+        return list(self.category_counts().keys())
+
+    def get_document_types(self) -> List[str]:
+        """Distinct document types"""
+        return list(self.type_counts().keys())
+
+    def delete_document(self, document_id: str):
+        """Remove a document from the catalog"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+
+    def import_metadata_dir(self, metadata_path: str = None) -> int:
+        """Import legacy *_metadata.json files into the catalog (one-time migration)"""
+        metadata_dir = Path(metadata_path or Config.METADATA_PATH)
+        if not metadata_dir.exists():
+            return 0
+
+        documents = []
+        for metadata_file in metadata_dir.glob("*_metadata.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                document_id = metadata_file.name.replace('_metadata.json', '')
+                metadata.setdefault('organized_filename', f"{document_id}_organized.txt")
+                documents.append((document_id, metadata))
+            except Exception as e:
+                logger.error(f"Error importing metadata file {metadata_file}: {e}")
+
+        self.upsert_documents(documents)
+        logger.info(f"Imported {len(documents)} legacy metadata files into catalog")
+        return len(documents)
+
+    def ensure_populated(self) -> int:
+        """Migrate legacy metadata JSON on first use; returns the catalog size"""
+        count = self.count()
+        if count == 0:
+            count = self.import_metadata_dir()
+        return count
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_document_catalog(db_path: str = None) -> DocumentCatalog:
+    """Shared catalog instance per database path"""
+    db_path = db_path or Config.CATALOG_DB_PATH
+    with _catalogs_lock:
+        if db_path not in _catalogs:
+            _catalogs[db_path] = DocumentCatalog(db_path)
+        return _catalogs[db_path]
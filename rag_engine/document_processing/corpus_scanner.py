@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Corpus Scanner for KFG Policy Documents
+Cached os.scandir-based directory listing shared by the chatbot, fixer and vector store
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+FileStat = namedtuple('FileStat', ['name', 'path', 'size', 'mtime_ns'])
+
+
+class CorpusSnapshot:
+    """Immutable view of the corpus directory tree at one point in time"""
+
+    def __init__(self, root: str, directories: Dict[str, Dict[str, FileStat]],
+                 subdirectories: Dict[str, List[str]], generation: int):
+        self.root = root
+        self.generation = generation
+        self.created_at = time.time()
+        self._directories = directories
+        self._subdirectories = subdirectories
+
+    def exists(self) -> bool:
+        """Whether the corpus root existed when the snapshot was taken"""
+        return '' in self._directories
+
+    def files(self, relative_dir: str = '', suffix: str = None) -> List[FileStat]:
+        """Files directly inside a directory (relative to the root), sorted by name"""
+        entries = self._directories.get(relative_dir, {})
+        files = [entry for entry in entries.values() if suffix is None or entry.name.endswith(suffix)]
+        return sorted(files, key=lambda entry: entry.name)
+
+    def get(self, name: str, relative_dir: str = '') -> Optional[FileStat]:
+        """Stat entry for a single file"""
+        return self._directories.get(relative_dir, {}).get(name)
+
+    def subdirectories(self, relative_dir: str = '') -> List[str]:
+        """Names of the subdirectories of a directory"""
+        return list(self._subdirectories.get(relative_dir, []))
+
+    def organized_files(self) -> List[FileStat]:
+        """Organized policy files at the corpus root"""
+        return self.files('', suffix='_organized.txt')
+
+    def subdirectory_counts(self, relative_dir: str, suffix: str = '.txt') -> Dict[str, int]:
+        """Number of matching files in each subdirectory of a directory"""
+        counts = {}
+        for name in self.subdirectories(relative_dir):
+            child = os.path.join(relative_dir, name) if relative_dir else name
+            counts[name] = len(self.files(child, suffix=suffix))
+        return counts
+
+    def category_counts(self) -> Dict[str, int]:
+        """File counts per by_category folder"""
+        return self.subdirectory_counts('by_category')
+
+    def type_counts(self) -> Dict[str, int]:
+        """File counts per by_type folder"""
+        return self.subdirectory_counts('by_type')
+
+    def changed_since(self, other: Optional['CorpusSnapshot']) -> List[str]:
+        """Paths added, removed or modified relative to an older snapshot"""
+        if other is None:
+            return [entry.path for entries in self._directories.values() for entry in entries.values()]
+
+        changed = []
+        for relative_dir in set(self._directories) | set(other._directories):
+            current = self._directories.get(relative_dir, {})
+            previous = other._directories.get(relative_dir, {})
+            for name in set(current) | set(previous):
+                new, old = current.get(name), previous.get(name)
+                if new is None or old is None or (new.size, new.mtime_ns) != (old.size, old.mtime_ns):
+                    changed.append((new or old).path)
+        return sorted(changed)
+
+
+class CorpusScanner:
+    """Scans a corpus tree with os.scandir and only re-lists directories whose mtime changed"""
+
+    def __init__(self, root: str, max_depth: int = 2, ttl: float = None):
+        self.root = os.path.normpath(root)
+        self.max_depth = max_depth
+        self.ttl = Config.CORPUS_SCAN_TTL if ttl is None else ttl
+
+        # relative_dir -> (dir_mtime_ns, files, subdirectories)
+        self._cache: Dict[str, tuple] = {}
+        self._snapshot: Optional[CorpusSnapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _scan_directory(self, path: str) -> tuple:
+        """List one directory, collecting file stats and subdirectory names"""
+        files, subdirectories = {}, []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.name)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.name] = FileStat(entry.name, entry.path, stat.st_size, stat.st_mtime_ns)
+                except OSError as e:
+                    logger.warning(f"Could not stat {entry.path}: {e}")
+        return files, sorted(subdirectories)
+
+    def _restat_files(self, files: Dict[str, FileStat]) -> Dict[str, FileStat]:
+        """Refresh size/mtime of known files (catches in-place rewrites)"""
+        refreshed = {}
+        for name, entry in files.items():
+            try:
+                stat = os.stat(entry.path)
+                refreshed[name] = entry._replace(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            except FileNotFoundError:
+                continue
+        return refreshed
+
+    def refresh(self, deep: bool = None) -> CorpusSnapshot:
+        """Rescan changed directories and publish a new snapshot
+        
+        A file rewritten in place does not change its directory's mtime, so
+        deep (default Config.CORPUS_SCAN_RESTAT_FILES) also re-stats the files
+        of unchanged directories.
+        """
+        if deep is None:
+            deep = Config.CORPUS_SCAN_RESTAT_FILES
+        with self._lock:
+            directories, subdirectories, new_cache = {}, {}, {}
+            rescanned = 0
+            pending = [('', self.root, 0)]
+
+            while pending:
+                relative_dir, path, depth = pending.pop()
+                try:
+                    dir_mtime = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+
+                cached = self._cache.get(relative_dir)
+                if cached is not None and cached[0] == dir_mtime:
+                    files, children = cached[1], cached[2]
+                    if deep:
+                        files = self._restat_files(files)
+                else:
+                    files, children = self._scan_directory(path)
+                    rescanned += 1
+
+                new_cache[relative_dir] = (dir_mtime, files, children)
+                directories[relative_dir] = files
+                subdirectories[relative_dir] = children
+
+                # Directory mtime does not reflect changes inside subdirectories, so always visit them
+                if depth < self.max_depth:
+                    for child in children:
+                        child_relative = os.path.join(relative_dir, child) if relative_dir else child
+                        pending.append((child_relative, os.path.join(path, child), depth + 1))
+
+            self._cache = new_cache
+            self._generation += 1
+            self._snapshot = CorpusSnapshot(self.root, directories, subdirectories, self._generation)
+            logger.debug(f"Corpus scan of {self.root}: {rescanned}/{len(directories)} directories rescanned")
+            return self._snapshot
+
+    def snapshot(self, max_age: float = None) -> CorpusSnapshot:
+        """Current snapshot, refreshed when older than max_age seconds (defaults to the TTL)"""
+        max_age = self.ttl if max_age is None else max_age
+        current = self._snapshot
+        if current is None or time.time() - current.created_at > max_age:
+            return self.refresh()
+        return current
+
+    def invalidate(self):
+        """Force the next snapshot() call to rescan (after writing into the corpus)"""
+        with self._lock:
+            self._snapshot = None
+
+
+_scanners = {}
+_scanners_lock = threading.Lock()
+
+
+def get_corpus_scanner(root: str = None, max_depth: int = 2) -> CorpusScanner:
+    """Shared scanner instance per corpus root"""
+    root = os.path.normpath(root or Config.ORGANIZED_PATH)
+    with _scanners_lock:
+        if root not in _scanners:
+            _scanners[root] = CorpusScanner(root, max_depth=max_depth)
+        return _scanners[root]
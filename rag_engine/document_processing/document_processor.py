@@ -22,11 +22,15 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 sys.path.insert(0, project_root)
 
 from config.config import Config
+from rag_engine.catalog.document_catalog import compute_content_hash
+from rag_engine.document_processing.text_extractor import TextExtractor
+from rag_engine.document_processing.near_duplicates import NearDuplicateDetector
 
 class DocumentProcessor:
     def __init__(self):
         self.setup_logging()
         self.setup_directories()
+        self.text_extractor = TextExtractor()
         
         # Enhanced OCR text fixes for KFG documents
         self.ocr_fixes = {
@@ -260,9 +264,9 @@ class DocumentProcessor:
             filename = os.path.basename(file_path)
             self.logger.info(f"Processing document: {filename}")
             
-            # Read the document
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                text = f.read()
+            # Extract text (text layer / OCR for PDFs and images, streamed read for text files)
+            extraction = self.text_extractor.extract(file_path)
+            text = extraction['text']
             
             if not text.strip():
                 self.logger.warning(f"Empty document: {filename}")
@@ -273,6 +277,11 @@ class DocumentProcessor:
             
             # Extract metadata
             metadata = self.extract_metadata(cleaned_text, filename)
+            metadata['file_size'] = extraction['file_size']
+            metadata['content_hash'] = compute_content_hash(cleaned_text)
+            metadata['source_format'] = extraction['source_format']
+            metadata['extraction_method'] = extraction['method']
+            metadata['page_count'] = extraction['pages']
             
             # Structure content
             structured_content = self.structure_content(cleaned_text)
@@ -287,6 +296,11 @@ class DocumentProcessor:
                     'cleaned': cleaned_text,
                     'structured': structured_content
                 },
+                'extraction': {
+                    'method': extraction['method'],
+                    'pages': extraction['pages'],
+                    'ocr_pages': extraction['ocr_pages']
+                },
                 'processing_status': 'success',
                 'processing_date': datetime.now().isoformat()
             }
@@ -304,6 +318,22 @@ class DocumentProcessor:
                 'processing_date': datetime.now().isoformat()
             }
     
+    def tag_duplicate_versions(self, processed_docs: List[Dict]) -> List[Dict]:
+        """
+        Cluster near-duplicate documents and mark all but the latest version as duplicates
+        """
+        detector = NearDuplicateDetector()
+        for doc in processed_docs:
+            if doc.get('processing_status') == 'success':
+                detector.add(doc['filename'], doc['content']['cleaned'], doc['metadata'].get('date'))
+        
+        version_tags = detector.assign_versions()
+        for doc in processed_docs:
+            if doc['filename'] in version_tags:
+                doc['metadata'].update(version_tags[doc['filename']])
+        
+        return processed_docs
+    
     def organize_documents(self, processed_docs: List[Dict]) -> Dict[str, List[Dict]]:
         """
         Organize documents by category and date for better management
@@ -419,18 +449,27 @@ class DocumentProcessor:
             self.logger.error(f"Folder not found: {folder_path}")
             return []
         
-        # Get all text files
-        text_files = [f for f in os.listdir(folder_path) if f.endswith('.txt')]
-        self.logger.info(f"Found {len(text_files)} text files to process")
+        # Get all supported files (text, PDF and images)
+        source_files = [
+            f for f in os.listdir(folder_path)
+            if os.path.splitext(f)[1].lower() in Config.ALLOWED_EXTENSIONS
+        ]
+        self.logger.info(f"Found {len(source_files)} files to process")
         
         processed_docs = []
         
-        for filename in text_files:
+        for filename in source_files:
             file_path = os.path.join(folder_path, filename)
             result = self.process_document(file_path)
             if result:
                 processed_docs.append(result)
         
+        # Release OCR worker processes once the batch is done
+        self.text_extractor.shutdown()
+        
+        # Tag near-duplicate versions (reissued circulars/notices)
+        self.tag_duplicate_versions(processed_docs)
+        
         # Organize documents
         organized_docs = self.organize_documents(processed_docs)
         
@@ -449,6 +488,13 @@ class DocumentProcessor:
         """
         try:
             results_file = os.path.join(folder_path, 'processing_results.json')
+            if Config.USE_TEXT_STORE:
+                # Bodies already live in the organized files and the text store; keep sizes only
+                processed_docs = [
+                    {**doc, 'content': {key: len(value) if isinstance(value, str) else None
+                                        for key, value in doc.get('content', {}).items()}}
+                    for doc in processed_docs
+                ]
             with open(results_file, 'w', encoding='utf-8') as f:
                 json.dump(processed_docs, f, indent=2, ensure_ascii=False)
             
@@ -5,6 +5,7 @@ This script will reorganize, clean, and properly index all policy documents
 """
 
 import os
+import sys
 import json
 import shutil
 import logging
@@ -13,6 +14,14 @@ from typing import Dict, List, Any
 import re
 from datetime import datetime
 
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from rag_engine.catalog.document_catalog import get_document_catalog, compute_content_hash
+from rag_engine.document_processing.corpus_scanner import get_corpus_scanner
+from rag_engine.document_processing.near_duplicates import NearDuplicateDetector
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -27,6 +36,12 @@ class KFGDocumentFixer:
         # Create organized directory structure
         self.setup_directories()
         
+        # Document metadata lives in the shared SQLite catalog
+        self.catalog = get_document_catalog()
+        
+        # Clusters reissued versions of the same circular/notice
+        self.duplicate_detector = NearDuplicateDetector()
+        
         # Enhanced policy categories with better mapping
         self.policy_categories = {
             'salary_compensation': [
@@ -186,6 +201,7 @@ class KFGDocumentFixer:
             'file_size': stat.st_size,
             'word_count': word_count,
             'char_count': char_count,
+            'content_hash': compute_content_hash(text),
             'entities': entities,
             'processing_date': datetime.now().isoformat(),
             'version': '2.0',
@@ -217,16 +233,16 @@ class KFGDocumentFixer:
             # Create organized file
             organized_filename = f"{cleaned_filename}_organized.txt"
             organized_path = self.organized_path / organized_filename
+            metadata['organized_filename'] = organized_filename
             
             with open(organized_path, 'w', encoding='utf-8') as f:
                 f.write(content)
             
-            # Save metadata
-            metadata_filename = f"{cleaned_filename}_metadata.json"
-            metadata_path = self.metadata_path / metadata_filename
+            # Save metadata to the catalog
+            self.catalog.upsert_document(cleaned_filename, metadata)
             
-            with open(metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            # Register for near-duplicate clustering
+            self.duplicate_detector.add(cleaned_filename, content, metadata['date'])
             
             # Copy to category folder
             category_folder = self.organized_path / "by_category" / metadata['category']
@@ -245,6 +261,7 @@ class KFGDocumentFixer:
             logger.info(f"Successfully processed: {filename}")
             return {
                 'filename': filename,
+                'document_id': cleaned_filename,
                 'organized_filename': organized_filename,
                 'metadata': metadata,
                 'status': 'success'
@@ -268,23 +285,34 @@ class KFGDocumentFixer:
             'summary': {}
         }
         
+        # Fresh duplicate clustering for this run
+        self.duplicate_detector = NearDuplicateDetector()
+        
         # Process all .txt files
-        txt_files = list(self.base_path.glob("*.txt"))
+        source_snapshot = get_corpus_scanner(str(self.base_path), max_depth=0).snapshot()
+        txt_files = source_snapshot.files('', suffix='.txt')
         logger.info(f"Found {len(txt_files)} text files to process")
         
-        for file_path in txt_files:
-            result = self.process_document(str(file_path))
+        for entry in txt_files:
+            result = self.process_document(entry.path)
             if result:
                 if result['status'] == 'success':
                     results['processed'].append(result)
                 else:
                     results['errors'].append(result)
         
+        # Tag near-duplicate versions; the latest dated copy stays primary
+        version_tags = self.duplicate_detector.assign_versions()
+        for result in results['processed']:
+            result['metadata'].update(version_tags.get(result['document_id'], {}))
+        self.catalog.upsert_documents([(r['document_id'], r['metadata']) for r in results['processed']])
+        
         # Generate summary
         results['summary'] = {
             'total_files': len(txt_files),
             'successfully_processed': len(results['processed']),
             'errors': len(results['errors']),
+            'duplicate_versions': sum(1 for tag in version_tags.values() if not tag['is_primary_version']),
             'categories': {},
             'types': {}
         }
@@ -297,6 +325,9 @@ class KFGDocumentFixer:
             results['summary']['categories'][category] = results['summary']['categories'].get(category, 0) + 1
             results['summary']['types'][doc_type] = results['summary']['types'].get(doc_type, 0) + 1
         
+        # Organized folder changed; make the shared snapshot pick it up
+        get_corpus_scanner(str(self.organized_path)).invalidate()
+        
         # Save results
         results_file = self.base_path / "processing_results_v2.json"
         with open(results_file, 'w', encoding='utf-8') as f:
@@ -316,31 +347,12 @@ class KFGDocumentFixer:
             'documents': []
         }
         
-        # Read all metadata files
-        metadata_files = list(self.metadata_path.glob("*_metadata.json"))
-        
-        for metadata_file in metadata_files:
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                index['documents'].append(metadata)
-                index['total_documents'] += 1
-                
-                # Count by category
-                category = metadata['category']
-                if category not in index['categories']:
-                    index['categories'][category] = []
-                index['categories'][category].append(metadata['filename'])
-                
-                # Count by type
-                doc_type = metadata['document_type']
-                if doc_type not in index['types']:
-                    index['types'][doc_type] = []
-                index['types'][doc_type].append(metadata['filename'])
-                
-            except Exception as e:
-                logger.error(f"Error reading metadata file {metadata_file}: {e}")
+        # Build the index from the catalog
+        self.catalog.ensure_populated()
+        index['documents'] = list(self.catalog.get_all_metadata().values())
+        index['total_documents'] = len(index['documents'])
+        index['categories'] = self.catalog.filenames_by('category')
+        index['types'] = self.catalog.filenames_by('document_type')
         
         # Save index
         index_file = self.base_path / "document_index_v2.json"
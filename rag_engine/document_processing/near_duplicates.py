@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection for KFG Policy Documents
+MinHash signatures + LSH banding to cluster reissued circulars and notices
+"""
+
+import os
+import re
+import sys
+import zlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Prime just above 2**32 for the universal hash family (a * x + b) mod p
+_MERSENNE_LIKE_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+DATE_FORMATS = [
+    '%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d',
+    '%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y',
+    '%d-%m-%y', '%d/%m/%y', '%d.%m.%y',
+    '%B %d, %Y', '%B %d,%Y', '%b %d, %Y'
+]
+
+
+def parse_document_date(value: Optional[str]) -> datetime:
+    """Parse the extracted `date` metadata; unknown dates sort oldest"""
+    if value:
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(value.strip(), fmt)
+            except ValueError:
+                continue
+    return datetime.min
+
+
+class MinHasher:
+    """Computes MinHash signatures over word shingles"""
+
+    def __init__(self, num_perm: int = None, shingle_size: int = None, seed: int = 1):
+        self.num_perm = num_perm or Config.MINHASH_NUM_PERM
+        self.shingle_size = shingle_size or Config.MINHASH_SHINGLE_SIZE
+
+        # a < 2**31 and x < 2**32 keeps a * x + b inside uint64
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 31, size=self.num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = rng.randint(0, 2 ** 31, size=self.num_perm, dtype=np.int64).astype(np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hashed word k-grams of the normalized text"""
+        words = re.findall(r'\w+', text.lower())
+        if len(words) < self.shingle_size:
+            grams = [" ".join(words)] if words else []
+        else:
+            grams = [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        hashes = {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (num_perm uint32 values)"""
+        shingles = self.shingles(text)
+        if shingles.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (num_shingles, num_perm) permuted hashes, min over shingles
+        permuted = (np.outer(shingles, self._a) + self._b) % _MERSENNE_LIKE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    @staticmethod
+    def jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity from two signatures"""
+        return float(np.mean(sig_a == sig_b))
+
+
+class NearDuplicateDetector:
+    """Clusters near-duplicate documents with LSH and keeps the latest version as primary"""
+
+    def __init__(self, threshold: float = None, num_perm: int = None, bands: int = None):
+        self.threshold = Config.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands or Config.MINHASH_BANDS
+        if self.hasher.num_perm % self.bands != 0:
+            raise ValueError("MINHASH_NUM_PERM must be divisible by MINHASH_BANDS")
+        self.rows = self.hasher.num_perm // self.bands
+
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._dates: Dict[str, datetime] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bands)]
+
+    def add(self, document_id: str, text: str, date: str = None):
+        """Register a document's signature in the LSH buckets"""
+        signature = self.hasher.signature(text)
+        self._signatures[document_id] = signature
+        self._dates[document_id] = parse_document_date(date)
+
+        for band in range(self.bands):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            self._buckets[band].setdefault(key, []).append(document_id)
+
+    def clusters(self) -> List[List[str]]:
+        """Groups of near-duplicate document ids (singletons omitted)"""
+        parent = {doc_id: doc_id for doc_id in self._signatures}
+
+        def find(doc_id):
+            while parent[doc_id] != doc_id:
+                parent[doc_id] = parent[parent[doc_id]]
+                doc_id = parent[doc_id]
+            return doc_id
+
+        checked = set()
+        for buckets in self._buckets:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                for i, doc_a in enumerate(members):
+                    for doc_b in members[i + 1:]:
+                        pair = (doc_a, doc_b) if doc_a < doc_b else (doc_b, doc_a)
+                        if pair in checked:
+                            continue
+                        checked.add(pair)
+                        # LSH only proposes candidates; confirm with the signature estimate
+                        if MinHasher.jaccard(self._signatures[doc_a], self._signatures[doc_b]) >= self.threshold:
+                            parent[find(doc_a)] = find(doc_b)
+
+        groups = {}
+        for doc_id in self._signatures:
+            groups.setdefault(find(doc_id), []).append(doc_id)
+        return [sorted(members) for members in groups.values() if len(members) > 1]
+
+    def assign_versions(self) -> Dict[str, Dict[str, Any]]:
+        """Duplicate tags per document; the latest dated version in each cluster is primary"""
+        tags = {
+            doc_id: {
+                'duplicate_group': doc_id,
+                'duplicate_of': '',
+                'is_primary_version': True,
+                'duplicate_count': 1
+            }
+            for doc_id in self._signatures
+        }
+
+        for members in self.clusters():
+            primary = max(members, key=lambda doc_id: (self._dates[doc_id], doc_id))
+            for doc_id in members:
+                tags[doc_id] = {
+                    'duplicate_group': primary,
+                    'duplicate_of': '' if doc_id == primary else primary,
+                    'is_primary_version': doc_id == primary,
+                    'duplicate_count': len(members)
+                }
+
+        duplicates = sum(1 for tag in tags.values() if not tag['is_primary_version'])
+        logger.info(f"Near-duplicate detection: {duplicates} of {len(tags)} documents are older versions")
+        return tags
+
+
+def collapse_duplicates(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep only the best-scoring result per duplicate group (results must be sorted by score)"""
+    seen_groups = set()
+    collapsed = []
+    for result in results:
+        metadata = result.get('metadata') or {}
+        group = metadata.get('duplicate_group') or metadata.get('document_id')
+        if group and group in seen_groups:
+            continue
+        if group:
+            seen_groups.add(group)
+        collapsed.append(result)
+    return collapsed
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Text Extraction for KFG Policy Documents
+PDF text layer first, OCR fallback per page in a process pool, with page-level caching
+"""
+
+import os
+import io
+import sys
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from config.config import Config
+
+# Optional extraction dependencies - the processor still handles .txt files without them
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    PdfReader = None
+
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+    Image = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+PDF_EXTENSIONS = {'.pdf'}
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+TEXT_EXTENSIONS = {'.txt'}
+
+READ_BLOCK_SIZE = 1024 * 1024  # 1MB streaming read blocks
+
+
+class FileTooLargeError(ValueError):
+    """Raised when an input file exceeds Config.MAX_FILE_SIZE"""
+
+
+def _ocr_image_bytes(image_bytes: bytes, languages: str) -> str:
+    """OCR a single page image (runs inside a worker process)"""
+    image = Image.open(io.BytesIO(image_bytes))
+
+    if cv2 is not None:
+        # Grayscale + Otsu binarization noticeably improves Tesseract on scanned circulars
+        array = np.array(image.convert('L'))
+        _, array = cv2.threshold(array, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        image = Image.fromarray(array)
+
+    return pytesseract.image_to_string(image, lang=languages)
+
+
+class TextExtractor:
+    """Extracts text from .txt, .pdf and image files with cached, parallel OCR"""
+
+    def __init__(self, cache_path: str = None, max_workers: int = None):
+        self.cache_path = Path(cache_path or Config.OCR_CACHE_PATH)
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers or Config.OCR_MAX_WORKERS or os.cpu_count() or 1
+        self.languages = Config.OCR_LANGUAGES
+        self.min_text_chars = Config.OCR_MIN_TEXT_CHARS
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Lazily start the OCR worker pool (only when a page actually needs OCR)"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self):
+        """Stop the OCR worker pool"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def check_file_size(self, file_path: str) -> int:
+        """Reject files larger than MAX_FILE_SIZE before reading them"""
+        size = os.path.getsize(file_path)
+        if size > Config.MAX_FILE_SIZE:
+            raise FileTooLargeError(
+                f"{os.path.basename(file_path)} is {size} bytes; maximum is {Config.MAX_FILE_SIZE} bytes"
+            )
+        return size
+
+    def _read_stream(self, file_path: str) -> tuple:
+        """Read a file in blocks, hashing as we go; returns (bytes, sha256)"""
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+                digest.update(block)
+                buffer.write(block)
+        return buffer.getvalue(), digest.hexdigest()
+
+    def _cache_get(self, page_hash: str) -> Optional[str]:
+        cache_file = self.cache_path / f"{page_hash}.txt"
+        if cache_file.exists():
+            return cache_file.read_text(encoding='utf-8')
+        return None
+
+    def _cache_put(self, page_hash: str, text: str):
+        cache_file = self.cache_path / f"{page_hash}.txt"
+        tmp_file = cache_file.with_suffix('.tmp')
+        tmp_file.write_text(text, encoding='utf-8')
+        os.replace(tmp_file, cache_file)
+
+    def _ocr_pages(self, page_images: Dict[int, bytes]) -> Dict[int, str]:
+        """OCR page images in parallel, serving repeated pages from the cache"""
+        results, pending = {}, {}
+        for page_number, image_bytes in page_images.items():
+            page_hash = hashlib.sha256(image_bytes).hexdigest()
+            cached = self._cache_get(page_hash)
+            if cached is not None:
+                results[page_number] = cached
+            else:
+                pending[page_number] = (page_hash, image_bytes)
+
+        if not pending:
+            return results
+
+        if len(pending) == 1 or self.max_workers == 1:
+            texts = {n: _ocr_image_bytes(data, self.languages) for n, (_, data) in pending.items()}
+        else:
+            executor = self._get_executor()
+            futures = {n: executor.submit(_ocr_image_bytes, data, self.languages)
+                       for n, (_, data) in pending.items()}
+            texts = {n: future.result() for n, future in futures.items()}
+
+        for page_number, text in texts.items():
+            self._cache_put(pending[page_number][0], text)
+            results[page_number] = text
+
+        return results
+
+    def _page_image_bytes(self, page) -> Optional[bytes]:
+        """Largest embedded image on a PDF page (scanned pages carry one full-page image)"""
+        try:
+            images = page.images
+        except Exception as e:
+            logger.warning(f"Could not read page images: {e}")
+            return None
+        if not images:
+            return None
+        return max((image.data for image in images), key=len)
+
+    def extract_pdf(self, file_path: str) -> Dict[str, Any]:
+        """Text layer per page, OCR fallback for pages without usable text"""
+        if PdfReader is None:
+            raise ImportError("PyPDF2 is required for PDF extraction")
+
+        page_texts, ocr_candidates = {}, {}
+        with open(file_path, 'rb') as f:
+            reader = PdfReader(f)
+            for page_number, page in enumerate(reader.pages):
+                text = page.extract_text() or ''
+                page_texts[page_number] = text
+
+                if len(text.strip()) < self.min_text_chars and Config.ENABLE_OCR:
+                    image_bytes = self._page_image_bytes(page)
+                    if image_bytes:
+                        ocr_candidates[page_number] = image_bytes
+
+        ocr_pages = []
+        if ocr_candidates:
+            if pytesseract is None:
+                logger.warning(f"{len(ocr_candidates)} scanned pages in {file_path} skipped: pytesseract not installed")
+            else:
+                page_texts.update(self._ocr_pages(ocr_candidates))
+                ocr_pages = sorted(ocr_candidates)
+
+        return {
+            'text': "\n\n".join(page_texts[n] for n in sorted(page_texts)),
+            'method': 'ocr' if ocr_pages and len(ocr_pages) == len(page_texts) else ('mixed' if ocr_pages else 'text_layer'),
+            'pages': len(page_texts),
+            'ocr_pages': ocr_pages
+        }
+
+    def extract_image(self, file_path: str) -> Dict[str, Any]:
+        """OCR a single image file"""
+        if not Config.ENABLE_OCR:
+            raise ValueError("OCR is disabled (Config.ENABLE_OCR)")
+        if pytesseract is None:
+            raise ImportError("pytesseract and Pillow are required for image OCR")
+
+        image_bytes, _ = self._read_stream(file_path)
+        text = self._ocr_pages({0: image_bytes})[0]
+        return {'text': text, 'method': 'ocr', 'pages': 1, 'ocr_pages': [0]}
+
+    def extract_text_file(self, file_path: str) -> Dict[str, Any]:
+        """Plain text file, read in blocks"""
+        data, _ = self._read_stream(file_path)
+        return {'text': data.decode('utf-8', errors='ignore'), 'method': 'text', 'pages': 1, 'ocr_pages': []}
+
+    def extract(self, file_path: str) -> Dict[str, Any]:
+        """Extract text from any supported file type"""
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension not in Config.ALLOWED_EXTENSIONS:
+            raise ValueError(f"Unsupported file type: {extension}")
+
+        file_size = self.check_file_size(file_path)
+
+        if extension in PDF_EXTENSIONS:
+            result = self.extract_pdf(file_path)
+        elif extension in IMAGE_EXTENSIONS:
+            result = self.extract_image(file_path)
+        else:
+            result = self.extract_text_file(file_path)
+
+        result['file_size'] = file_size
+        result['source_format'] = extension.lstrip('.')
+        return result
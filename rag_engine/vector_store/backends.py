@@ -0,0 +1,711 @@
+"""
+Vector Search Backends
+Search indexes behind VectorStore. Chroma is always the durable store; an
+in-memory backend is loaded from the stored embeddings and written through
+on add/delete. Writers stamp a per-collection change marker so in-memory
+indexes in other processes reload (see is_stale).
+
+  ChromaBackend      - queries the Chroma collection (HNSW)
+  FlatIndexBackend   - exact brute-force search over a float32 matrix, or over
+                       float16 / int8 codes with full-precision rescoring
+  FaissBackend       - optional FAISS HNSW / IVF-PQ index (faiss_backend.py)
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields kept as columns for vectorized filtering
+FILTER_FIELDS = ("category", "document_type", "document_id")
+
+# Flat index storage precisions (Config.VECTOR_STORAGE_DTYPE)
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Quantized codes are widened to float32 this many rows at a time when scoring
+SCORE_BLOCK_ROWS = 2048
+
+
+class SearchBackend(ABC):
+    """Nearest-neighbour search over unit-length embeddings (cosine distance)"""
+
+    name = "base"
+    # Change marker of the collection this index reflects (in-memory backends)
+    loaded_marker: Optional[str] = None
+
+    @abstractmethod
+    def query(self, embedding, n_results: int, where: Dict[str, Any] = None,
+              include_embeddings: bool = False, include_documents: bool = True) -> List[Dict[str, Any]]:
+        """Rows {'id', 'metadata', 'distance'[, 'document'][, 'embedding']}, nearest first
+
+        Backends that must deserialize bodies to return them skip 'document'
+        when include_documents is False; fetch_documents() gets them later.
+        """
+
+    @abstractmethod
+    def fetch_documents(self, ids: List[str]) -> Dict[str, str]:
+        """id -> document body for rows returned by query()"""
+
+    @abstractmethod
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Mirror rows just written to the durable store"""
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Forget rows just deleted from the durable store"""
+
+    @abstractmethod
+    def count(self) -> int:
+        pass
+
+    def reset(self):
+        """Drop everything (the durable collection was cleared)"""
+        self.delete(self.ids())
+
+    def ids(self) -> List[str]:
+        return []
+
+    def flush(self):
+        """Persist any derived on-disk state after a bulk write"""
+
+
+class ChromaBackend(SearchBackend):
+    """Queries go straight to the Chroma collection; writes are already there"""
+
+    name = "chroma"
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def query(self, embedding, n_results: int, where: Dict[str, Any] = None,
+              include_embeddings: bool = False, include_documents: bool = True) -> List[Dict[str, Any]]:
+        include = ['metadatas', 'distances']
+        if include_documents:
+            include.append('documents')
+        if include_embeddings:
+            include.append('embeddings')
+        results = self.collection.query(
+            query_embeddings=[list(map(float, embedding))],
+            n_results=n_results,
+            where=where,
+            include=include
+        )
+        rows = []
+        for i, row_id in enumerate(results['ids'][0]):
+            row = {
+                'id': row_id,
+                'metadata': results['metadatas'][0][i],
+                'distance': results['distances'][0][i]
+            }
+            if include_documents:
+                row['document'] = results['documents'][0][i]
+            if include_embeddings:
+                row['embedding'] = results['embeddings'][0][i]
+            rows.append(row)
+        return rows
+
+    def fetch_documents(self, ids: List[str]) -> Dict[str, str]:
+        if not ids:
+            return {}
+        results = self.collection.get(ids=list(ids), include=['documents'])
+        return dict(zip(results['ids'], results['documents']))
+
+    def add(self, ids, embeddings, documents, metadatas):
+        pass
+
+    def delete(self, ids):
+        pass
+
+    def reset(self):
+        pass
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class _FlatSnapshot:
+    """Immutable view of the flat index: the first `count` rows of the buffers
+
+    Appends write past `count` and publish a new snapshot, so a reader holding
+    an older snapshot never sees partially written rows.
+    """
+
+    __slots__ = ("count", "ids", "vectors", "documents", "metadatas", "columns", "live", "full", "scale")
+
+    def __init__(self, count: int, ids: List[str], vectors: np.ndarray, documents: List[str],
+                 metadatas: List[Dict[str, Any]], columns: Dict[str, np.ndarray], live: np.ndarray,
+                 full: np.ndarray = None, scale: np.ndarray = None):
+        self.count = count
+        self.ids = ids
+        self.vectors = vectors
+        self.documents = documents
+        self.metadatas = metadatas
+        self.columns = columns
+        # False for deleted rows (tombstones), which stay in the buffers until the next compaction
+        self.live = live
+        # Quantized storage only: float32 rows for rescoring, and the int8 per-dimension scale
+        self.full = full
+        self.scale = scale
+
+    def with_count(self, count: int) -> "_FlatSnapshot":
+        return _FlatSnapshot(count, self.ids, self.vectors, self.documents, self.metadatas,
+                             self.columns, self.live, self.full, self.scale)
+
+
+def _metadata_column(metadatas: List[Dict[str, Any]], field: str, capacity: int) -> np.ndarray:
+    column = np.empty(capacity, dtype=object)
+    column[:len(metadatas)] = [(metadata or {}).get(field) for metadata in metadatas]
+    return column
+
+
+def int8_scale(vectors: np.ndarray) -> np.ndarray:
+    """Per-dimension symmetric scale mapping the largest |component| to 127"""
+    return np.maximum(np.abs(vectors).max(axis=0), 1e-6).astype(np.float32) / 127.0
+
+
+def quantize(vectors: np.ndarray, precision: str, scale: np.ndarray = None) -> np.ndarray:
+    """float32 rows -> storage codes (int8 needs the scale from int8_scale)"""
+    if precision == "int8":
+        return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return np.asarray(vectors, dtype=STORAGE_DTYPES[precision])
+
+
+class FlatIndexBackend(SearchBackend):
+    """Exact top-k over a float32 matrix: one matrix-vector product plus argpartition
+
+    Readers take the current snapshot without locking; writers append into
+    spare buffer capacity (doubling when full) under a lock and publish a new
+    snapshot, so one instance is safely shared by every thread (see
+    get_flat_index). With mmap_path set, the matrix is saved to a .npy file and
+    memory-mapped read-only, so worker processes share the pages through the
+    OS cache instead of each holding a copy; writes move it back to the heap
+    until the next flush().
+
+    With precision "float16" or "int8" the heap holds 2- or 1-byte codes per
+    component. A query ranks every row on the codes, then rescores the best
+    n_results * rescore_multiplier candidates against float32 rows kept in an
+    unlinked scratch file under scratch_dir; only those pages are read, so the
+    full-precision copy stays in the OS page cache rather than on the heap.
+
+    Deletes (and re-adds, which delete the old rows) only mark rows dead; the
+    buffers are compacted once FLAT_MAX_TOMBSTONE_FRACTION of them are dead,
+    so re-indexing existing documents does not re-quantize the matrix per call.
+
+    Loaded from a collection, the index holds no document bodies: query()
+    leaves 'document' out and fetch_documents() reads them from the collection
+    for the final results (VectorStore tries the text store first).
+    """
+
+    name = "flat"
+
+    def __init__(self, ids: List[str], vectors, documents: List[str], metadatas: List[Dict[str, Any]],
+                 mmap_path: str = None, precision: str = "float32", rescore_multiplier: int = None,
+                 scratch_dir: str = None, collection=None):
+        if precision not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown vector storage precision '{precision}' (use one of {list(STORAGE_DTYPES)})")
+        self._lock = threading.Lock()
+        self.precision = precision
+        self.rescore_multiplier = max(1, rescore_multiplier or Config.RESCORE_CANDIDATE_MULTIPLIER)
+        self.scratch_dir = scratch_dir or Config.FLAT_INDEX_PATH
+        if mmap_path and precision != "float32":
+            logger.info(f"Flat index mmap file is only used with float32 storage; keeping {precision} codes in memory")
+            mmap_path = None
+        self.mmap_path = mmap_path
+        self.collection = collection
+        self._dirty = False
+        self._rebuild(list(ids), vectors, self._bodies(documents, len(ids)), list(metadatas))
+        if mmap_path and not isinstance(vectors, np.memmap):
+            self.flush(force=True)
+
+    @classmethod
+    def from_collection(cls, collection, batch_size: int = 1000, mmap_path: str = None,
+                        precision: str = "float32") -> "FlatIndexBackend":
+        """Load rows from the durable collection (embeddings come from the mmap file when it is current)"""
+        cached = cls._load_mmap(mmap_path) if mmap_path else None
+        rows = cls._read_collection(collection, batch_size, with_embeddings=cached is None)
+        if cached is not None and cached[0] != rows['ids']:
+            logger.info(f"Flat index file {mmap_path} is stale; reloading embeddings from the collection")
+            cached = None
+            rows = cls._read_collection(collection, batch_size, with_embeddings=True)
+        vectors = cached[1] if cached is not None else rows['embeddings']
+        return cls(rows['ids'], vectors, [], rows['metadatas'], mmap_path=mmap_path,
+                   precision=precision, collection=collection)
+
+    @staticmethod
+    def _read_collection(collection, batch_size: int, with_embeddings: bool) -> Dict[str, list]:
+        # Bodies stay in the collection (and text store); only ids, metadata and vectors are loaded
+        include = ['metadatas'] + (['embeddings'] if with_embeddings else [])
+        rows = {'ids': [], 'metadatas': [], 'embeddings': []}
+        for offset in range(0, collection.count(), batch_size):
+            batch = collection.get(limit=batch_size, offset=offset, include=include)
+            rows['ids'].extend(batch['ids'])
+            rows['metadatas'].extend(batch['metadatas'])
+            if with_embeddings:
+                rows['embeddings'].extend(batch['embeddings'])
+        return rows
+
+    def _bodies(self, documents: List[str], count: int) -> List[Optional[str]]:
+        """Bodies to keep in memory: none when a collection can serve them"""
+        if self.collection is not None:
+            return [None] * count
+        return list(documents)
+
+    @staticmethod
+    def _load_mmap(path: str):
+        """(ids, mapped matrix) when the file and its id manifest exist"""
+        manifest = f"{path}.ids.json"
+        if not (os.path.exists(path) and os.path.exists(manifest)):
+            return None
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                ids = json.load(f)
+            return ids, np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable flat index file {path}: {e}")
+            return None
+
+    def _rebuild(self, ids: List[str], vectors, documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Publish a compact snapshot owning fresh buffers (caller holds the lock or is __init__)"""
+        count = len(ids)
+        matrix = vectors if isinstance(vectors, np.memmap) else np.asarray(vectors, dtype=np.float32)
+        full, scale = None, None
+        if count:
+            matrix = matrix.reshape(count, -1)
+            if self.precision != "float32":
+                full = self._scratch(count, matrix.shape[1])
+                full[:] = matrix
+                scale = int8_scale(matrix) if self.precision == "int8" else None
+                matrix = quantize(matrix, self.precision, scale)
+        self._positions = {row_id: i for i, row_id in enumerate(ids)}
+        self._tombstones = 0
+        self._snapshot = _FlatSnapshot(
+            count, ids, matrix, documents, metadatas,
+            {field: _metadata_column(metadatas, field, count) for field in FILTER_FIELDS},
+            np.ones(count, dtype=bool), full, scale
+        )
+
+    def _scratch(self, rows: int, dimensions: int) -> np.memmap:
+        """Disk-backed float32 rows for rescoring; the temp file is unlinked and lives as long as its maps"""
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        with tempfile.TemporaryFile(dir=self.scratch_dir) as f:
+            return np.memmap(f, dtype=np.float32, mode='w+', shape=(rows, dimensions))
+
+    def _grow(self, snapshot: _FlatSnapshot, needed: int, dimensions: int) -> _FlatSnapshot:
+        """Writable buffers with room for `needed` rows (copies when full or memory-mapped)"""
+        vectors = snapshot.vectors
+        capacity = len(vectors) if snapshot.count else 0
+        if needed <= capacity and not isinstance(vectors, np.memmap):
+            return snapshot
+        capacity = max(needed, capacity * 2, 64)
+        buffer = np.empty((capacity, dimensions), dtype=STORAGE_DTYPES[self.precision])
+        full = self._scratch(capacity, dimensions) if self.precision != "float32" else None
+        if snapshot.count:
+            buffer[:snapshot.count] = vectors[:snapshot.count]
+            if full is not None:
+                full[:snapshot.count] = snapshot.full[:snapshot.count]
+        columns = {}
+        for field, column in snapshot.columns.items():
+            columns[field] = np.empty(capacity, dtype=object)
+            columns[field][:snapshot.count] = column[:snapshot.count]
+        live = np.ones(capacity, dtype=bool)
+        live[:snapshot.count] = snapshot.live[:snapshot.count]
+        return _FlatSnapshot(snapshot.count, snapshot.ids, buffer, snapshot.documents, snapshot.metadatas,
+                             columns, live, full, snapshot.scale)
+
+    def _full_rows(self, snapshot: _FlatSnapshot, positions) -> np.ndarray:
+        """float32 rows at `positions`, wherever the full-precision copy lives"""
+        source = snapshot.full if snapshot.full is not None else snapshot.vectors
+        return np.asarray(source[positions], dtype=np.float32)
+
+    def _scores(self, snapshot: _FlatSnapshot, query_vector: np.ndarray, candidates: Optional[np.ndarray]) -> np.ndarray:
+        """Inner products of the query with every (or every candidate) row, computed on the stored codes"""
+        vectors = snapshot.vectors[:snapshot.count]
+        if candidates is not None:
+            vectors = vectors[candidates]
+        if vectors.dtype == np.float32:
+            return vectors @ query_vector
+        # int8 codes are stored divided by the scale, so fold it into the query instead of every row
+        weights = query_vector * snapshot.scale if snapshot.scale is not None else query_vector
+        scores = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = vectors[start:start + SCORE_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ weights
+        return scores
+
+    def _mask(self, snapshot: _FlatSnapshot, where: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Boolean row mask for equality filters: {field: value}, {field: {"$eq": value}} or "$and" of those"""
+        if not where:
+            return None
+        conditions = where["$and"] if "$and" in where else [{field: value} for field, value in where.items()]
+        count = snapshot.count
+        mask = np.ones(count, dtype=bool)
+        for condition in conditions:
+            for field, value in condition.items():
+                if field.startswith("$"):
+                    raise ValueError(f"Unsupported filter for flat index: {condition}")
+                if isinstance(value, dict):
+                    if set(value) != {"$eq"}:
+                        raise ValueError(f"Unsupported filter for flat index: {condition}")
+                    value = value["$eq"]
+                column = snapshot.columns.get(field)
+                if column is None:
+                    column = _metadata_column(snapshot.metadatas[:count], field, count)
+                mask &= column[:count] == value
+        return mask
+
+    def query(self, embedding, n_results: int, where: Dict[str, Any] = None,
+              include_embeddings: bool = False, include_documents: bool = True) -> List[Dict[str, Any]]:
+        # Bodies held in memory (standalone indexes) are attached whatever include_documents says
+        snapshot = self._snapshot
+        if not snapshot.count or n_results <= 0:
+            return []
+        query_vector = np.asarray(embedding, dtype=np.float32)
+
+        live = snapshot.live[:snapshot.count]
+        dead = not live.all()
+        mask = self._mask(snapshot, where)
+        if mask is not None and dead:
+            mask &= live
+        candidates = None if mask is None else np.flatnonzero(mask)
+        if candidates is not None and not len(candidates):
+            return []
+        scores = self._scores(snapshot, query_vector, candidates)
+        available = len(scores)
+        if candidates is None and dead:
+            # Scoring every row and sinking the dead ones beats copying out the live rows
+            scores[~live] = -np.inf
+            available = int(live.sum())
+            if not available:
+                return []
+
+        n = min(n_results, available)
+        if snapshot.full is not None:
+            # Shortlist on the quantized codes, then rank the shortlist in full precision
+            n = min(n * self.rescore_multiplier, available)
+        top = np.argpartition(-scores, n - 1)[:n]
+        positions = candidates[top] if candidates is not None else top
+        if snapshot.full is not None:
+            scores = self._full_rows(snapshot, positions) @ query_vector
+        else:
+            scores = scores[top]
+        order = np.argsort(-scores)[:n_results]
+
+        rows = []
+        for i in order:
+            position = int(positions[i])
+            row = {
+                'id': snapshot.ids[position],
+                'metadata': snapshot.metadatas[position],
+                'distance': float(1.0 - scores[i])
+            }
+            if snapshot.documents[position] is not None:
+                row['document'] = snapshot.documents[position]
+            if include_embeddings:
+                row['embedding'] = self._full_rows(snapshot, position).tolist()
+            rows.append(row)
+        return rows
+
+    def fetch_documents(self, ids: List[str]) -> Dict[str, str]:
+        snapshot = self._snapshot
+        positions = self._positions
+        documents, unloaded = {}, []
+        for row_id in ids:
+            position = positions.get(row_id)
+            if position is not None and position < snapshot.count and snapshot.ids[position] == row_id:
+                if snapshot.documents[position] is not None:
+                    documents[row_id] = snapshot.documents[position]
+                else:
+                    unloaded.append(row_id)
+        if unloaded and self.collection is not None:
+            stored = self.collection.get(ids=unloaded, include=['documents'])
+            documents.update(zip(stored['ids'], stored['documents']))
+        return documents
+
+    def add(self, ids, embeddings, documents, metadatas):
+        new_vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        documents = self._bodies(documents, len(ids))
+        with self._lock:
+            if any(row_id in self._positions for row_id in ids):
+                # Re-added ids replace their old rows
+                self._delete_locked(set(ids))
+            snapshot = self._snapshot
+            if self.precision == "int8" and (snapshot.scale is None or
+                                             np.any(np.abs(new_vectors) > snapshot.scale * 127)):
+                # Out-of-range components would clip: re-quantize every live row with the wider range
+                keep = self._live_positions(snapshot)
+                self._rebuild(
+                    [snapshot.ids[i] for i in keep] + list(ids),
+                    np.vstack([self._full_rows(snapshot, keep), new_vectors]) if len(keep) else new_vectors,
+                    [snapshot.documents[i] for i in keep] + list(documents),
+                    [snapshot.metadatas[i] for i in keep] + list(metadatas)
+                )
+                self._mark_dirty()
+                return
+            snapshot = self._grow(snapshot, snapshot.count + len(ids), new_vectors.shape[1])
+            start, end = snapshot.count, snapshot.count + len(ids)
+            snapshot.vectors[start:end] = quantize(new_vectors, self.precision, snapshot.scale)
+            if snapshot.full is not None:
+                snapshot.full[start:end] = new_vectors
+            for field, column in snapshot.columns.items():
+                column[start:end] = [(metadata or {}).get(field) for metadata in metadatas]
+            # Lists are shared with older snapshots, which only read below their own count
+            snapshot.ids.extend(ids)
+            snapshot.documents.extend(documents)
+            snapshot.metadatas.extend(metadatas)
+            for offset, row_id in enumerate(ids):
+                self._positions[row_id] = start + offset
+            self._snapshot = snapshot.with_count(end)
+            self._mark_dirty()
+
+    @staticmethod
+    def _live_positions(snapshot: _FlatSnapshot) -> np.ndarray:
+        return np.flatnonzero(snapshot.live[:snapshot.count])
+
+    def _delete_locked(self, removed: set):
+        """Tombstone rows in place; compact once too many are dead"""
+        snapshot = self._snapshot
+        for row_id in removed:
+            position = self._positions.pop(row_id, None)
+            if position is not None:
+                # Older snapshots share this mask, so they stop returning the row too
+                snapshot.live[position] = False
+                self._tombstones += 1
+        if self._tombstones > Config.FLAT_MAX_TOMBSTONE_FRACTION * snapshot.count:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """Rebuild the buffers from the live rows only"""
+        snapshot = self._snapshot
+        keep = self._live_positions(snapshot)
+        self._rebuild(
+            [snapshot.ids[i] for i in keep],
+            self._full_rows(snapshot, keep),
+            [snapshot.documents[i] for i in keep],
+            [snapshot.metadatas[i] for i in keep]
+        )
+
+    def delete(self, ids):
+        with self._lock:
+            removed = set(ids) & self._positions.keys()
+            if not removed:
+                return
+            self._delete_locked(removed)
+            self._mark_dirty()
+
+    def reset(self):
+        with self._lock:
+            self._rebuild([], np.zeros((0, 0), np.float32), [], [])
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        """The mmap file no longer matches; drop its manifest so no process maps stale vectors"""
+        if self.mmap_path and not self._dirty:
+            self._dirty = True
+            try:
+                os.remove(f"{self.mmap_path}.ids.json")
+            except OSError:
+                pass
+
+    def flush(self, force: bool = False):
+        """Write the matrix to the mmap file and map it (no-op without mmap_path)"""
+        if not self.mmap_path or not (self._dirty or force):
+            return
+        with self._lock:
+            if self._tombstones:
+                self._compact_locked()
+            snapshot = self._snapshot
+            if not snapshot.count:
+                return
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.mmap_path)), exist_ok=True)
+                temp_path = f"{self.mmap_path}.tmp.npy"
+                np.save(temp_path, np.ascontiguousarray(snapshot.vectors[:snapshot.count]))
+                os.replace(temp_path, self.mmap_path)
+                with open(f"{self.mmap_path}.ids.json", 'w', encoding='utf-8') as f:
+                    json.dump(snapshot.ids[:snapshot.count], f)
+            except OSError as e:
+                logger.warning(f"Could not write flat index file {self.mmap_path}: {e}; keeping it in memory")
+                return
+            self._rebuild(snapshot.ids[:snapshot.count], np.load(self.mmap_path, mmap_mode='r'),
+                          snapshot.documents[:snapshot.count], snapshot.metadatas[:snapshot.count])
+            self._dirty = False
+
+    def ids(self) -> List[str]:
+        snapshot = self._snapshot
+        if snapshot.live[:snapshot.count].all():
+            return snapshot.ids[:snapshot.count]
+        return [snapshot.ids[i] for i in self._live_positions(snapshot)]
+
+    def count(self) -> int:
+        snapshot = self._snapshot
+        return int(snapshot.live[:snapshot.count].sum())
+
+    def memory_bytes(self) -> int:
+        """Heap bytes held by the vector matrix (0 when memory-mapped)"""
+        vectors = self._snapshot.vectors
+        return 0 if isinstance(vectors, np.memmap) else int(vectors.nbytes)
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Bytes of the stored vectors against the same rows held as float32"""
+        snapshot = self._snapshot
+        dimensions = snapshot.vectors.shape[1] if snapshot.count else 0
+        stored = snapshot.count * dimensions * np.dtype(STORAGE_DTYPES[self.precision]).itemsize
+        float32_bytes = snapshot.count * dimensions * 4
+        return {
+            "precision": self.precision,
+            "configured_precision": Config.VECTOR_STORAGE_DTYPE,
+            "applied": True,
+            "rows": self.count(),
+            "tombstones": snapshot.count - self.count(),
+            "vector_bytes": stored,
+            "float32_bytes": float32_bytes,
+            "saved_bytes": float32_bytes - stored,
+            "rescore_multiplier": self.rescore_multiplier if self.precision != "float32" else None
+        }
+
+
+# In-memory indexes shared by every VectorStore in the process, keyed by collection
+_flat_indexes: Dict[str, SearchBackend] = {}
+_flat_lock = threading.Lock()
+
+# (collection, backend) pairs already warned that VECTOR_STORAGE_DTYPE does not apply
+_dtype_warned = set()
+
+
+def storage_report(backend: SearchBackend) -> Dict[str, Any]:
+    """Vector storage in effect for a backend; says when VECTOR_STORAGE_DTYPE is not applied"""
+    if isinstance(backend, FlatIndexBackend):
+        return backend.memory_report()
+    report = {
+        "precision": "float32" if isinstance(backend, ChromaBackend) else "backend",
+        "configured_precision": Config.VECTOR_STORAGE_DTYPE,
+        "applied": Config.VECTOR_STORAGE_DTYPE == "float32"
+    }
+    if not report["applied"]:
+        report["note"] = (f"VECTOR_STORAGE_DTYPE only applies to the flat index; "
+                          f"the {backend.name} backend stores vectors its own way")
+    return report
+
+
+def _marker_path(collection_name: str) -> str:
+    return os.path.join(Config.FLAT_INDEX_PATH, f"{collection_name}.changed")
+
+
+def read_change_marker(collection_name: str) -> Optional[str]:
+    try:
+        with open(_marker_path(collection_name), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def record_change(collection_name: str, backend: SearchBackend = None):
+    """Stamp a new change marker after writing to a collection
+
+    `backend` already holds the write; it adopts the new marker unless another
+    process changed the collection since it was loaded, in which case it stays
+    stale and reloads.
+    """
+    previous = read_change_marker(collection_name)
+    token = f"{os.getpid()}-{time.time_ns()}"
+    path = _marker_path(collection_name)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(f"{path}.{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+            f.write(token)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+    except OSError as e:
+        logger.warning(f"Could not write change marker {path}: {e}")
+        return
+    if backend is not None and backend.loaded_marker == previous:
+        backend.loaded_marker = token
+
+
+def is_stale(collection, backend: SearchBackend) -> bool:
+    """Whether an in-memory index misses writes made through another process"""
+    if isinstance(backend, ChromaBackend):
+        return False
+    if read_change_marker(collection.name) != backend.loaded_marker:
+        return True
+    return collection.count() != backend.count()
+
+
+def get_flat_index(collection) -> FlatIndexBackend:
+    """Load a collection's flat index once and share it across threads"""
+    key = f"{os.path.abspath(Config.CHROMA_DB_PATH)}:{collection.name}"
+    with _flat_lock:
+        index = _flat_indexes.get(key)
+        if index is None:
+            mmap_path = os.path.join(Config.FLAT_INDEX_PATH, f"{collection.name}.npy") if Config.FLAT_INDEX_MMAP else None
+            # Read before loading, so writes made during the load show up as a change
+            marker = read_change_marker(collection.name)
+            index = FlatIndexBackend.from_collection(collection, mmap_path=mmap_path,
+                                                     precision=Config.VECTOR_STORAGE_DTYPE)
+            index.loaded_marker = marker
+            _flat_indexes[key] = index
+            logger.info(f"Loaded flat index for '{collection.name}' ({index.count()} rows, {index.precision})")
+        return index
+
+
+def get_faiss_index(collection):
+    """Load (or build) a collection's FAISS index once and share it across threads"""
+    from rag_engine.vector_store.faiss_backend import FaissBackend
+    key = f"faiss:{os.path.abspath(Config.CHROMA_DB_PATH)}:{collection.name}"
+    with _flat_lock:
+        index = _flat_indexes.get(key)
+        if index is None:
+            index_path = os.path.join(Config.FLAT_INDEX_PATH, f"{collection.name}.{Config.FAISS_INDEX_TYPE}.faiss")
+            marker = read_change_marker(collection.name)
+            index = FaissBackend(collection, index_path=index_path)
+            index.loaded_marker = marker
+            _flat_indexes[key] = index
+        return index
+
+
+def release_index(collection_name: str):
+    """Drop cached in-memory indexes of a collection that no longer serves searches"""
+    with _flat_lock:
+        for key in [key for key in _flat_indexes if key.endswith(f":{collection_name}")]:
+            del _flat_indexes[key]
+
+
+def select_backend(collection, preference: str = None) -> SearchBackend:
+    """Backend for a collection: Config.VECTOR_BACKEND, or by size when "auto"
+
+    Below FLAT_INDEX_MAX_ROWS a brute-force matrix product beats the
+    Chroma/SQLite/HNSW round trip (utils/benchmark_backends.py measures the
+    crossover); above it the HNSW index wins.
+    """
+    preference = (preference or Config.VECTOR_BACKEND).lower()
+    if preference == "auto":
+        preference = "flat" if collection.count() <= Config.FLAT_INDEX_MAX_ROWS else "chroma"
+    if preference == "flat":
+        return get_flat_index(collection)
+    if preference == "faiss":
+        try:
+            backend = get_faiss_index(collection)
+        except ImportError as e:
+            logger.warning(f"FAISS backend unavailable ({e}); using chroma")
+            backend = ChromaBackend(collection)
+    else:
+        if preference != "chroma":
+            logger.warning(f"Unknown vector backend '{preference}'; using chroma")
+        backend = ChromaBackend(collection)
+
+    if Config.VECTOR_STORAGE_DTYPE != "float32" and (collection.name, backend.name) not in _dtype_warned:
+        _dtype_warned.add((collection.name, backend.name))
+        logger.warning(f"VECTOR_STORAGE_DTYPE='{Config.VECTOR_STORAGE_DTYPE}' is ignored for '{collection.name}': "
+                       f"it only applies to the flat index, and the {backend.name} backend is serving it")
+    return backend
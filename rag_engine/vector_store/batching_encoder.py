@@ -0,0 +1,129 @@
+"""
+Batching Embedding Encoder
+Coalesces concurrent small encode() calls (one query per request) into a single
+model forward pass
+"""
+
+import os
+import sys
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Shared metrics
+EMBED_BATCH_SIZE = registry.histogram(
+    "kfg_embed_batch_size", "Texts per batched embedding call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+
+
+class BatchingEncoder:
+    """Drop-in wrapper for a SentenceTransformer that batches concurrent encode() calls
+
+    Requests queue while the model is busy and the next forward pass takes all
+    of them, so a lone request is never delayed (unless max_wait_ms is set to
+    hold the batch open a little longer). Calls with many texts, e.g. indexing,
+    go straight to the model. Every other attribute is forwarded to the model.
+    close() stops the worker; later calls then go straight to the model too.
+    """
+
+    def __init__(self, model, max_batch_size: int = None, max_wait_ms: float = None):
+        self.model = model
+        self.max_batch_size = max_batch_size or Config.EMBED_BATCH_MAX_SIZE
+        self.max_wait = (Config.EMBED_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        # Held while queueing and while closing, so no request lands behind the stop sentinel
+        self._lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts or len(texts) >= self.max_batch_size:
+            return self.model.encode(sentences, **kwargs)
+
+        # Only calls with identical options can share a forward pass
+        try:
+            options = tuple(sorted(kwargs.items()))
+            hash(options)
+        except TypeError:
+            return self.model.encode(sentences, **kwargs)
+
+        future = Future()
+        with self._lock:
+            if self._closed:
+                return self.model.encode(sentences, **kwargs)
+            self._queue.put((options, texts, future))
+        vectors = future.result()
+        return vectors[0] if single else vectors
+
+    def close(self):
+        """Stop the worker once the requests already queued are answered"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+    def _collect(self) -> List[tuple]:
+        """Block for one request, then take everything else already waiting (stops at the close sentinel)"""
+        item = self._queue.get()
+        if item is None:
+            return [None]
+        batch = [item]
+        size = len(item[1])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            try:
+                timeout = deadline - time.monotonic()
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is None:
+                break
+            size += len(item[1])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stopping = batch[-1] is None
+            if stopping:
+                batch.pop()
+
+            groups = {}
+            for options, texts, future in batch:
+                groups.setdefault(options, []).append((texts, future))
+
+            for options, requests in groups.items():
+                all_texts = [text for texts, _ in requests for text in texts]
+                EMBED_BATCH_SIZE.observe(len(all_texts))
+                try:
+                    vectors = self.model.encode(all_texts, **dict(options))
+                except Exception as e:
+                    logger.error(f"Batched embedding failed: {e}")
+                    for _, future in requests:
+                        future.set_exception(e)
+                    continue
+
+                offset = 0
+                for texts, future in requests:
+                    future.set_result(vectors[offset:offset + len(texts)])
+                    offset += len(texts)
+
+            if stopping:
+                return
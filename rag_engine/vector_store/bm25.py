@@ -0,0 +1,79 @@
+"""
+BM25 Keyword Index
+In-memory Okapi BM25 over document texts (English and Bangla tokens), plus
+reciprocal rank fusion for combining keyword and vector rankings
+"""
+
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Latin word characters or runs of the Bengali block (keeps vowel signs inside the word)
+TOKEN_PATTERN = re.compile(r'[\u0980-\u09FF]+|\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 with an inverted index (k1/b defaults from the literature)"""
+
+    def __init__(self, documents: Dict[str, str] = None, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        for document_id, text in (documents or {}).items():
+            self.add(document_id, text)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, document_id: str, text: str):
+        if document_id in self._lengths:
+            self.remove(document_id)
+        counts = Counter(tokenize(text))
+        for term, frequency in counts.items():
+            self._postings.setdefault(term, {})[document_id] = frequency
+        length = sum(counts.values())
+        self._lengths[document_id] = length
+        self._total_length += length
+
+    def remove(self, document_id: str):
+        length = self._lengths.pop(document_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in list(self._postings):
+            postings = self._postings[term]
+            if postings.pop(document_id, None) is not None and not postings:
+                del self._postings[term]
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """(document_id, score) pairs, best first"""
+        if not self._lengths:
+            return []
+        count = len(self._lengths)
+        average_length = self._total_length / count
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for document_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[document_id] / average_length)
+                scores[document_id] = scores.get(document_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """Merge ranked id lists: score(d) = sum 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, document_id in enumerate(ranking, 1):
+            scores[document_id] = scores.get(document_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,110 @@
+"""
+Collection Alias
+Maps the logical collection name (Config.COLLECTION_NAME) to the versioned
+Chroma collection currently serving searches. Rebuilds write into a new
+version and swap the pointer atomically; the previous version is kept for
+rollback and the one before it is retired.
+"""
+
+import os
+import sys
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+
+
+class CollectionAlias:
+    """Alias pointer stored as a small JSON file, replaced with os.replace on every change"""
+
+    def __init__(self, path: str = None, alias: str = None):
+        self.path = path or Config.COLLECTION_ALIAS_PATH
+        self.alias = alias or Config.COLLECTION_NAME
+        self._lock = threading.Lock()
+        self._cached_mtime = None
+        self._cached_state: Dict[str, Any] = {}
+
+    def read(self) -> Dict[str, Any]:
+        """Current pointer state ({} before the first swap); re-read only when the file changes"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return {}
+        # os.replace gives every write a new inode, so this also catches same-tick swaps
+        mtime = (stat.st_mtime_ns, stat.st_ino)
+        if mtime != self._cached_mtime:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._cached_state = json.load(f)
+                self._cached_mtime = mtime
+            except (OSError, ValueError):
+                return self._cached_state
+        return self._cached_state
+
+    def active(self) -> str:
+        """Collection serving searches (the plain alias name until the first swap)"""
+        return self.read().get("active") or self.alias
+
+    def previous(self) -> Optional[str]:
+        return self.read().get("previous")
+
+    def new_version_name(self) -> str:
+        return f"{self.alias}__{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+    def _write(self, state: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def swap(self, version: str) -> Dict[str, Any]:
+        """Point the alias at `version`; returns the new state (its `retired` entry may be dropped)"""
+        with self._lock:
+            current = self.read()
+            active = current.get("active") or self.alias
+            state = {
+                "alias": self.alias,
+                "active": version,
+                "previous": active,
+                "retired": current.get("previous"),
+                "updated_at": datetime.now().isoformat()
+            }
+            self._write(state)
+            return state
+
+    def rollback(self) -> Dict[str, Any]:
+        """Swap back to the previous version (the rolled-back one becomes previous)"""
+        with self._lock:
+            current = self.read()
+            if not current.get("previous"):
+                raise ValueError(f"No previous version of '{self.alias}' to roll back to")
+            state = {
+                "alias": self.alias,
+                "active": current["previous"],
+                "previous": current.get("active"),
+                "retired": None,
+                "updated_at": datetime.now().isoformat(),
+                "rolled_back": True
+            }
+            self._write(state)
+            return state
+
+
+_aliases = {}
+_aliases_lock = threading.Lock()
+
+
+def get_collection_alias(path: str = None) -> CollectionAlias:
+    """Shared alias instance per pointer file"""
+    path = path or Config.COLLECTION_ALIAS_PATH
+    with _aliases_lock:
+        if path not in _aliases:
+            _aliases[path] = CollectionAlias(path)
+        return _aliases[path]
@@ -0,0 +1,106 @@
+"""
+Vector Collection Helpers
+Creation metadata (cosine space, HNSW profile, embedding model) and
+embedding-preserving copies between Chroma collections
+"""
+
+import os
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+
+# HNSW build/search parameters; Chroma fixes them when a collection is created
+HNSW_KEYS = ("hnsw:M", "hnsw:construction_ef", "hnsw:search_ef")
+
+
+def default_hnsw_params() -> Dict[str, int]:
+    return {
+        "hnsw:M": Config.HNSW_M,
+        "hnsw:construction_ef": Config.HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": Config.HNSW_SEARCH_EF
+    }
+
+
+def hnsw_params_from(metadata: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """The HNSW profile recorded on a collection (Config defaults for missing keys)"""
+    params = default_hnsw_params()
+    for key in HNSW_KEYS:
+        if metadata and key in metadata:
+            params[key] = int(metadata[key])
+    return params
+
+
+def describe_hnsw(params: Dict[str, int]) -> str:
+    return f"M={params['hnsw:M']},construction_ef={params['hnsw:construction_ef']},search_ef={params['hnsw:search_ef']}"
+
+
+def embedding_model_of(metadata: Optional[Dict[str, Any]]) -> str:
+    """Embedding model a collection was built with (collections predating the field used the default)"""
+    return (metadata or {}).get("embedding_model") or Config.EMBEDDING_MODEL
+
+
+def collection_metadata(description: str, hnsw_params: Dict[str, int] = None,
+                        embedding_model: str = None, **extra) -> Dict[str, Any]:
+    """Metadata a collection is created with"""
+    params = hnsw_params or default_hnsw_params()
+    metadata = {
+        "description": description,
+        "hnsw:space": "cosine",
+        **params,
+        "hnsw_profile": describe_hnsw(params),
+        "embedding_model": embedding_model or Config.EMBEDDING_MODEL,
+        "created_at": datetime.now().isoformat()
+    }
+    metadata.update({key: value for key, value in extra.items() if value is not None})
+    return metadata
+
+
+def open_collection(client, name: str, description: str = "KFG Policy Documents - Enhanced Organization",
+                    hnsw_params: Dict[str, int] = None, **extra):
+    """Get a collection, creating it (cosine space, HNSW profile) if it does not exist
+
+    An existing collection is opened as-is rather than through get_or_create,
+    which would rewrite its metadata.
+    """
+    try:
+        return client.get_collection(name=name)
+    except Exception:
+        return client.create_collection(
+            name=name,
+            metadata=collection_metadata(description, hnsw_params, **extra)
+        )
+
+
+def normalize_rows(embeddings) -> list:
+    """Unit-normalize stored vectors in one vectorized step"""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).tolist()
+
+
+def copy_collection(source, target, batch_size: int = 500, normalize: bool = False,
+                    progress: Callable[[int, int], None] = None) -> int:
+    """Copy ids, stored embeddings, documents and metadata page by page (no re-embedding)"""
+    total = source.count()
+    copied = 0
+    for offset in range(0, total, batch_size):
+        batch = source.get(limit=batch_size, offset=offset, include=['embeddings', 'documents', 'metadatas'])
+        if not batch['ids']:
+            break
+        embeddings = normalize_rows(batch['embeddings']) if normalize else batch['embeddings']
+        target.upsert(
+            ids=batch['ids'],
+            embeddings=embeddings,
+            documents=batch['documents'],
+            metadatas=batch['metadatas']
+        )
+        copied += len(batch['ids'])
+        if progress:
+            progress(copied, total)
+    return copied
@@ -0,0 +1,298 @@
+"""
+FAISS Search Backend
+Approximate nearest-neighbour search with FAISS on CPU (pip install faiss-cpu).
+Chroma remains the durable store: the FAISS index holds only vectors under
+int64 labels, metadata is kept in memory for filtering, and document bodies
+are fetched from Chroma for the rows a query returns.
+
+  hnsw   - IndexHNSWFlat, inner product; deletes are tombstoned until compact()
+  ivfpq  - IndexIVFPQ (product-quantized, ~16x smaller); deletes use remove_ids
+"""
+
+import os
+import sys
+import json
+import threading
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+from rag_engine.vector_store.backends import SearchBackend, FILTER_FIELDS
+import logging
+
+# Optional dependency - VectorStore falls back to Chroma without it
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Product quantization needs enough vectors to train its codebooks
+MIN_TRAINING_VECTORS = 256
+
+
+class FaissBackend(SearchBackend):
+    """FAISS index over the collection's stored embeddings, with string id <-> label mapping"""
+
+    name = "faiss"
+
+    def __init__(self, collection, index_type: str = None, index_path: str = None):
+        if faiss is None:
+            raise ImportError("faiss is not installed (pip install faiss-cpu)")
+        self.collection = collection
+        self.index_type = (index_type or Config.FAISS_INDEX_TYPE).lower()
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self._reset_state()
+        if not (index_path and self._load()):
+            self._build_from_collection()
+
+    def _reset_state(self):
+        self.index = None
+        self._labels: Dict[str, int] = {}
+        self._row_ids: Dict[int, str] = {}
+        self._metadatas: Dict[int, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {field: {} for field in FILTER_FIELDS}
+        self._tombstones: Set[int] = set()
+        self._next_label = 0
+        self._dirty = False
+
+    def _new_index(self, dimensions: int, training: np.ndarray = None):
+        """Empty index of the configured type (IVF-PQ is trained on `training`)"""
+        if self.index_type == "ivfpq":
+            if training is not None and len(training) >= MIN_TRAINING_VECTORS:
+                nlist = Config.FAISS_IVF_LISTS or max(1, min(int(4 * np.sqrt(len(training))), len(training) // 39))
+                pq_m = Config.FAISS_PQ_M if dimensions % Config.FAISS_PQ_M == 0 else 8
+                quantizer = faiss.IndexFlatIP(dimensions)
+                index = faiss.IndexIVFPQ(quantizer, dimensions, nlist, pq_m, Config.FAISS_PQ_BITS,
+                                         faiss.METRIC_INNER_PRODUCT)
+                index.train(training)
+                index.nprobe = min(Config.FAISS_NPROBE, nlist)
+                return faiss.IndexIDMap2(index)
+            logger.warning(f"IVF-PQ needs at least {MIN_TRAINING_VECTORS} vectors to train; using HNSW")
+            self.index_type = "hnsw"
+        index = faiss.IndexHNSWFlat(dimensions, Config.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = Config.FAISS_EF_CONSTRUCTION
+        index.hnsw.efSearch = Config.FAISS_EF_SEARCH
+        return faiss.IndexIDMap2(index)
+
+    def _build_from_collection(self, batch_size: int = 1000):
+        """(Re)build the index from the vectors stored in Chroma"""
+        ids, vectors, metadatas = [], [], []
+        for offset in range(0, self.collection.count(), batch_size):
+            batch = self.collection.get(limit=batch_size, offset=offset, include=['embeddings', 'metadatas'])
+            ids.extend(batch['ids'])
+            vectors.extend(batch['embeddings'])
+            metadatas.extend(batch['metadatas'])
+
+        with self._lock:
+            self._reset_state()
+            if ids:
+                matrix = np.asarray(vectors, dtype=np.float32)
+                self.index = self._new_index(matrix.shape[1], matrix)
+                self._add_locked(ids, matrix, metadatas)
+            self._dirty = True
+        self.flush()
+        logger.info(f"Built FAISS {self.index_type} index over {len(ids)} rows")
+
+    def compact(self):
+        """Rebuild without tombstoned rows (and retrain IVF-PQ on the current data)"""
+        self._build_from_collection()
+
+    def _state_path(self) -> str:
+        return f"{self.index_path}.state.json"
+
+    def _load(self) -> bool:
+        """Load the persisted index when it matches the collection's ids"""
+        if not (os.path.exists(self.index_path) and os.path.exists(self._state_path())):
+            return False
+        try:
+            with open(self._state_path(), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("index_type") != self.index_type:
+                return False
+            index = faiss.read_index(self.index_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable FAISS index {self.index_path}: {e}")
+            return False
+
+        labels = {row_id: int(label) for row_id, label in state["labels"].items()}
+        stored = {}
+        for offset in range(0, self.collection.count(), 1000):
+            batch = self.collection.get(limit=1000, offset=offset, include=['metadatas'])
+            stored.update(zip(batch['ids'], batch['metadatas']))
+        if stored.keys() != labels.keys():
+            logger.info(f"FAISS index {self.index_path} is stale; rebuilding from the collection")
+            return False
+
+        with self._lock:
+            self._reset_state()
+            self.index = index
+            self._next_label = state["next_label"]
+            self._tombstones = set(state.get("tombstones", []))
+            for row_id, label in labels.items():
+                self._register(row_id, label, stored[row_id])
+        logger.info(f"Loaded FAISS {self.index_type} index from {self.index_path} ({len(labels)} rows)")
+        return True
+
+    def flush(self):
+        """Write the index and its id mapping to disk"""
+        if not self.index_path or not self._dirty:
+            return
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+                if self.index is not None:
+                    faiss.write_index(self.index, f"{self.index_path}.tmp")
+                    os.replace(f"{self.index_path}.tmp", self.index_path)
+                elif os.path.exists(self.index_path):
+                    os.remove(self.index_path)
+                state = {
+                    "index_type": self.index_type,
+                    "next_label": self._next_label,
+                    "labels": self._labels,
+                    "tombstones": sorted(self._tombstones)
+                }
+                with open(f"{self._state_path()}.tmp", 'w', encoding='utf-8') as f:
+                    json.dump(state, f)
+                os.replace(f"{self._state_path()}.tmp", self._state_path())
+                self._dirty = False
+            except OSError as e:
+                logger.warning(f"Could not persist FAISS index to {self.index_path}: {e}")
+
+    def _register(self, row_id: str, label: int, metadata: Dict[str, Any]):
+        self._labels[row_id] = label
+        self._row_ids[label] = row_id
+        self._metadatas[label] = metadata or {}
+        for field in FILTER_FIELDS:
+            self._postings[field].setdefault(self._metadatas[label].get(field), set()).add(label)
+
+    def _unregister(self, label: int):
+        row_id = self._row_ids.pop(label)
+        del self._labels[row_id]
+        metadata = self._metadatas.pop(label)
+        for field in FILTER_FIELDS:
+            postings = self._postings[field].get(metadata.get(field))
+            if postings is not None:
+                postings.discard(label)
+
+    def _add_locked(self, ids: List[str], matrix: np.ndarray, metadatas: List[Dict[str, Any]]):
+        labels = np.arange(self._next_label, self._next_label + len(ids), dtype=np.int64)
+        self._next_label += len(ids)
+        self.index.add_with_ids(matrix, labels)
+        for row_id, label, metadata in zip(ids, labels.tolist(), metadatas):
+            self._register(row_id, label, metadata)
+
+    def add(self, ids, embeddings, documents, metadatas):
+        matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        with self._lock:
+            replaced = [row_id for row_id in ids if row_id in self._labels]
+            if replaced:
+                self._delete_locked(replaced)
+            if self.index is None:
+                self.index = self._new_index(matrix.shape[1], matrix)
+            self._add_locked(list(ids), matrix, metadatas)
+            self._dirty = True
+
+    def _delete_locked(self, ids: List[str]):
+        labels = [self._labels[row_id] for row_id in ids if row_id in self._labels]
+        if not labels:
+            return
+        if self.index_type == "ivfpq":
+            self.index.remove_ids(faiss.IDSelectorBatch(np.asarray(labels, dtype=np.int64)))
+        else:
+            # HNSW graphs do not support removal; hide the rows until compact()
+            self._tombstones.update(labels)
+        for label in labels:
+            self._unregister(label)
+        self._dirty = True
+
+    def delete(self, ids):
+        with self._lock:
+            self._delete_locked(list(ids))
+        if len(self._tombstones) > Config.FAISS_MAX_TOMBSTONE_FRACTION * max(len(self._labels), 1):
+            self.compact()
+
+    def reset(self):
+        with self._lock:
+            self._reset_state()
+            self._dirty = True
+        self.flush()
+
+    def _allowlist(self, where: Dict[str, Any]) -> Set[int]:
+        """Labels matching equality filters, from the in-memory metadata postings"""
+        conditions = where["$and"] if "$and" in where else [{field: value} for field, value in where.items()]
+        allowed = None
+        for condition in conditions:
+            for field, value in condition.items():
+                if isinstance(value, dict):
+                    if set(value) != {"$eq"}:
+                        raise ValueError(f"Unsupported filter for FAISS backend: {condition}")
+                    value = value["$eq"]
+                if field in self._postings:
+                    labels = self._postings[field].get(value, set())
+                else:
+                    labels = {label for label, metadata in self._metadatas.items() if metadata.get(field) == value}
+                allowed = set(labels) if allowed is None else allowed & labels
+        return allowed if allowed is not None else set(self._metadatas)
+
+    def query(self, embedding, n_results: int, where: Dict[str, Any] = None,
+              include_embeddings: bool = False, include_documents: bool = True) -> List[Dict[str, Any]]:
+        query_vector = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if self.index is None or not self._labels or n_results <= 0:
+                return []
+            selector = None
+            if where:
+                allowed = self._allowlist(where)
+                if not allowed:
+                    return []
+                selector = faiss.IDSelectorBatch(np.fromiter(allowed, dtype=np.int64))
+            elif self._tombstones:
+                selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.fromiter(self._tombstones, dtype=np.int64)))
+
+            # Search-time knobs are not all persisted by write_index, so pass them per query
+            if self.index_type == "ivfpq":
+                params = faiss.SearchParametersIVF()
+                params.nprobe = Config.FAISS_NPROBE
+            else:
+                params = faiss.SearchParametersHNSW()
+                params.efSearch = max(Config.FAISS_EF_SEARCH, n_results)
+            if selector is not None:
+                params.sel = selector
+            scores, labels = self.index.search(query_vector, min(n_results, len(self._labels)), params=params)
+            hits = [(self._row_ids[label], self._metadatas[label], float(score))
+                    for score, label in zip(scores[0], labels[0]) if label >= 0 and label in self._row_ids]
+
+        rows = [{'id': row_id, 'metadata': metadata, 'distance': 1.0 - score} for row_id, metadata, score in hits]
+        if not rows or not (include_documents or include_embeddings):
+            return rows
+
+        # Bodies (and exact embeddings for MMR) come from the durable store
+        include = (['documents'] if include_documents else []) + (['embeddings'] if include_embeddings else [])
+        stored = self.collection.get(ids=[row['id'] for row in rows], include=include)
+        by_id = {row_id: i for i, row_id in enumerate(stored['ids'])}
+        for row in rows:
+            i = by_id.get(row['id'])
+            if i is None:
+                continue
+            if include_documents:
+                row['document'] = stored['documents'][i]
+            if include_embeddings:
+                row['embedding'] = stored['embeddings'][i]
+        return [row for row in rows if row['id'] in by_id]
+
+    def fetch_documents(self, ids: List[str]) -> Dict[str, str]:
+        if not ids:
+            return {}
+        stored = self.collection.get(ids=list(ids), include=['documents'])
+        return dict(zip(stored['ids'], stored['documents']))
+
+    def ids(self) -> List[str]:
+        return list(self._labels)
+
+    def count(self) -> int:
+        return len(self._labels)
@@ -0,0 +1,36 @@
+"""
+Query Language Detection
+Script-based detection for the corpus languages: a query whose letters are
+mostly in the Bengali block (U+0980-U+09FF) is Bangla, anything else English.
+Each collection records the embedding model it was built with; Bangla
+queries only retrieve well when that model is multilingual, which avoids a
+translation round trip per query.
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+
+BANGLA_CHARACTERS = re.compile(r'[\u0980-\u09FF]')
+LATIN_LETTERS = re.compile(r'[A-Za-z]')
+
+
+def bangla_fraction(text: str) -> float:
+    """Share of Bengali-script characters among Bengali and Latin letters (0.0 for no letters)"""
+    bangla = len(BANGLA_CHARACTERS.findall(text or ""))
+    latin = len(LATIN_LETTERS.findall(text or ""))
+    return bangla / (bangla + latin) if bangla + latin else 0.0
+
+
+def detect_language(text: str) -> str:
+    """"Bangla" or "English" (the labels used by the labelled query sets)"""
+    return "Bangla" if bangla_fraction(text) >= Config.BANGLA_SCRIPT_THRESHOLD else "English"
+
+
+def is_multilingual_model(model_name: str) -> bool:
+    """Whether an embedding model maps Bangla and English into the same space"""
+    name = (model_name or "").lower()
+    return name == Config.MULTILINGUAL_EMBEDDING_MODEL.lower() or "multilingual" in name
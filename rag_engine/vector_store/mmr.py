@@ -0,0 +1,47 @@
+"""
+Maximal Marginal Relevance (MMR) re-selection for retrieval results
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def maximal_marginal_relevance(query_embedding, candidate_embeddings, k: int,
+                               lambda_mult: float = 0.7) -> List[int]:
+    """
+    Select k candidate indices balancing relevance to the query against redundancy
+    with already-selected candidates.
+
+    score(i) = lambda * sim(q, d_i) - (1 - lambda) * max_{j in selected} sim(d_i, d_j)
+
+    Embeddings are L2-normalized here, so dot products are cosine similarities.
+    The candidate similarity matrix is computed once and the per-candidate
+    redundancy term is updated incrementally, one vectorized step per pick.
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or candidates.shape[0] == 0 or k <= 0:
+        return []
+
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    candidates = candidates / (np.linalg.norm(candidates, axis=1, keepdims=True) + 1e-8)
+    query = query / (np.linalg.norm(query) + 1e-8)
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    k = min(k, candidates.shape[0])
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(candidates.shape[0], dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarity[best], out=redundancy)
+
+    return selected
@@ -0,0 +1,245 @@
+"""
+Text Store
+Append-only store for chunk bodies: one UTF-8 data file read through mmap
+plus an append-only JSON-lines offset index keyed by chunk id. Chroma keeps
+only vectors and metadata. Records are keyed "<collection>/<chunk id>" (see
+body_key) so every collection version keeps its own bodies.
+"""
+
+import os
+import sys
+import json
+import mmap
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from config.config import Config
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def body_key(collection_name: str, chunk_id: str) -> str:
+    """Text store key of a chunk in one collection version"""
+    return f"{collection_name}/{chunk_id}"
+
+
+class TextStore:
+    """id -> text, stored once; rewritten ids append a new record and leave the old bytes as garbage"""
+
+    DATA_FILE = "texts.dat"
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, path: str = None):
+        self.path = path or Config.TEXT_STORE_PATH
+        os.makedirs(self.path, exist_ok=True)
+        self.data_path = os.path.join(self.path, self.DATA_FILE)
+        self.index_path = os.path.join(self.path, self.INDEX_FILE)
+        self._lock = threading.RLock()
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._index_position = 0
+        # Offsets are only valid for the (index, data) file pair they were read against
+        self._index_inode = None
+        self._data_inode = None
+        self._load_index()
+
+    def _load_index(self):
+        """Replay the offset index from where it was last read; the last record per id wins
+
+        A different index or data file (another process compacted) replays the
+        whole index. A compacted index starts with the inode of the data file
+        it was written for; while only one of the two files has been swapped,
+        the current offsets and map are kept.
+        """
+        try:
+            stat = os.stat(self.index_path)
+        except OSError:
+            return
+        try:
+            data_stat = os.stat(self.data_path)
+            data_size, data_inode = data_stat.st_size, data_stat.st_ino
+        except OSError:
+            data_size, data_inode = 0, None
+        replay = stat.st_ino != self._index_inode or data_inode != self._data_inode
+        offsets, position = self._offsets, self._index_position
+        if replay:
+            offsets, position = {}, 0
+        elif stat.st_size <= position:
+            return
+        with open(self.index_path, 'rb') as f:
+            f.seek(position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final line from an interrupted append
+                position += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "data_inode" in record:
+                    if record["data_inode"] != data_inode:
+                        return  # compaction half swapped in; retry on the next read
+                elif record.get("deleted"):
+                    offsets.pop(record["id"], None)
+                elif record["offset"] + record["length"] <= data_size:
+                    offsets[record["id"]] = (record["offset"], record["length"])
+        if replay:
+            self._map, self._mapped_size = None, 0
+            self._index_inode, self._data_inode = stat.st_ino, data_inode
+        self._offsets, self._index_position = offsets, position
+
+    def refresh(self):
+        """Pick up records appended (or a compaction done) by another process"""
+        with self._lock:
+            self._load_index()
+
+    def _view(self) -> Optional[mmap.mmap]:
+        """Read-only map of the data file the current offsets belong to
+
+        A grown file gets a fresh map; older maps are left to the garbage
+        collector because memoryviews handed out may still point into them.
+        A replaced data file reloads the index first, and is only mapped once
+        the offsets match it.
+        """
+        try:
+            f = open(self.data_path, 'rb')
+        except OSError:
+            return self._map
+        with f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._data_inode:
+                with self._lock:
+                    self._load_index()
+            if stat.st_ino != self._data_inode or stat.st_size == 0:
+                return self._map
+            if self._map is None or stat.st_size > self._mapped_size:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapped_size = stat.st_size
+        return self._map
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def put(self, chunk_id: str, text: str):
+        self.put_many([(chunk_id, text)])
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        """Append bodies; an id whose stored bytes are unchanged is not written again"""
+        with self._lock:
+            records = []
+            with open(self.data_path, 'ab') as data:
+                offset = data.tell()
+                for chunk_id, text in items:
+                    encoded = (text or "").encode('utf-8')
+                    current = self._offsets.get(chunk_id)
+                    if current and current[1] == len(encoded):
+                        view = self._view()
+                        if view is not None and view[current[0]:current[0] + current[1]] == encoded:
+                            continue
+                    data.write(encoded)
+                    records.append({"id": chunk_id, "offset": offset, "length": len(encoded)})
+                    offset += len(encoded)
+                data.flush()
+                os.fsync(data.fileno())
+            if not records:
+                return
+            # Index records are appended after the bytes they point at are durable
+            self._append_index(records)
+
+    def delete(self, chunk_ids: Iterable[str]):
+        with self._lock:
+            removed = [chunk_id for chunk_id in chunk_ids if chunk_id in self._offsets]
+            if not removed:
+                return
+            self._append_index([{"id": chunk_id, "deleted": True} for chunk_id in removed])
+
+    def keys(self, prefix: str = "") -> List[str]:
+        self.refresh()
+        return [chunk_id for chunk_id in self._offsets if chunk_id.startswith(prefix)]
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Tombstone every record under a prefix (e.g. a dropped collection's "<name>/")"""
+        removed = self.keys(prefix)
+        self.delete(removed)
+        return len(removed)
+
+    def copy_prefix(self, source: str, target: str) -> int:
+        """Store every body under `source` again under `target` (a collection copied to a new version)"""
+        keys = self.keys(source)
+        bodies = self.get_many(keys)
+        self.put_many((target + key[len(source):], body) for key, body in bodies.items())
+        return len(bodies)
+
+    def _append_index(self, records):
+        """Append records, then replay them (plus anything other writers appended) into memory"""
+        self._load_index()
+        with open(self.index_path, 'a', encoding='utf-8') as index:
+            index.write("".join(json.dumps(record) + "\n" for record in records))
+        self._load_index()
+
+    def get(self, chunk_id: str, decode: bool = True):
+        """Body as str, or as a zero-copy memoryview with decode=False (None when unknown)"""
+        # Map first: it may reload the offsets for a data file compacted by another process
+        view = self._view()
+        location = self._offsets.get(chunk_id)
+        if view is None or location is None:
+            return None
+        offset, length = location
+        body = memoryview(view)[offset:offset + length]
+        return str(body, 'utf-8') if decode else body
+
+    def get_many(self, chunk_ids: Iterable[str], decode: bool = True) -> Dict[str, object]:
+        chunk_ids = list(chunk_ids)
+        if any(chunk_id not in self._offsets for chunk_id in chunk_ids):
+            self.refresh()
+        found = {}
+        for chunk_id in chunk_ids:
+            body = self.get(chunk_id, decode)
+            if body is not None:
+                found[chunk_id] = body
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        data_bytes = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        live_bytes = sum(length for _, length in self._offsets.values())
+        return {"entries": len(self._offsets), "data_bytes": data_bytes, "garbage_bytes": data_bytes - live_bytes}
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite live bodies into fresh files and swap them in with os.replace"""
+        with self._lock:
+            view = self._view()
+            temp_data, temp_index = f"{self.data_path}.tmp", f"{self.index_path}.tmp"
+            with open(temp_data, 'wb') as data, open(temp_index, 'w', encoding='utf-8') as index:
+                # os.replace keeps the inode, so readers can tell which data file this index belongs to
+                index.write(json.dumps({"data_inode": os.fstat(data.fileno()).st_ino}) + "\n")
+                position = 0
+                for chunk_id, (offset, length) in self._offsets.items():
+                    data.write(view[offset:offset + length])
+                    index.write(json.dumps({"id": chunk_id, "offset": position, "length": length}) + "\n")
+                    position += length
+                data.flush()
+                os.fsync(data.fileno())
+            os.replace(temp_data, self.data_path)
+            os.replace(temp_index, self.index_path)
+            self._load_index()
+        logger.info(f"Compacted text store {self.path}")
+        return self.stats()
+
+
+_text_stores = {}
+_text_stores_lock = threading.Lock()
+
+
+def get_text_store(path: str = None) -> TextStore:
+    """Shared text store instance per directory"""
+    path = path or Config.TEXT_STORE_PATH
+    with _text_stores_lock:
+        if path not in _text_stores:
+            _text_stores[path] = TextStore(path)
+        return _text_stores[path]
@@ -6,16 +6,60 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from config.config import Config
+from rag_engine.catalog.document_catalog import get_document_catalog
+from rag_engine.document_processing.corpus_scanner import get_corpus_scanner, CorpusSnapshot
+from rag_engine.document_processing.near_duplicates import collapse_duplicates
+from rag_engine.vector_store.mmr import maximal_marginal_relevance
+from rag_engine.vector_store.collections import open_collection, copy_collection, hnsw_params_from, describe_hnsw, embedding_model_of
+from rag_engine.vector_store.backends import select_backend, release_index, record_change, is_stale, storage_report
+from rag_engine.vector_store.collection_alias import get_collection_alias
+from rag_engine.vector_store.text_store import get_text_store, body_key
+from rag_engine.vector_store.language import detect_language, is_multilingual_model
+from utils.latency_tracer import latency_tracer
+from utils.metrics import registry
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime
 import json
 import hashlib
 from pathlib import Path
+from collections import namedtuple
 import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared metrics
+SEARCH_REQUESTS = registry.counter("kfg_vector_searches_total", "Vector store searches", ("kind",))
+SEARCH_ERRORS = registry.counter("kfg_vector_search_errors_total", "Vector store searches that failed", ("kind",))
+EMBED_SECONDS = registry.histogram("kfg_embed_seconds", "Query embedding latency")
+INDEX_QUERY_SECONDS = registry.histogram("kfg_index_query_seconds", "Vector index query latency", ("backend", "kind"))
+SEARCH_RESULTS = registry.histogram(
+    "kfg_search_results", "Results returned per search", buckets=(0, 1, 2, 3, 5, 10, 20)
+)
+INDEXED_CHUNKS = registry.gauge("kfg_indexed_chunks", "Chunks in the vector collection")
+QUERY_LANGUAGES = registry.counter("kfg_search_query_language_total", "Searches by detected query language", ("language",))
+
+# What a query reads: the collection version, its search backend and the encoder of the model
+# it was embedded with. Published as one tuple, so a swap between embedding and searching
+# cannot pair a query vector with another model's index
+Serving = namedtuple('Serving', ['collection', 'backend', 'model', 'model_name'])
+
+# Embedding models shared by every VectorStore in the process, keyed by model name
+_embedding_models = {}
+_embedding_models_lock = threading.Lock()
+
+
+def get_embedding_model(name: str = None) -> SentenceTransformer:
+    """Load an embedding model once per process"""
+    name = name or Config.EMBEDDING_MODEL
+    with _embedding_models_lock:
+        if name not in _embedding_models:
+            _embedding_models[name] = SentenceTransformer(name)
+        return _embedding_models[name]
+
 class VectorStore:
     def __init__(self):
         self.client = chromadb.PersistentClient(
@@ -23,16 +67,187 @@ class VectorStore:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        # Load embedding model
-        self.embedding_model = SentenceTransformer(Config.EMBEDDING_MODEL)
+        # Shared document metadata catalog
+        self.catalog = get_document_catalog()
         
-        # Create or get collection
-        self.collection = self.client.get_or_create_collection(
-            name="kfg_policies_v2",
-            metadata={"description": "KFG Policy Documents - Enhanced Organization"}
-        )
+        # Chunk bodies live in the mmap text store; Chroma keeps vectors and metadata
+        self.text_store = get_text_store() if Config.USE_TEXT_STORE else None
+        
+        # Active version of the collection (cosine space; embeddings are stored normalized),
+        # its search index (flat NumPy index for small corpora) and the model it was built with
+        self.alias = get_collection_alias()
+        self.encoder_wrapper: Optional[Callable] = None
+        self._serving_lock = threading.Lock()
+        collection = self._open_collection(self.alias.active())
+        self._migrate_legacy_collection(collection)
+        model_name = embedding_model_of(collection.metadata)
+        self._serving = Serving(collection, select_backend(collection), get_embedding_model(model_name), model_name)
+        logger.info(f"Using embedding model {model_name}")
+        self._warned_bangla = False
+        
+        self._alias_checked = time.monotonic()
+        self._refresh_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        
+        logger.info(f"Vector store initialized successfully ({self.backend.name} search backend)")
+    
+    def _open_collection(self, name: str, description: str = "KFG Policy Documents - Enhanced Organization"):
+        """Get a collection, creating it in cosine space with the configured HNSW profile"""
+        return open_collection(self.client, name, description)
+    
+    def _migrate_legacy_collection(self, collection):
+        """Copy the legacy L2 collection into an empty serving collection (stored embeddings, no re-embedding)
+        
+        Runs on upgrade so existing deployments keep answering; upserts are
+        idempotent, so processes starting together may all run it safely.
+        """
+        if collection.count() > 0:
+            return
+        try:
+            legacy = self.client.get_collection(name=Config.LEGACY_COLLECTION_NAME)
+            legacy_count = legacy.count()
+        except Exception:
+            return
+        if not legacy_count:
+            return
+        if not Config.AUTO_MIGRATE_LEGACY_COLLECTION:
+            logger.warning(
+                f"Collection '{collection.name}' is empty but '{Config.LEGACY_COLLECTION_NAME}' has "
+                f"{legacy_count} chunks; run utils/migrate_to_cosine.py to copy them without re-embedding"
+            )
+            return
+        if embedding_model_of(legacy.metadata) != embedding_model_of(collection.metadata):
+            logger.warning(
+                f"'{Config.LEGACY_COLLECTION_NAME}' was embedded with {embedding_model_of(legacy.metadata)}, "
+                f"'{collection.name}' expects {embedding_model_of(collection.metadata)}; rebuild with "
+                f"utils/index_versions.py --rebuild instead of copying"
+            )
+            return
         
-        logger.info("Vector store initialized successfully")
+        logger.info(f"Copying {legacy_count} chunks from '{Config.LEGACY_COLLECTION_NAME}' into empty "
+                    f"'{collection.name}' (no re-embedding)")
+        try:
+            copied = copy_collection(legacy, collection, normalize=True)
+        except Exception as e:
+            logger.error(f"Migration from '{Config.LEGACY_COLLECTION_NAME}' failed: {e}; "
+                         f"run utils/migrate_to_cosine.py")
+            return
+        record_change(collection.name)
+        logger.info(f"Migrated {copied} chunks into '{collection.name}'")
+    
+    @property
+    def collection(self):
+        return self._serving.collection
+    
+    @property
+    def backend(self):
+        return self._serving.backend
+    
+    @property
+    def embedding_model(self):
+        return self._serving.model
+    
+    @property
+    def embedding_model_name(self) -> str:
+        return self._serving.model_name
+    
+    def _publish(self, collection=None, backend=None, model_name: str = None):
+        """Replace parts of the serving state in one step (unnamed parts are kept)"""
+        with self._serving_lock:
+            current = self._serving
+            model_name = model_name or current.model_name
+            model = current.model if model_name == current.model_name else self._encoder(model_name)
+            self._serving = Serving(current.collection if collection is None else collection,
+                                    current.backend if backend is None else backend,
+                                    model, model_name)
+        if model is not current.model:
+            logger.info(f"Using embedding model {model_name}")
+            self._close_encoder(current)
+    
+    def _encoder(self, name: str):
+        """Query encoder for a model (wrapped by encoder_wrapper, e.g. the API's batching encoder)"""
+        model = get_embedding_model(name)
+        return self.encoder_wrapper(model) if self.encoder_wrapper else model
+    
+    @staticmethod
+    def _close_encoder(serving: Serving):
+        """Stop a wrapper's worker once nothing new is routed to it (in-flight calls still complete)"""
+        model = serving.model
+        if model is not get_embedding_model(serving.model_name) and hasattr(model, "close"):
+            model.close()
+    
+    def _refresh_collection(self):
+        """Follow an alias swap or writes made by another process (checked every ALIAS_CHECK_INTERVAL)"""
+        now = time.monotonic()
+        if now - self._alias_checked < Config.ALIAS_CHECK_INTERVAL:
+            return
+        # One thread refreshes; the others keep serving the current state meanwhile
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._alias_checked = now
+            self._follow_alias()
+        finally:
+            self._refresh_lock.release()
+    
+    def _follow_alias(self):
+        """Switch to the version the alias points at, or reload a stale backend (caller holds _refresh_lock)"""
+        serving = self._serving
+        active = self.alias.active()
+        if active != serving.collection.name:
+            logger.info(f"Collection alias now points at '{active}'; switching")
+            self._switch_to(self._open_collection(active))
+            return
+        # A collection cleared by drop-and-recreate keeps its name but gets a new id
+        try:
+            current = self.client.get_collection(name=active)
+        except Exception:
+            return  # being recreated right now; look again next interval
+        if current.id != serving.collection.id:
+            logger.info(f"Collection '{active}' was recreated by another process; reopening")
+            self._switch_to(current)
+        elif is_stale(serving.collection, serving.backend):
+            self._reload_backend()
+    
+    def _switch_to(self, collection):
+        """Serve from another collection handle (new version, or the same name recreated)"""
+        backend = select_backend(collection)
+        if is_stale(collection, backend):
+            backend = self._fresh_backend(collection, backend)
+        self._publish(collection, backend, embedding_model_of(collection.metadata))
+    
+    def _reload_backend(self):
+        """Reload an in-memory index that misses chunks written by another process"""
+        serving = self._serving
+        collection = serving.collection
+        backend = self._fresh_backend(collection, serving.backend)
+        logger.info(f"Reloaded {backend.name} index of '{collection.name}' after writes by another process")
+        self._publish(collection, backend)
+    
+    @staticmethod
+    def _fresh_backend(collection, stale):
+        backend = select_backend(collection)
+        if backend is stale:
+            # The shared cached copy is the stale one (another VectorStore may have reloaded already)
+            release_index(collection.name)
+            backend = select_backend(collection)
+        return backend
+    
+    def wrap_encoder(self, wrapper: Callable):
+        """Wrap the query encoder, now and whenever a version with another model is swapped in"""
+        with self._serving_lock:
+            current = self._serving
+            self.encoder_wrapper = wrapper
+            self._serving = current._replace(model=self._encoder(current.model_name))
+        self._close_encoder(current)
+    
+    def _model_for(self, collection, serving: Serving = None):
+        """Encoder for writes into `collection` (a rebuild target may use another model)"""
+        serving = serving or self._serving
+        if collection is None:
+            return serving.model
+        name = embedding_model_of(collection.metadata)
+        return serving.model if name == serving.model_name else get_embedding_model(name)
     
     def _flatten_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Flatten metadata to ensure all values are simple types for ChromaDB"""
@@ -52,8 +267,11 @@ class VectorStore:
                 flattened[key] = str(value)
         return flattened
 
-    def add_document(self, document_id: str, text: str, metadata: Dict[str, Any] = None):
-        """Add a document to the vector store - each file as one chunk for better context"""
+    def add_document(self, document_id: str, text: str, metadata: Dict[str, Any] = None, collection=None):
+        """Add a document to the vector store - each file as one chunk for better context
+        
+        collection: write into this collection instead of the serving one (index rebuilds).
+        """
         try:
             if metadata is None:
                 metadata = {}
@@ -69,29 +287,33 @@ class VectorStore:
             # No chunking - keep the entire document intact
             chunks = [text]  # Single chunk containing the entire file
             
-            # Generate embeddings for the single chunk
-            embeddings = self.embedding_model.encode(chunks)
-            
-            # Normalize embeddings
-            normalized_embeddings = []
-            for embedding in embeddings:
-                norm = np.linalg.norm(embedding)
-                if norm > 0:
-                    normalized_embedding = embedding / norm
-                else:
-                    normalized_embedding = embedding
-                normalized_embeddings.append(normalized_embedding.tolist())
+            # Generate unit-length embeddings for the single chunk
+            serving = self._serving
+            normalized_embeddings = self._encode(chunks, self._model_for(collection, serving)).tolist()
             
             # Create unique IDs for the single chunk
             ids = [f"{document_id}_chunk_0"]
             
-            # Add to collection
-            self.collection.add(
-                embeddings=normalized_embeddings,
-                documents=chunks,
-                metadatas=[flattened_metadata] * len(chunks),
-                ids=ids
-            )
+            # Add vectors to the collection, store the body once, then mirror into the search backend
+            metadatas = [flattened_metadata] * len(chunks)
+            target = serving.collection if collection is None else collection
+            if self.text_store is not None:
+                target.add(embeddings=normalized_embeddings, metadatas=metadatas, ids=ids)
+                # Only after the add succeeded, so a failed add leaves no orphaned bodies;
+                # until then queries drop the row (its body is missing)
+                self.text_store.put_many((body_key(target.name, chunk_id), chunk) for chunk_id, chunk in zip(ids, chunks))
+                bodies = [None] * len(chunks)
+            else:
+                target.add(
+                    embeddings=normalized_embeddings,
+                    documents=chunks,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                bodies = chunks
+            if target is serving.collection:
+                serving.backend.add(ids, normalized_embeddings, bodies, metadatas)
+                record_change(target.name, serving.backend)
             
             logger.info(f"Added document {document_id} as single chunk (file-based chunking)")
             return 1  # Return 1 since we're treating each file as one chunk
@@ -100,54 +322,64 @@ class VectorStore:
             logger.error(f"Error adding document {document_id}: {e}")
             return 0
     
-    def add_documents_from_organized_folder(self, organized_path: str = None):
+    def add_documents_from_organized_folder(self, organized_path: str = None, snapshot: CorpusSnapshot = None,
+                                            collection=None):
         """Add all organized documents to the vector store - each file as one chunk"""
         if organized_path is None:
-            organized_path = "./kfg_policy/organized"
+            organized_path = Config.ORGANIZED_PATH
         
         added_documents = []
         
-        if not os.path.exists(organized_path):
+        # Reuse the shared corpus snapshot instead of listing the directory again
+        if snapshot is None:
+            snapshot = get_corpus_scanner(organized_path).snapshot()
+        
+        if not snapshot.exists():
             logger.error(f"Organized folder not found: {organized_path}")
             return added_documents
         
+        # Load all metadata in one catalog query instead of one JSON file per document
+        self.catalog.ensure_populated()
+        catalog_metadata = self.catalog.get_all_metadata()
+        
         # Process organized documents
-        for filename in os.listdir(organized_path):
-            if filename.endswith('_organized.txt'):
-                file_path = os.path.join(organized_path, filename)
+        for entry in snapshot.organized_files():
+            filename = entry.name
+            file_path = entry.path
+            
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
                 
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        text = f.read()
+                if text.strip():
+                    # Add document ID
+                    document_id = filename.replace('_organized.txt', '')
                     
-                    if text.strip():
-                        # Get corresponding metadata
-                        metadata_file = filename.replace('_organized.txt', '_metadata.json')
-                        metadata_path = os.path.join("./kfg_policy/metadata", metadata_file)
-                        
-                        metadata = {}
-                        if os.path.exists(metadata_path):
-                            with open(metadata_path, 'r', encoding='utf-8') as f:
-                                metadata = json.load(f)
-                        
-                        # Add document ID
-                        document_id = filename.replace('_organized.txt', '')
-                        
-                        # Add to vector store (each file as one chunk)
-                        chunks_added = self.add_document(document_id, text, metadata)
-                        
-                        if chunks_added > 0:
-                            added_documents.append({
-                                'document_id': document_id,
-                                'filename': filename,
-                                'chunks_added': chunks_added,  # Will always be 1 now
-                                'metadata': metadata,
-                                'approach': 'file-based_chunking'
-                            })
-                
-                except Exception as e:
-                    logger.error(f"Error processing {filename}: {e}")
-        
+                    # Get corresponding metadata from the catalog
+                    metadata = catalog_metadata.get(document_id, {})
+                    
+                    # Older versions of reissued documents are not indexed by default
+                    if metadata.get('is_primary_version') is False and not Config.INDEX_DUPLICATE_VERSIONS:
+                        logger.debug(f"Skipping {document_id}: older version of {metadata.get('duplicate_of')}")
+                        continue
+                    
+                    # Add to vector store (each file as one chunk)
+                    chunks_added = self.add_document(document_id, text, metadata, collection)
+                    
+                    if chunks_added > 0:
+                        added_documents.append({
+                            'document_id': document_id,
+                            'filename': filename,
+                            'chunks_added': chunks_added,  # Will always be 1 now
+                            'metadata': metadata,
+                            'approach': 'file-based_chunking'
+                        })
+            
+            except Exception as e:
+                logger.error(f"Error processing {filename}: {e}")
+    
+        if collection is None:
+            self.backend.flush()
         logger.info(f"Added {len(added_documents)} documents to vector store (file-based chunking)")
         return added_documents
     
@@ -155,147 +387,224 @@ class VectorStore:
         """Legacy method - now redirects to organized folder"""
         return self.add_documents_from_organized_folder(folder_path)
     
-    def search(self, query: str, n_results: int = None) -> List[Dict[str, Any]]:
-        """Enhanced search optimized for file-based chunks with better relevance"""
+    def _finalize_results(self, results: List[Dict[str, Any]], n_results: int,
+                          collapse: bool = None, query_embedding=None,
+                          mmr_lambda: float = None, serving: Serving = None) -> List[Dict[str, Any]]:
+        """Sort by similarity, collapse near-duplicate versions and cut to n_results
+        
+        When a query embedding is given, the final cut is an MMR re-selection over
+        the candidates' embeddings (stored under 'embedding' and removed here).
+        """
+        if collapse is None:
+            collapse = Config.COLLAPSE_DUPLICATES_IN_SEARCH
+        results.sort(key=lambda x: x['similarity'], reverse=True)
+        if collapse:
+            results = collapse_duplicates(results)
+        
+        if query_embedding is not None and len(results) > 1:
+            lambda_mult = Config.MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+            selected = maximal_marginal_relevance(
+                query_embedding,
+                [result['embedding'] for result in results],
+                n_results,
+                lambda_mult
+            )
+            results = [results[i] for i in selected]
+        else:
+            results = results[:n_results]
+        
+        for result in results:
+            result.pop('embedding', None)
+        results = self._attach_documents(results, serving)
+        SEARCH_RESULTS.observe(len(results))
+        return results
+    
+    def _read_bodies(self, collection, ids: List[str]) -> Dict[str, str]:
+        """Text store bodies of a collection's chunks (un-namespaced records predate versioned keys)"""
+        if self.text_store is None or not ids:
+            return {}
+        stored = self.text_store.get_many([body_key(collection.name, chunk_id) for chunk_id in ids])
+        bodies = {chunk_id: stored[body_key(collection.name, chunk_id)]
+                  for chunk_id in ids if body_key(collection.name, chunk_id) in stored}
+        legacy = [chunk_id for chunk_id in ids if chunk_id not in bodies]
+        if legacy:
+            bodies.update(self.text_store.get_many(legacy))
+        return bodies
+    
+    def _attach_documents(self, results: List[Dict[str, Any]], serving: Serving = None) -> List[Dict[str, Any]]:
+        """Second query phase: fetch bodies for the final results only
+        
+        Candidates are ranked, thresholded and cut on ids, distances and
+        metadata; rows deleted in between are dropped. Bodies come from the
+        text store, falling back to the backend for chunks indexed before the
+        text store existed.
+        """
+        missing = [result['id'] for result in results if result.get('document') is None]
+        if not missing:
+            return results
+        serving = serving or self._serving
+        with latency_tracer.span("fetch_documents", count=len(missing)):
+            documents = self._read_bodies(serving.collection, missing)
+            legacy = [chunk_id for chunk_id in missing if chunk_id not in documents]
+            if legacy:
+                documents.update(
+                    (chunk_id, body) for chunk_id, body in serving.backend.fetch_documents(legacy).items()
+                    if body is not None
+                )
+        attached = []
+        for result in results:
+            if result.get('document') is None:
+                if result['id'] not in documents:
+                    continue
+                result['document'] = documents[result['id']]
+            attached.append(result)
+        return attached
+    
+    def _encode(self, texts: List[str], model=None) -> np.ndarray:
+        """Embed texts as unit vectors (the single normalization point for documents and queries)"""
+        model = model or self.embedding_model
+        return model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+    
+    def _check_language(self, query: str, model_name: str) -> str:
+        """Detect the query language; warn once when Bangla meets an English-only model"""
+        language = detect_language(query)
+        QUERY_LANGUAGES.labels(language).inc()
+        if language == "Bangla" and not self._warned_bangla and not is_multilingual_model(model_name):
+            self._warned_bangla = True
+            logger.warning(
+                f"Bangla query against English-only embedding model {model_name}; rebuild with "
+                f"utils/index_versions.py --rebuild --multilingual for cross-lingual retrieval"
+            )
+        return language
+    
+    def _query(self, kind: str, query: str, candidate_count: int, where: Dict[str, Any] = None,
+               include_embeddings: bool = False):
+        """Embed the query, run it on the search backend and keep results above MIN_SIMILARITY_SCORE
+        
+        Returns (results, query_embedding, serving). Every backend works in
+        cosine space, so similarity = 1 - distance on every search path. The
+        serving state is read once, so the query is embedded with the model of
+        the index it runs on even if a swap lands mid-query.
+        """
+        self._refresh_collection()
+        serving = self._serving
+        language = self._check_language(query, serving.model_name)
+        with latency_tracer.span("embed", language=language), EMBED_SECONDS.time():
+            query_embedding = self._encode([query], serving.model)[0].tolist()
+        
+        SEARCH_REQUESTS.labels(kind).inc()
+        backend = serving.backend
+        with latency_tracer.span("index_query", backend=backend.name, n_results=candidate_count), \
+                INDEX_QUERY_SECONDS.labels(backend.name, kind).time():
+            rows = backend.query(query_embedding, candidate_count, where=where,
+                                 include_embeddings=include_embeddings, include_documents=False)
+        
+        # Format and filter results by relevance
+        formatted_results = []
+        for row in rows:
+            distance = row['distance']
+            similarity = 1 - distance
+            
+            # Only include results above minimum similarity threshold
+            if similarity >= Config.MIN_SIMILARITY_SCORE:
+                result = {
+                    'id': row['id'],
+                    'metadata': row['metadata'],
+                    'similarity': similarity,
+                    'distance': distance
+                }
+                if 'document' in row:
+                    result['document'] = row['document']
+                if include_embeddings:
+                    result['embedding'] = row['embedding']
+                formatted_results.append(result)
+        
+        return formatted_results, query_embedding, serving
+    
+    def search(self, query: str, n_results: int = None, collapse_duplicates: bool = None,
+               diversify: bool = False, mmr_lambda: float = None) -> List[Dict[str, Any]]:
+        """Enhanced search optimized for file-based chunks with better relevance
+        
+        diversify=True re-selects the top results with Maximal Marginal Relevance
+        (mmr_lambda: 1.0 = pure relevance, 0.0 = pure diversity).
+        """
         if n_results is None:
             n_results = Config.MAX_DOCUMENTS_PER_QUERY
         
         try:
-            # Get query embedding and normalize it
-            query_embedding = self.embedding_model.encode([query])[0]
-            query_embedding = query_embedding / (np.linalg.norm(query_embedding) + 1e-8)  # Normalize using numpy
-            query_embedding = query_embedding.tolist()
-            
             # Search in collection - get more results for better filtering
-            search_results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=min(n_results * 2, 15),  # Get more results for filtering
-                include=['documents', 'metadatas', 'distances']
+            # (a wider candidate pool with embeddings when re-selecting with MMR)
+            candidate_count = min(n_results * 2, 15)
+            if diversify:
+                candidate_count = max(candidate_count, n_results * Config.MMR_CANDIDATE_MULTIPLIER)
+            
+            formatted_results, query_embedding, serving = self._query(
+                "search", query, candidate_count, include_embeddings=diversify
             )
             
-            # Format and filter results by relevance
-            formatted_results = []
-            for i in range(len(search_results['documents'][0])):
-                doc = search_results['documents'][0][i]
-                metadata = search_results['metadatas'][0][i]
-                distance = search_results['distances'][0][i]
-                
-                # Convert distance to similarity (cosine similarity)
-                # ChromaDB uses L2 distance, convert to cosine similarity
-                similarity = max(0, 1 - (distance ** 2) / 2)
-                
-                # Only include results above minimum similarity threshold
-                if similarity >= Config.MIN_SIMILARITY_SCORE:
-                    formatted_results.append({
-                        'document': doc,
-                        'metadata': metadata,
-                        'similarity': similarity,
-                        'distance': distance
-                    })
-            
-            # Sort by similarity and take top results
-            formatted_results.sort(key=lambda x: x['similarity'], reverse=True)
-            return formatted_results[:n_results]
+            # Sort by similarity, collapse duplicate versions and take top results
+            return self._finalize_results(
+                formatted_results, n_results, collapse_duplicates,
+                query_embedding=query_embedding if diversify else None,
+                mmr_lambda=mmr_lambda, serving=serving
+            )
             
         except Exception as e:
+            SEARCH_ERRORS.labels("search").inc()
             logger.error(f"Error in search: {e}")
             return []
     
-    def search_by_category(self, query: str, category: str, n_results: int = None) -> List[Dict[str, Any]]:
+    def search_by_category(self, query: str, category: str, n_results: int = None,
+                           collapse_duplicates: bool = None) -> List[Dict[str, Any]]:
         """Search documents within a specific category"""
         if n_results is None:
             n_results = Config.MAX_DOCUMENTS_PER_QUERY
         
         try:
-            # Get query embedding
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
-            
-            # Search with category filter
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results * 2,  # Get more results to filter
-                where={"category": category},
-                include=['documents', 'metadatas', 'distances']
-            )
-            
-            # Format and filter results
-            formatted_results = []
-            for i in range(len(results['documents'][0])):
-                doc = results['documents'][0][i]
-                metadata = results['metadatas'][0][i]
-                distance = results['distances'][0][i]
-                
-                similarity = 1 - distance
-                
-                formatted_results.append({
-                    'document': doc,
-                    'metadata': metadata,
-                    'similarity': similarity,
-                    'distance': distance
-                })
+            # Search with category filter (get more results to filter)
+            formatted_results, _, serving = self._query("category", query, n_results * 2, where={"category": category})
             
-            # Sort by similarity and limit results
-            formatted_results.sort(key=lambda x: x['similarity'], reverse=True)
-            return formatted_results[:n_results]
+            # Sort by similarity, collapse duplicate versions and limit results
+            return self._finalize_results(formatted_results, n_results, collapse_duplicates, serving=serving)
             
         except Exception as e:
+            SEARCH_ERRORS.labels("category").inc()
             logger.error(f"Category search error: {e}")
             return []
     
-    def search_by_type(self, query: str, doc_type: str, n_results: int = None) -> List[Dict[str, Any]]:
+    def search_by_type(self, query: str, doc_type: str, n_results: int = None,
+                       collapse_duplicates: bool = None) -> List[Dict[str, Any]]:
         """Search documents of a specific type"""
         if n_results is None:
             n_results = Config.MAX_DOCUMENTS_PER_QUERY
         
         try:
-            # Get query embedding
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
-            
             # Search with document type filter
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results * 2,
-                where={"document_type": doc_type},
-                include=['documents', 'metadatas', 'distances']
-            )
-            
-            # Format and filter results
-            formatted_results = []
-            for i in range(len(results['documents'][0])):
-                doc = results['documents'][0][i]
-                metadata = results['metadatas'][0][i]
-                distance = results['distances'][0][i]
-                
-                similarity = 1 - distance
-                
-                formatted_results.append({
-                    'document': doc,
-                    'metadata': metadata,
-                    'similarity': similarity,
-                    'distance': distance
-                })
+            formatted_results, _, serving = self._query("type", query, n_results * 2, where={"document_type": doc_type})
             
-            # Sort by similarity and limit results
-            formatted_results.sort(key=lambda x: x['similarity'], reverse=True)
-            return formatted_results[:n_results]
+            # Sort by similarity, collapse duplicate versions and limit results
+            return self._finalize_results(formatted_results, n_results, collapse_duplicates, serving=serving)
             
         except Exception as e:
+            SEARCH_ERRORS.labels("type").inc()
             logger.error(f"Type search error: {e}")
             return []
     
     def get_document_by_id(self, document_id: str) -> List[Dict[str, Any]]:
         """Get all chunks of a specific document"""
         try:
-            results = self.collection.get(
+            collection = self.collection
+            results = collection.get(
                 where={"document_id": document_id},
                 include=['documents', 'metadatas']
             )
+            bodies = self._read_bodies(collection, results['ids'])
             
             # Sort chunks by index
             chunks = []
-            for i in range(len(results['documents'])):
+            for i in range(len(results['ids'])):
                 chunks.append({
-                    'document': results['documents'][i],
+                    'document': bodies.get(results['ids'][i]) or results['documents'][i] or "",
                     'metadata': results['metadatas'][i]
                 })
             
@@ -313,9 +622,19 @@ class VectorStore:
                 return {"error": "Collection not initialized"}
             
             count = self.collection.count()
+            INDEXED_CHUNKS.set(count)
             return {
                 "total_documents": count,
                 "collection_name": self.collection.name,
+                "previous_version": self.alias.previous(),
+                "categories": self.catalog.category_counts(),
+                "document_types": self.catalog.type_counts(),
+                "embedding_model": self.embedding_model_name,
+                "multilingual": is_multilingual_model(self.embedding_model_name),
+                "hnsw_profile": describe_hnsw(hnsw_params_from(self.collection.metadata)),
+                "search_backend": self.backend.name,
+                "vector_storage": storage_report(self.backend),
+                "text_store": self.text_store.stats() if self.text_store is not None else None,
                 "status": "active"
             }
         except Exception as e:
@@ -325,11 +644,16 @@ class VectorStore:
     def get_document_categories(self) -> List[str]:
         """Get all available document categories"""
         try:
+            # Indexed catalog query; fall back to scanning the collection
+            categories = self.catalog.get_categories()
+            if categories:
+                return categories
+            
             if not self.collection:
                 return []
             
             # Get all documents and extract unique categories
-            results = self.collection.get()
+            results = self.collection.get(include=['metadatas'])
             categories = set()
             
             for metadata in results['metadatas']:
@@ -344,11 +668,16 @@ class VectorStore:
     def get_document_types(self) -> List[str]:
         """Get all available document types"""
         try:
+            # Indexed catalog query; fall back to scanning the collection
+            types = self.catalog.get_document_types()
+            if types:
+                return types
+            
             if not self.collection:
                 return []
             
             # Get all documents and extract unique types
-            results = self.collection.get()
+            results = self.collection.get(include=['metadatas'])
             types = set()
             
             for metadata in results['metadatas']:
@@ -363,51 +692,206 @@ class VectorStore:
     def delete_document(self, document_id: str):
         """Delete all chunks of a specific document"""
         try:
-            self.collection.delete(where={"document_id": document_id})
+            serving = self._serving
+            ids = serving.collection.get(where={"document_id": document_id}, include=[])['ids']
+            if ids:
+                serving.collection.delete(ids=ids)
+                serving.backend.delete(ids)
+                serving.backend.flush()
+                record_change(serving.collection.name, serving.backend)
+                if self.text_store is not None:
+                    self.text_store.delete([body_key(serving.collection.name, chunk_id) for chunk_id in ids])
             logger.info(f"Deleted document {document_id}")
         except Exception as e:
             logger.error(f"Error deleting document {document_id}: {e}")
     
-    def clear_collection(self):
-        """Clear all documents from the collection"""
+    def clear_collection(self, progress: Callable[[int, int], None] = None, batch_size: int = 1000) -> Dict[str, Any]:
+        """Remove every chunk from the serving collection
+        
+        An aliased collection is cleared by swapping the alias to a fresh empty
+        version, which other processes follow like a rebuild; the cleared
+        version stays available to rollback_index(). Otherwise the collection
+        is dropped and recreated with its creation metadata (cosine space, HNSW
+        profile), so the time taken does not grow with the collection. If
+        that fails, deletes page by page from an id-only scan (include=[]), so
+        no document bodies are loaded either way. progress(cleared, total) is
+        called as chunks are removed.
+        """
+        serving = self._serving
+        name = serving.collection.name
+        total = serving.collection.count()
+        if self.alias.read().get("active"):
+            return self._clear_by_swap(total, progress)
+        
         try:
-            # Get all document IDs and delete them
-            results = self.collection.get()
-            if results['ids']:
-                self.collection.delete(ids=results['ids'])
-            logger.info("Collection cleared successfully")
+            metadata = dict(serving.collection.metadata or {})
+            metadata["cleared_at"] = datetime.now().isoformat()
+            self.client.delete_collection(name=name)
+            collection = self.client.create_collection(name=name, metadata=metadata)
+            method = "recreate"
+            if progress:
+                progress(total, total)
         except Exception as e:
-            logger.error(f"Error clearing collection: {e}")
-            # Try alternative method
+            logger.warning(f"Drop-and-recreate of '{name}' failed ({e}); deleting in pages")
+            collection = self._open_collection(name)
+            method = "paged_delete"
             try:
-                self.collection.delete(where={})
-                logger.info("Collection cleared using alternative method")
+                self._delete_in_pages(collection, total, progress, batch_size)
             except Exception as e2:
-                logger.error(f"Alternative clear method also failed: {e2}")
+                logger.error(f"Error clearing collection: {e2}")
+                self._publish(collection)
+                return {"success": False, "error": str(e2), "cleared": total - collection.count()}
+        
+        # Other holders of the shared in-memory index must stop serving the cleared rows
+        serving.backend.reset()
+        release_index(name)
+        if self.text_store is not None:
+            self.text_store.delete_prefix(f"{name}/")
+        backend = select_backend(collection)
+        self._publish(collection, backend)
+        record_change(name, backend)
+        logger.info(f"Collection '{name}' cleared ({total} chunks, {method})")
+        return {"success": True, "cleared": total, "method": method}
     
-    def rebuild_index(self):
-        """Rebuild the entire index from organized documents"""
+    def _clear_by_swap(self, total: int, progress: Callable[[int, int], None]) -> Dict[str, Any]:
+        """Point the alias at a new empty version with the serving version's profile and model"""
+        with self._rebuild_lock:
+            version = self.alias.new_version_name()
+            try:
+                target = open_collection(
+                    self.client, version, "KFG Policy Documents - Cleared",
+                    hnsw_params=hnsw_params_from(self.collection.metadata),
+                    embedding_model=self.embedding_model_name,
+                    cleared_from=self.collection.name
+                )
+                backend = select_backend(target)
+                state = self.alias.swap(version)
+            except Exception as e:
+                logger.error(f"Error clearing collection: {e}")
+                try:
+                    self._drop_version(version)
+                except Exception:
+                    pass
+                return {"success": False, "error": str(e), "cleared": 0}
+            self._activate(target, backend, state)
+        if progress:
+            progress(total, total)
+        logger.info(f"Collection cleared ({total} chunks); '{version}' is now active, "
+                    f"'{state.get('previous')}' kept for rollback")
+        return {"success": True, "cleared": total, "method": "alias_swap", "active": version}
+    
+    def _delete_in_pages(self, collection, total: int, progress: Callable[[int, int], None], batch_size: int):
+        """Delete ids fetched batch_size at a time (offset stays 0 as rows disappear)"""
+        cleared = 0
+        while True:
+            ids = collection.get(limit=batch_size, include=[])['ids']
+            if not ids:
+                break
+            collection.delete(ids=ids)
+            cleared += len(ids)
+            if progress:
+                progress(cleared, total)
+            logger.info(f"Cleared {cleared}/{total} chunks")
+            if cleared > total + batch_size:
+                raise RuntimeError("collection is still growing while being cleared")
+    
+    def rebuild_index(self, background: bool = False, embedding_model: str = None):
+        """Rebuild the index into a new versioned collection, then swap the alias
+        
+        Searches keep hitting the current version until the new one is complete
+        and its search backend is loaded; the swap is a single atomic file
+        replace. The replaced version is kept for rollback_index() and the one
+        before it is dropped. background=True starts the rebuild in a thread and
+        returns the thread.
+        
+        embedding_model: build the new version with this model (e.g.
+        Config.MULTILINGUAL_EMBEDDING_MODEL) instead of the current one; queries
+        switch to it with the swap.
+        """
+        if background:
+            thread = threading.Thread(target=self.rebuild_index, kwargs={"embedding_model": embedding_model},
+                                      name="index-rebuild", daemon=True)
+            thread.start()
+            return thread
+        
+        if not self._rebuild_lock.acquire(blocking=False):
+            logger.warning("Index rebuild already in progress")
+            return []
+        
+        version = self.alias.new_version_name()
         try:
-            logger.info("Rebuilding vector index...")
-            
-            # Clear existing collection
-            self.clear_collection()
-            
-            # Recreate collection
-            self.collection = self.client.get_or_create_collection(
-                name="kfg_policies_v2",
-                metadata={"description": "KFG Policy Documents - Rebuilt Index"}
+            logger.info(f"Rebuilding vector index into '{version}' ({embedding_model or self.embedding_model_name})...")
+            
+            # New version keeps the serving collection's HNSW profile
+            target = open_collection(
+                self.client, version, "KFG Policy Documents - Rebuilt Index",
+                hnsw_params=hnsw_params_from(self.collection.metadata),
+                embedding_model=embedding_model or self.embedding_model_name,
+                rebuilt_from=self.collection.name
             )
+            added_docs = self.add_documents_from_organized_folder(collection=target)
             
-            # Add all organized documents
-            added_docs = self.add_documents_from_organized_folder()
+            if not added_docs or target.count() < len(added_docs):
+                logger.error(f"Rebuild of '{version}' is incomplete; keeping '{self.collection.name}'")
+                self._drop_version(version)
+                return []
+            
+            # Load the new search backend before any query can reach it
+            backend = select_backend(target)
+            state = self.alias.swap(version)
+            self._activate(target, backend, state)
             
-            logger.info(f"Index rebuilt with {len(added_docs)} documents")
+            logger.info(f"Index rebuilt with {len(added_docs)} documents; '{version}' is now active")
             return added_docs
             
         except Exception as e:
             logger.error(f"Error rebuilding index: {e}")
+            try:
+                self._drop_version(version)
+            except Exception:
+                pass
             return []
+        finally:
+            self._rebuild_lock.release()
+    
+    def _activate(self, collection, backend, state: Dict[str, Any]):
+        """Serve from `collection` and drop the version retired by the swap"""
+        replaced = self.collection.name
+        self._publish(collection, backend, embedding_model_of(collection.metadata))
+        self._alias_checked = time.monotonic()
+        if replaced != collection.name:
+            release_index(replaced)
+        
+        retired = state.get("retired")
+        if retired and retired not in (state.get("active"), state.get("previous")):
+            try:
+                self._drop_version(retired)
+                logger.info(f"Dropped retired collection '{retired}'")
+            except Exception as e:
+                logger.warning(f"Could not drop retired collection '{retired}': {e}")
+    
+    def _drop_version(self, name: str):
+        """Delete a collection version with its cached indexes and text store bodies"""
+        release_index(name)
+        if self.text_store is not None:
+            self.text_store.delete_prefix(f"{name}/")
+        self.client.delete_collection(name=name)
+    
+    def rollback_index(self) -> Dict[str, Any]:
+        """Serve the previous version again (the current one is kept as previous)"""
+        try:
+            previous = self.alias.previous()
+            if not previous:
+                return {"success": False, "error": "No previous index version"}
+            collection = self.client.get_collection(name=previous)
+            backend = select_backend(collection)
+            state = self.alias.rollback()
+            self._activate(collection, backend, state)
+            logger.info(f"Rolled back to '{previous}'")
+            return {"success": True, "active": previous, "previous": state.get("previous")}
+        except Exception as e:
+            logger.error(f"Error rolling back index: {e}")
+            return {"success": False, "error": str(e)}
 
 if __name__ == "__main__":
     # Initialize vector store and add documents
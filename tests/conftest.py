@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from config.config import Config
+
+
+@pytest.fixture
+def usage_db(tmp_path, monkeypatch):
+    """Point the shared cost monitor at a throwaway usage database"""
+    path = str(tmp_path / "usage.db")
+    monkeypatch.setattr(Config, "USAGE_DB_PATH", path)
+    return path
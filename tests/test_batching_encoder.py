@@ -0,0 +1,117 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from rag_engine.vector_store.batching_encoder import BatchingEncoder
+
+
+class RecordingModel:
+    """Deterministic encoder: one row per text, recording every forward pass"""
+    
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self.release = threading.Event()
+        self.release.set()
+        self.dimension = 4
+    
+    def encode(self, sentences, normalize_embeddings=False, **kwargs):
+        self.release.wait(5)
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        self.calls.append((threading.current_thread().name, texts, normalize_embeddings))
+        if self.fail_on is not None and self.fail_on in texts:
+            raise RuntimeError(f"cannot encode {self.fail_on}")
+        vectors = np.array([[len(text), sum(map(ord, text)) % 97, float(normalize_embeddings), 1.0]
+                            for text in texts], dtype=np.float32)
+        return vectors[0] if isinstance(sentences, str) else vectors
+
+
+def expected(text, normalize=False):
+    return np.array([len(text), sum(map(ord, text)) % 97, float(normalize), 1.0], dtype=np.float32)
+
+
+@pytest.fixture
+def model():
+    return RecordingModel()
+
+
+@pytest.fixture
+def encoder(model):
+    encoder = BatchingEncoder(model, max_batch_size=16, max_wait_ms=0)
+    yield encoder
+    encoder.close()
+
+
+def encode_concurrently(encoder, model, texts, **kwargs):
+    # Hold the model so the requests queue up behind the first one
+    model.release.clear()
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(encoder.encode, [text], **kwargs) for text in texts]
+        threading.Timer(0.2, model.release.set).start()
+        return [future.result(timeout=10) for future in futures]
+
+
+def test_concurrent_requests_get_their_own_rows(encoder, model):
+    texts = [f"query number {i}" + "x" * i for i in range(12)]
+    
+    results = encode_concurrently(encoder, model, texts)
+    
+    for text, vectors in zip(texts, results):
+        assert vectors.shape == (1, 4)
+        np.testing.assert_array_equal(vectors[0], expected(text))
+    # Everything queued behind the first request shares one forward pass
+    assert len(model.calls) < len(texts)
+    assert all(name == "embedding-batcher" for name, _, _ in model.calls)
+
+
+def test_single_string_returns_one_vector(encoder):
+    np.testing.assert_array_equal(encoder.encode("annual leave"), expected("annual leave"))
+
+
+def test_requests_with_different_options_are_not_mixed(encoder, model):
+    model.release.clear()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        plain = [pool.submit(encoder.encode, [f"plain {i}"]) for i in range(2)]
+        normalized = [pool.submit(encoder.encode, [f"norm {i}"], normalize_embeddings=True) for i in range(2)]
+        threading.Timer(0.2, model.release.set).start()
+        for i, future in enumerate(plain):
+            np.testing.assert_array_equal(future.result(timeout=10)[0], expected(f"plain {i}"))
+        for i, future in enumerate(normalized):
+            np.testing.assert_array_equal(future.result(timeout=10)[0], expected(f"norm {i}", True))
+    
+    for _, texts, normalize in model.calls:
+        assert all(text.startswith("norm") == normalize for text in texts)
+
+
+def test_model_errors_reach_every_caller_in_the_batch(model):
+    model.fail_on = "bad"
+    # A long wait keeps the batch open until all three requests are in
+    encoder = BatchingEncoder(model, max_batch_size=3, max_wait_ms=500)
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(encoder.encode, [text]) for text in ("good", "bad", "fine")]
+            for future in futures:
+                with pytest.raises(RuntimeError, match="cannot encode bad"):
+                    future.result(timeout=10)
+        assert len(model.calls) == 1
+        
+        # The worker survives the failure
+        np.testing.assert_array_equal(encoder.encode(["after"])[0], expected("after"))
+    finally:
+        encoder.close()
+
+
+def test_large_batches_and_calls_after_close_go_straight_to_the_model(encoder, model):
+    texts = [f"chunk {i}" for i in range(16)]
+    encoder.encode(texts)
+    assert model.calls[-1][0] == threading.current_thread().name
+    
+    encoder.close()
+    np.testing.assert_array_equal(encoder.encode(["late"])[0], expected("late"))
+    assert model.calls[-1][0] == threading.current_thread().name
+
+
+def test_other_attributes_are_forwarded(encoder):
+    assert encoder.dimension == 4
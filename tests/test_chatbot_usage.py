@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("models.llm.deepseek_client")
+
+from ui.terminal.chatbot import KFGChatbot
+from utils.cost_monitor import get_cost_monitor
+
+
+class ReplyClient:
+    """LLM client returning a DeepSeek chat completion with a usage block"""
+    model = "deepseek-chat"
+    
+    def chat_with_rag(self, query, context_documents, chat_history=None):
+        return {
+            "choices": [{"message": {"role": "assistant", "content": "Annual leave is 20 days."}}],
+            "usage": {"prompt_tokens": 900, "completion_tokens": 40, "total_tokens": 940,
+                      "prompt_cache_hit_tokens": 600}
+        }
+
+
+class StreamClient(ReplyClient):
+    """Streaming client sending the usage block on its final chunk"""
+    
+    def chat_with_rag_stream(self, query, context_documents, chat_history=None):
+        yield {"choices": [{"delta": {"content": "Annual leave "}}]}
+        yield {"choices": [{"delta": {"content": "is 20 days."}}]}
+        yield {"choices": [{"delta": {}}],
+               "usage": {"prompt_tokens": 900, "completion_tokens": 40, "total_tokens": 940}}
+
+
+def make_chatbot(client):
+    chatbot = KFGChatbot.__new__(KFGChatbot)
+    chatbot.deepseek_client = client
+    return chatbot
+
+
+@pytest.mark.parametrize("client", [ReplyClient(), StreamClient()])
+def test_reply_usage_is_recorded_without_estimating(usage_db, client):
+    chatbot = make_chatbot(client)
+    docs = [{"document": "Employees get 20 days of annual leave."}]
+    
+    response, usage = chatbot._generate_response("How much annual leave?", docs)
+    recorded = chatbot._record_usage("How much annual leave?", docs, response, usage)
+    get_cost_monitor().flush()
+    
+    assert response == "Annual leave is 20 days."
+    assert recorded["estimated"] is False
+    conn = sqlite3.connect(usage_db)
+    try:
+        rows = conn.execute("SELECT prompt_tokens, completion_tokens, estimated FROM usage_events").fetchall()
+    finally:
+        conn.close()
+    assert rows == [(900, 40, 0)]
@@ -0,0 +1,151 @@
+import json
+import sqlite3
+
+import pytest
+
+from utils import cost_monitor as cost_monitor_module
+from utils.cost_monitor import (CostMonitor, UsageCapture, calculate_cost, extract_token_usage, get_cost_monitor,
+                                report_usage)
+
+DEEPSEEK_REPLY = {
+    "choices": [{"message": {"role": "assistant", "content": "Annual leave is 20 days."}}],
+    "usage": {"prompt_tokens": 1200, "completion_tokens": 80, "total_tokens": 1280,
+              "prompt_cache_hit_tokens": 1000, "prompt_cache_miss_tokens": 200}
+}
+
+
+def read_events(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT tokens, prompt_tokens, completion_tokens, cached_prompt_tokens, estimated FROM usage_events"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    monitor = CostMonitor(str(tmp_path / "usage.db"))
+    yield monitor
+    monitor.close()
+
+
+def test_extract_token_usage_reads_deepseek_cache_hits():
+    assert extract_token_usage(DEEPSEEK_REPLY) == {
+        "prompt_tokens": 1200, "completion_tokens": 80, "cached_prompt_tokens": 1000, "total_tokens": 1280
+    }
+    assert extract_token_usage("plain text reply") is None
+
+
+def test_report_usage_fills_the_active_capture_only():
+    capture = UsageCapture()
+    capture.run(report_usage, DEEPSEEK_REPLY)
+    assert capture.usage["cached_prompt_tokens"] == 1000
+    
+    # Outside a capture the report goes nowhere
+    report_usage(DEEPSEEK_REPLY)
+    assert UsageCapture().usage is None
+
+
+def test_reported_usage_is_written_as_non_estimated_row(monitor):
+    capture = UsageCapture()
+    capture.run(report_usage, DEEPSEEK_REPLY)
+    
+    monitor.record_request(0, model="deepseek-chat", usage=capture.usage, documents_used=3)
+    monitor.flush()
+    
+    assert read_events(monitor.db_path) == [(1280, 1200, 80, 1000, 0)]
+
+
+def test_module_cost_monitor_alias_is_the_shared_monitor(usage_db):
+    assert cost_monitor_module.cost_monitor is get_cost_monitor()
+    get_cost_monitor().close()
+
+
+def test_rollups_add_up_across_flushes(monitor):
+    usage = {"prompt_tokens": 1000, "completion_tokens": 100, "cached_prompt_tokens": 400, "total_tokens": 1100}
+    for _ in range(3):
+        monitor.record_request(0, model="deepseek-chat", usage=usage)
+    monitor.flush()
+    monitor.record_request(500, model="deepseek-chat", estimated=True)
+    
+    summary = monitor.get_usage_summary()
+    
+    cost = 3 * calculate_cost("deepseek-chat", usage) + calculate_cost("deepseek-chat", {"prompt_tokens": 500})
+    for bucket in ("total", "today", "this_month"):
+        assert summary[bucket]["requests"] == 4
+        assert summary[bucket]["tokens"] == 3 * 1100 + 500
+        assert summary[bucket]["cost_usd"] == pytest.approx(cost)
+
+
+def test_rollups_match_the_event_log(monitor):
+    for i in range(25):
+        monitor.record_request(100 + i, model="deepseek-reasoner" if i % 5 == 0 else "deepseek-chat")
+        if i % 7 == 0:
+            monitor.flush()
+    total = monitor.get_usage_summary()["total"]
+    
+    conn = sqlite3.connect(monitor.db_path)
+    try:
+        requests, tokens, cost = conn.execute("SELECT COUNT(*), SUM(tokens), SUM(cost_usd) FROM usage_events").fetchone()
+    finally:
+        conn.close()
+    assert (total["requests"], total["tokens"]) == (requests, tokens)
+    assert total["cost_usd"] == pytest.approx(cost)
+
+
+def test_monitors_sharing_a_database_combine_their_totals(tmp_path):
+    # Two monitors stand in for two worker processes
+    path = str(tmp_path / "usage.db")
+    first, second = CostMonitor(path), CostMonitor(path)
+    try:
+        first.record_request(100)
+        second.record_request(200)
+        second.record_request(300)
+        first.flush()
+        
+        assert second.get_usage_summary()["total"]["requests"] == 3
+        assert first.get_usage_summary()["total"]["tokens"] == 600
+    finally:
+        first.close()
+        second.close()
+
+
+def test_cost_breakdown_reports_cache_hits_and_estimates(monitor):
+    capture = UsageCapture()
+    capture.run(report_usage, DEEPSEEK_REPLY)
+    monitor.record_request(0, model="deepseek-chat", usage=capture.usage, documents_used=4, context_chars=4000)
+    monitor.record_request(300, model="deepseek-chat", estimated=True, documents_used=2)
+    
+    breakdown = monitor.get_cost_breakdown()["deepseek-chat"]
+    
+    assert breakdown["requests"] == 2
+    assert breakdown["cached_prompt_tokens"] == 1000
+    assert breakdown["cache_hit_rate"] == pytest.approx(1000 / 1200)
+    assert breakdown["estimated_requests"] == 1
+    assert breakdown["avg_documents_used"] == pytest.approx(3.0)
+
+
+def test_cached_prompt_tokens_are_priced_lower():
+    uncached = calculate_cost("deepseek-chat", {"prompt_tokens": 1_000_000})
+    cached = calculate_cost("deepseek-chat", {"prompt_tokens": 1_000_000, "cached_prompt_tokens": 1_000_000})
+    assert uncached == pytest.approx(0.27)
+    assert cached == pytest.approx(0.07)
+
+
+def test_legacy_totals_are_migrated_once(monitor, tmp_path):
+    legacy = tmp_path / "api_usage.json"
+    legacy.write_text(json.dumps({
+        "total_requests": 10, "total_tokens": 5000, "total_cost_usd": 0.5,
+        "daily_usage": {"2024-01-02": {"requests": 10, "tokens": 5000, "cost_usd": 0.5}},
+        "monthly_usage": {"2024-01": {"requests": 10, "tokens": 5000, "cost_usd": 0.5}}
+    }))
+    
+    assert monitor.migrate_legacy_usage(str(legacy)) is True
+    assert not legacy.exists() and (tmp_path / "api_usage.json.migrated").exists()
+    
+    legacy.write_text(json.dumps({"total_requests": 99}))
+    assert monitor.migrate_legacy_usage(str(legacy)) is False
+    assert monitor.get_usage_summary()["total"]["requests"] == 10
+    assert monitor.get_daily_usage()["2024-01-02"]["tokens"] == 5000
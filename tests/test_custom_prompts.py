@@ -0,0 +1,44 @@
+import pytest
+
+from config.config import Config
+from config.custom_prompts import CustomPrompts
+from config.prompt_matcher import PromptMatcher
+
+
+@pytest.fixture
+def prompts(tmp_path, monkeypatch):
+    """CustomPrompts backed by a fresh prompt store"""
+    monkeypatch.setattr(Config, "PROMPT_STORE_PATH", str(tmp_path / "prompts.db"))
+    monkeypatch.setattr(CustomPrompts, "CUSTOM_PROMPTS", dict(CustomPrompts.BUILTIN_PROMPTS))
+    monkeypatch.setattr(CustomPrompts, "_store", None)
+    monkeypatch.setattr(CustomPrompts, "_matcher", None)
+    monkeypatch.setattr(CustomPrompts, "_embedding_fn", None)
+    monkeypatch.setattr(CustomPrompts, "_loaded_version", None)
+    monkeypatch.setattr(CustomPrompts, "_last_check", 0.0)
+    return CustomPrompts
+
+
+def test_best_match_carries_the_prompt_payload():
+    matcher = PromptMatcher(CustomPrompts.BUILTIN_PROMPTS)
+    match = matcher.best_match("what is the medical allowance limit")
+    assert match["prompt_key"] == "medical_allowance"
+    assert match["prompt"] is CustomPrompts.MEDICAL_ALLOWANCE
+
+
+def test_custom_response_survives_a_reload_after_matching(prompts, monkeypatch):
+    prompts.refresh(force=True)
+    matcher = prompts.get_matcher()
+    best_match = matcher.best_match
+    
+    def match_then_reload(*args, **kwargs):
+        # A hot reload empties and refills CUSTOM_PROMPTS; stop it half way
+        match = best_match(*args, **kwargs)
+        prompts.CUSTOM_PROMPTS.clear()
+        return match
+    
+    monkeypatch.setattr(matcher, "best_match", match_then_reload)
+    result = prompts.get_custom_response("medical allowance for job group 4")
+    
+    assert result["has_custom_response"]
+    assert result["prompt_type"] == "medical_allowance"
+    assert result["response"] == CustomPrompts.MEDICAL_ALLOWANCE["response"]
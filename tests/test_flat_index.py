@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from config.config import Config
+from rag_engine.vector_store.backends import FlatIndexBackend
+
+
+class ListCollection:
+    """The slice of the Chroma collection API the flat index reads"""
+    
+    def __init__(self, name, ids, embeddings, documents, metadatas):
+        self.name = name
+        self.rows = {row_id: (embedding, document, metadata)
+                     for row_id, embedding, document, metadata in zip(ids, embeddings, documents, metadatas)}
+        self.requested = []
+    
+    def count(self):
+        return len(self.rows)
+    
+    def get(self, ids=None, limit=None, offset=0, include=()):
+        self.requested.append(tuple(include))
+        selected = list(ids) if ids is not None else list(self.rows)[offset:offset + limit]
+        selected = [row_id for row_id in selected if row_id in self.rows]
+        result = {'ids': selected}
+        for field, index in (('embeddings', 0), ('documents', 1), ('metadatas', 2)):
+            if field in include:
+                result[field] = [self.rows[row_id][index] for row_id in selected]
+        return result
+
+
+def unit_vectors(count, dim, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(autouse=True)
+def scratch_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "FLAT_INDEX_PATH", str(tmp_path))
+
+
+def test_index_loaded_from_collection_keeps_no_bodies():
+    vectors = unit_vectors(20, 8)
+    ids = [f"doc_{i}" for i in range(20)]
+    collection = ListCollection("policies", ids, vectors.tolist(), [f"body {i}" for i in range(20)],
+                                [{"category": "hr"} for _ in ids])
+    
+    index = FlatIndexBackend.from_collection(collection, batch_size=7)
+    
+    assert all('documents' not in include for include in collection.requested)
+    rows = index.query(vectors[3], 2)
+    assert rows[0]['id'] == "doc_3" and 'document' not in rows[0]
+    assert index.fetch_documents(["doc_3", "missing"]) == {"doc_3": "body 3"}
+    
+    # Rows added later are not kept in memory either
+    index.add(["doc_new"], unit_vectors(1, 8, seed=1), ["new body"], [{"category": "hr"}])
+    assert 'document' not in index.query(unit_vectors(1, 8, seed=1)[0], 1)[0]
+
+
+def build_index(count=300, dim=32, precision="float32", seed=0):
+    vectors = unit_vectors(count, dim, seed)
+    ids = [f"doc_{i}" for i in range(count)]
+    metadatas = [{"category": "hr" if i % 2 else "finance", "document_id": f"doc_{i}"} for i in range(count)]
+    index = FlatIndexBackend(ids, vectors, [f"body {i}" for i in range(count)], metadatas, precision=precision)
+    return index, vectors
+
+
+def exact_top(vectors, query, k, rows=None):
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    scores = vectors[rows] @ query
+    return [f"doc_{rows[i]}" for i in np.argsort(-scores)[:k]]
+
+
+def test_query_matches_exact_search_with_filters():
+    index, vectors = build_index()
+    query = unit_vectors(1, 32, seed=9)[0]
+    
+    assert [row['id'] for row in index.query(query, 5)] == exact_top(vectors, query, 5)
+    hr_rows = [i for i in range(300) if i % 2]
+    rows = index.query(query, 5, where={"category": {"$eq": "hr"}})
+    assert [row['id'] for row in rows] == exact_top(vectors, query, 5, hr_rows)
+    assert rows[0]['document'] == f"body {rows[0]['id'][4:]}"
+
+
+def test_deleted_rows_are_never_returned():
+    index, vectors = build_index()
+    query = vectors[10]
+    
+    index.delete(["doc_10"])
+    
+    assert index.count() == 299
+    assert index.memory_report()["tombstones"] == 1
+    assert "doc_10" not in index.ids()
+    assert "doc_10" not in [row['id'] for row in index.query(query, 20)]
+    assert "doc_10" not in [row['id'] for row in index.query(query, 20, where={"category": "finance"})]
+    assert index.fetch_documents(["doc_10"]) == {}
+
+
+def test_compaction_after_many_deletes_keeps_results_exact(monkeypatch):
+    monkeypatch.setattr(Config, "FLAT_MAX_TOMBSTONE_FRACTION", 0.1)
+    index, vectors = build_index()
+    deleted = [f"doc_{i}" for i in range(0, 300, 3)]
+    index.delete(deleted)
+    
+    live = [i for i in range(300) if i % 3]
+    assert index.count() == len(live)
+    assert index.memory_report()["tombstones"] == 0
+    assert len(index.ids()) == len(live)
+    for seed in range(5):
+        query = unit_vectors(1, 32, seed=100 + seed)[0]
+        assert [row['id'] for row in index.query(query, 5)] == exact_top(vectors, query, 5, live)
+
+
+def test_re_added_rows_replace_the_old_ones():
+    index, vectors = build_index()
+    replacement = unit_vectors(1, 32, seed=42)
+    
+    index.add(["doc_5"], replacement, ["body 5 v2"], [{"category": "hr", "document_id": "doc_5"}])
+    
+    assert index.count() == 300
+    assert index.ids().count("doc_5") == 1
+    top = index.query(replacement[0], 1)[0]
+    assert top['id'] == "doc_5" and top['document'] == "body 5 v2"
+    assert top['distance'] == pytest.approx(0.0, abs=1e-5)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_quantized_index_rescoring_matches_exact_search(precision):
+    index, vectors = build_index(count=500, precision=precision)
+    exact, _ = build_index(count=500)
+    
+    hits = total = 0
+    for seed in range(30):
+        query = unit_vectors(1, 32, seed=200 + seed)[0]
+        truth = exact_top(vectors, query, 5)
+        rows = index.query(query, 5)
+        hits += len(set(truth) & {row['id'] for row in rows})
+        total += len(truth)
+        # Returned distances come from the float32 rows, not from the codes
+        for row in rows:
+            position = int(row['id'][4:])
+            assert row['distance'] == pytest.approx(1.0 - float(vectors[position] @ query), abs=1e-5)
+    assert hits / total >= 0.98
+    assert index.memory_report()["vector_bytes"] < exact.memory_report()["vector_bytes"]
+
+
+def test_int8_add_outside_the_range_requantizes():
+    index, vectors = build_index(count=100, precision="int8")
+    outlier = np.zeros((1, 32), dtype=np.float32)
+    outlier[0, 0] = 1.0
+    
+    index.add(["doc_outlier"], outlier, ["outlier"], [{"category": "hr", "document_id": "doc_outlier"}])
+    
+    top = index.query(outlier[0], 1)[0]
+    assert top['id'] == "doc_outlier"
+    assert top['distance'] == pytest.approx(0.0, abs=1e-5)
+    assert index.count() == 101
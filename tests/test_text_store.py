@@ -0,0 +1,76 @@
+import os
+
+from rag_engine.vector_store.text_store import TextStore, body_key
+
+
+def test_replay_keeps_the_last_record_per_id(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put_many([("a", "first"), ("b", "বাংলা নীতি"), ("c", "gone")])
+    store.put("a", "second")
+    store.delete(["c"])
+    
+    reopened = TextStore(str(tmp_path))
+    assert reopened.get_many(["a", "b", "c"]) == {"a": "second", "b": "বাংলা নীতি"}
+    assert len(reopened) == 2
+
+
+def test_unchanged_bodies_are_not_appended_again(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put_many([("a", "same text")])
+    size = os.path.getsize(store.data_path)
+    store.put_many([("a", "same text")])
+    assert os.path.getsize(store.data_path) == size
+
+
+def test_torn_index_line_is_ignored(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put("a", "complete")
+    with open(store.index_path, "a", encoding="utf-8") as index:
+        index.write('{"id": "b", "offset": 8, "len')
+    
+    reopened = TextStore(str(tmp_path))
+    assert reopened.get("a") == "complete"
+    assert "b" not in reopened
+
+
+def test_compact_drops_garbage_and_keeps_bodies(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put_many((f"doc_{i}", f"version one of {i}") for i in range(50))
+    store.put_many((f"doc_{i}", f"version two of document {i}") for i in range(50))
+    store.delete([f"doc_{i}" for i in range(40, 50)])
+    assert store.stats()["garbage_bytes"] > 0
+    
+    stats = store.compact()
+    
+    assert stats == {"entries": 40, "data_bytes": stats["data_bytes"], "garbage_bytes": 0}
+    assert store.get("doc_7") == "version two of document 7"
+    assert store.get("doc_45") is None
+    assert TextStore(str(tmp_path)).get_many(["doc_0", "doc_39"]) == {
+        "doc_0": "version two of document 0", "doc_39": "version two of document 39"
+    }
+
+
+def test_other_instance_follows_a_compaction(tmp_path):
+    # Two instances stand in for two worker processes sharing the directory
+    writer, reader = TextStore(str(tmp_path)), TextStore(str(tmp_path))
+    writer.put_many((f"doc_{i}", f"old body {i}") for i in range(20))
+    assert reader.get_many(["doc_3"]) == {"doc_3": "old body 3"}
+    
+    writer.put_many((f"doc_{i}", f"new body {i}") for i in range(10))
+    writer.compact()
+    writer.put("doc_new", "written after compaction")
+    
+    assert reader.get("doc_3") == "new body 3"
+    assert reader.get("doc_15") == "old body 15"
+    assert reader.get_many(["doc_new"]) == {"doc_new": "written after compaction"}
+
+
+def test_prefix_copy_and_delete(tmp_path):
+    store = TextStore(str(tmp_path))
+    store.put_many([(body_key("policies_v1", "a_chunk_0"), "A"), (body_key("policies_v1", "b_chunk_0"), "B")])
+    
+    assert store.copy_prefix("policies_v1/", "policies_v2/") == 2
+    assert store.delete_prefix("policies_v1/") == 2
+    
+    assert store.keys("policies_v1/") == []
+    assert store.get(body_key("policies_v2", "b_chunk_0")) == "B"
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+KFG Policy Chatbot HTTP API
+FastAPI front end around KFGChatbot for internal tools
+
+Run with: python ui/api/server.py  (or uvicorn ui.api.server:app --workers N)
+Each worker process loads one chatbot (vector store, embedding model, LLM client)
+at startup and shares it across requests.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+import uvicorn
+
+# Add the project root to Python path for imports
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from ui.terminal.chatbot import KFGChatbot
+from rag_engine.vector_store.batching_encoder import BatchingEncoder
+from config.config import Config
+from utils.metrics import registry
+
+logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
+logger = logging.getLogger(__name__)
+
+# Shared metrics
+API_REQUESTS = registry.counter("kfg_api_requests_total", "HTTP API requests", ("endpoint",))
+API_REJECTED = registry.counter("kfg_api_rejected_total", "HTTP API requests rejected with 429", ("endpoint",))
+API_IN_FLIGHT = registry.gauge("kfg_api_in_flight", "HTTP API requests being processed")
+API_WAITING = registry.gauge("kfg_api_waiting", "HTTP API requests waiting for a slot")
+
+
+class ChatRequest(BaseModel):
+    query: str
+    chat_history: Optional[List[Dict[str, str]]] = None
+    category: Optional[str] = None
+    document_type: Optional[str] = None
+
+
+class SearchRequest(BaseModel):
+    query: str
+    category: Optional[str] = None
+    document_type: Optional[str] = None
+    limit: int = 5
+
+
+class ConcurrencyLimiter:
+    """Bounded concurrency with a bounded wait queue; answers 429 once both are full"""
+
+    def __init__(self, max_concurrent: int, max_waiting: int, timeout: float):
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+
+    async def acquire(self, endpoint: str):
+        API_REQUESTS.labels(endpoint).inc()
+        if self._semaphore.locked():
+            if self._waiting >= self.max_waiting:
+                API_REJECTED.labels(endpoint).inc()
+                raise HTTPException(status_code=429, detail="Server busy, retry shortly",
+                                    headers={"Retry-After": "1"})
+            self._waiting += 1
+            API_WAITING.set(self._waiting)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            except asyncio.TimeoutError:
+                API_REJECTED.labels(endpoint).inc()
+                raise HTTPException(status_code=429, detail="Server busy, retry shortly",
+                                    headers={"Retry-After": "1"})
+            finally:
+                self._waiting -= 1
+                API_WAITING.set(self._waiting)
+        else:
+            await self._semaphore.acquire()
+        API_IN_FLIGHT.inc()
+
+    def release(self):
+        API_IN_FLIGHT.dec()
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self, endpoint: str):
+        await self.acquire(endpoint)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+chatbot: Optional[KFGChatbot] = None
+limiter: Optional[ConcurrencyLimiter] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload the chatbot once per worker process"""
+    global chatbot, limiter
+    chatbot = await run_in_threadpool(KFGChatbot)
+    chatbot.vector_store.wrap_encoder(BatchingEncoder)
+    limiter = ConcurrencyLimiter(Config.API_MAX_CONCURRENCY, Config.API_MAX_QUEUE, Config.API_QUEUE_TIMEOUT)
+    logger.info(f"API worker {os.getpid()} ready")
+    yield
+
+
+app = FastAPI(title="KFG Policy Chatbot API", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "worker": os.getpid()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    async with limiter.slot("chat"):
+        return await run_in_threadpool(
+            chatbot.chat, request.query, request.chat_history, request.category, request.document_type
+        )
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Server-sent events: `sources`, then `token` chunks, then `done`"""
+    await limiter.acquire("chat_stream")
+
+    # Released by whichever runs first: the generator finishing or the response's
+    # background task, which also runs when the client disconnects before the body starts
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            limiter.release()
+
+    async def events():
+        try:
+            stream = chatbot.chat_stream(request.query, request.chat_history, request.category, request.document_type)
+            async for event, data in iterate_in_threadpool(stream):
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        finally:
+            release()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                             background=BackgroundTask(release))
+
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    async with limiter.slot("search"):
+        results = await run_in_threadpool(
+            chatbot.search_policies, request.query, request.category, request.document_type, request.limit
+        )
+    return {"results": results}
+
+
+def _list_documents(category, document_type, limit):
+    """Catalog query and facet counts (blocking SQLite reads, run in the threadpool)"""
+    catalog = chatbot.vector_store.catalog
+    return {
+        "documents": catalog.find_documents(category, document_type, None, limit),
+        "categories": catalog.category_counts(),
+        "document_types": catalog.type_counts()
+    }
+
+
+@app.get("/documents")
+async def list_documents(category: Optional[str] = None, document_type: Optional[str] = None,
+                         limit: int = Query(100, le=1000)):
+    return await run_in_threadpool(_list_documents, category, document_type, limit)
+
+
+@app.post("/documents")
+async def upload_document(file: UploadFile = File(...)):
+    filename = os.path.basename(file.filename or "")
+    extension = Path(filename).suffix.lower()
+    if extension not in Config.ALLOWED_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {extension}")
+
+    async with limiter.slot("upload"):
+        # Keep the original name: the processor derives filename and document type from it
+        upload_dir = tempfile.mkdtemp(prefix="kfg_upload_")
+        try:
+            path = os.path.join(upload_dir, filename)
+            with open(path, "wb") as out:
+                size = 0
+                while chunk := await file.read(1024 * 1024):
+                    size += len(chunk)
+                    if size > Config.MAX_FILE_SIZE:
+                        raise HTTPException(status_code=413, detail="File too large")
+                    out.write(chunk)
+            result = await run_in_threadpool(chatbot.upload_and_process_document, path, filename)
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+
+    if not result.get("success"):
+        raise HTTPException(status_code=422, detail=result.get("error", "Processing failed"))
+    return result
+
+
+def main():
+    uvicorn.run("ui.api.server:app", host=Config.API_HOST, port=Config.API_PORT,
+                workers=Config.API_WORKERS, app_dir=project_root)
+
+
+if __name__ == "__main__":
+    main()
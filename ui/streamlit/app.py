@@ -9,6 +9,7 @@ sys.path.insert(0, project_root)
 
 from ui.terminal.chatbot import KFGChatbot
 from config.config import Config
+from utils.metrics import registry
 import logging
 import json
 
@@ -243,6 +244,38 @@ def initialize_chatbot():
         st.error(f"Failed to initialize chatbot: {e}")
         return None
 
+def render_admin_panel(chatbot):
+    """Sidebar metrics panel reading the shared metrics registry"""
+    with st.sidebar:
+        st.subheader("📈 Metrics")
+        
+        metrics = chatbot.get_metrics()
+        col1, col2 = st.columns(2)
+        col1.metric("Chat requests", int(metrics["chat_requests"]))
+        col2.metric("Custom prompt hit rate", f"{metrics['custom_prompt_hit_rate']:.0%}")
+        col1.metric("Retrievals", int(metrics["retrieval_requests"]))
+        col2.metric("Errors", int(metrics["chat_errors"]))
+        
+        latency = chatbot.get_latency_stats()
+        if latency:
+            st.caption("Latency per stage (ms)")
+            st.table({
+                stage: {"p50": round(s["p50"], 1), "p95": round(s["p95"], 1), "p99": round(s["p99"], 1)}
+                for stage, s in latency.items()
+            })
+        
+        with st.expander("All metrics"):
+            for name, series in registry.snapshot().items():
+                for sample in series:
+                    labels = ", ".join(f"{k}={v}" for k, v in sample["labels"].items())
+                    value = sample["value"]
+                    if isinstance(value, dict):
+                        value = f"count={value['count']}, mean={value['mean']:.4f}"
+                    st.text(f"{name}{'{' + labels + '}' if labels else ''} {value}")
+        
+        if st.button("Refresh metrics", key="refresh_metrics"):
+            st.rerun()
+
 def main():
     # Simple Header with Brand Logo
     st.markdown("""
@@ -263,6 +296,10 @@ def main():
         st.error("❌ Chatbot initialization failed. Please check your configuration.")
         return
     
+    # Metrics panel for admins only
+    if Config.SHOW_ADMIN_PANEL or st.experimental_get_query_params().get("admin") == ["1"]:
+        render_admin_panel(chatbot)
+    
     # Simple Chat Interface - No Extra Panels
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
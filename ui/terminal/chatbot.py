@@ -1,6 +1,7 @@
 import os
 import logging
 import sys
+import time
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
@@ -11,11 +12,24 @@ sys.path.insert(0, project_root)
 from rag_engine.vector_store.vector_store import VectorStore
 from models.llm.deepseek_client import DeepSeekClient
 from rag_engine.document_processing.document_processor import DocumentProcessor
+from rag_engine.document_processing.corpus_scanner import get_corpus_scanner
 from config.config import Config
+from config.custom_prompts import CustomPrompts
+from utils.cost_monitor import get_cost_monitor, calculate_cost, UsageCapture, extract_token_usage, report_usage
+from utils.latency_tracer import latency_tracer, RequestTrace
+from utils.metrics import registry, start_metrics_server
 
 logging.basicConfig(level=getattr(logging, Config.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
+# Shared metrics
+CHAT_REQUESTS = registry.counter("kfg_chat_requests_total", "Chat requests")
+CUSTOM_PROMPT_HITS = registry.counter("kfg_custom_prompt_hits_total", "Chat requests answered from custom prompts")
+RETRIEVAL_REQUESTS = registry.counter("kfg_retrieval_requests_total", "Chat requests that went to retrieval")
+CHAT_ERRORS = registry.counter("kfg_chat_errors_total", "Chat requests that failed")
+CHAT_SECONDS = registry.histogram("kfg_chat_seconds", "End-to-end chat latency", ("path",))
+LLM_SECONDS = registry.histogram("kfg_llm_seconds", "LLM response latency")
+
 class KFGChatbot:
     def __init__(self):
         """Initialize the KFG Policy Chatbot with cost optimization"""
@@ -23,6 +37,17 @@ class KFGChatbot:
             self.vector_store = VectorStore()
             self.deepseek_client = DeepSeekClient()
             self.document_processor = DocumentProcessor()
+            self.corpus_scanner = get_corpus_scanner(Config.ORGANIZED_PATH)
+            
+            if Config.ENABLE_METRICS_SERVER:
+                try:
+                    start_metrics_server()
+                except OSError as e:
+                    # Another worker on this host already serves the port
+                    logger.warning(f"Metrics endpoint not started: {e}")
+            
+            if Config.CUSTOM_PROMPT_SEMANTIC_MATCHING:
+                CustomPrompts.enable_semantic_matching(self.vector_store.embedding_model.encode)
             
             logger.info("KFG Chatbot initialized successfully")
         except Exception as e:
@@ -40,11 +65,11 @@ class KFGChatbot:
             }
             
             # Check if organized documents exist
-            if os.path.exists(Config.ORGANIZED_PATH):
+            snapshot = self.corpus_scanner.snapshot()
+            if snapshot.exists():
                 logger.info("Using existing organized documents")
                 # Get organization summary
-                organized_files = [f for f in os.listdir(Config.ORGANIZED_PATH) if f.endswith('_organized.txt')]
-                results["processed_files"] = organized_files
+                results["processed_files"] = [entry.name for entry in snapshot.organized_files()]
                 
                 # Create summary from organized structure
                 summary = self._get_organized_summary()
@@ -56,6 +81,7 @@ class KFGChatbot:
                     from fix_kfg_documents import KFGDocumentFixer
                     fixer = KFGDocumentFixer()
                     fixer_results = fixer.process_all_documents()
+                    snapshot = self.corpus_scanner.snapshot()
                     results["processed_files"] = [doc['filename'] for doc in fixer_results['processed']]
                     results["organization_summary"] = fixer_results['summary']
                 except Exception as e:
@@ -65,7 +91,7 @@ class KFGChatbot:
             
             # Index documents in vector store
             logger.info("Indexing documents in vector store...")
-            indexed_docs = self.vector_store.add_documents_from_organized_folder()
+            indexed_docs = self.vector_store.add_documents_from_organized_folder(snapshot=snapshot)
             results["indexed_documents"] = indexed_docs
             
             # Get collection stats
@@ -90,27 +116,13 @@ class KFGChatbot:
                 'organized_path': Config.ORGANIZED_PATH
             }
             
-            # Count organized files
-            organized_path = Path(Config.ORGANIZED_PATH)
-            if organized_path.exists():
-                organized_files = list(organized_path.glob("*.txt"))
-                summary['total_files'] = len(organized_files)
-                
-                # Count by category
-                category_path = organized_path / "by_category"
-                if category_path.exists():
-                    for category_folder in category_path.iterdir():
-                        if category_folder.is_dir():
-                            category_files = list(category_folder.glob("*.txt"))
-                            summary['categories'][category_folder.name] = len(category_files)
-                
-                # Count by type
-                type_path = organized_path / "by_type"
-                if type_path.exists():
-                    for type_folder in type_path.iterdir():
-                        if type_folder.is_dir():
-                            type_files = list(type_folder.glob("*.txt"))
-                            summary['types'][type_folder.name] = len(type_files)
+            # Counts come from indexed catalog queries and the cached corpus snapshot
+            # instead of directory walks
+            catalog = self.vector_store.catalog
+            snapshot = self.corpus_scanner.snapshot()
+            summary['total_files'] = len(snapshot.files('', suffix='.txt')) or catalog.ensure_populated()
+            summary['categories'] = catalog.category_counts() or snapshot.category_counts()
+            summary['types'] = catalog.type_counts() or snapshot.type_counts()
             
             return summary
             
@@ -120,88 +132,318 @@ class KFGChatbot:
     
     def chat(self, query: str, chat_history: List[Dict[str, str]] = None, 
              category_filter: str = None, doc_type_filter: str = None) -> Dict[str, Any]:
-        """Enhanced chat function with filtering and cost optimization"""
+        """Enhanced chat function with filtering and cost optimization
+        
+        The result carries per-stage latencies in milliseconds under "timings".
+        """
+        with latency_tracer.trace("chat", filtered=bool(category_filter or doc_type_filter)) as trace:
+            result = self._chat(query, chat_history, category_filter, doc_type_filter)
+        return self._finish_request(trace, result)
+    
+    def chat_stream(self, query: str, chat_history: List[Dict[str, str]] = None,
+                    category_filter: str = None, doc_type_filter: str = None):
+        """Streaming variant of chat() yielding (event, data) pairs
+        
+        Events: "sources" before generation starts, "token" per response chunk
+        and a final "done" with the chat() result fields except "response".
+        """
+        trace = RequestTrace("chat_stream", {"filtered": bool(category_filter or doc_type_filter)})
         try:
-            if not query.strip():
-                return {
-                    "response": "Please provide a question about KFG policies.",
-                    "sources": [],
-                    "error": None,
-                    "cost_estimate": {}
-                }
-            
-            # Search for relevant documents with filtering
-            logger.info(f"Searching for documents related to: {query}")
+            with latency_tracer.activate(trace):
+                result, documents, cost_estimate = self._prepare_context(query, category_filter, doc_type_filter)
             
-            if category_filter:
-                relevant_docs = self.vector_store.search_by_category(query, category_filter, Config.MAX_DOCUMENTS_PER_QUERY)
-            elif doc_type_filter:
-                relevant_docs = self.vector_store.search_by_type(query, doc_type_filter, Config.MAX_DOCUMENTS_PER_QUERY)
+            if result is not None:
+                yield "sources", result["sources"]
+                yield "token", result["response"]
             else:
-                relevant_docs = self.vector_store.search(query, Config.MAX_DOCUMENTS_PER_QUERY)
-            
-            logger.info(f"Vector store returned {len(relevant_docs)} documents")
-            for i, doc in enumerate(relevant_docs):
-                logger.info(f"Doc {i}: similarity={doc.get('similarity', 0):.3f}, length={len(doc.get('document', ''))}, filename={doc['metadata'].get('filename', 'Unknown')}")
-            
-            # Filter documents by similarity threshold (vector store already filters by MIN_SIMILARITY_SCORE)
-            # So we can use a lower threshold here for better coverage
-            filtered_docs = [
-                doc for doc in relevant_docs 
-                if doc.get('similarity', 0) >= 0.2  # Lower threshold for better coverage
-            ]
-            
-            logger.info(f"After filtering: {len(filtered_docs)} documents")
-            for i, doc in enumerate(filtered_docs):
-                logger.info(f"Filtered Doc {i}: similarity={doc.get('similarity', 0):.3f}, length={len(doc.get('document', ''))}")
-            
-            if not filtered_docs:
-                logger.info("No relevant documents found")
-                return {
-                    "response": "I couldn't find any relevant policy information for your question. Please try rephrasing your question or ask about a different policy topic.",
-                    "sources": [],
-                    "error": None,
-                    "cost_estimate": {}
-                }
-            
-            # Get cost estimate before generating response
-            cost_estimate = self.deepseek_client.get_cost_estimate(query, filtered_docs)
+                yield "sources", self._format_sources(documents)
+                
+                parts = []
+                capture = UsageCapture()
+                start_ns, start = time.time_ns(), time.perf_counter()
+                with LLM_SECONDS.time():
+                    for chunk in self._stream_llm(query, documents, chat_history, capture):
+                        if not parts:
+                            trace.add_span("llm_ttfb", start_ns, (time.perf_counter() - start) * 1000)
+                        parts.append(chunk)
+                        yield "token", chunk
+                trace.add_span("llm_total", start_ns, (time.perf_counter() - start) * 1000)
+                
+                with latency_tracer.activate(trace), latency_tracer.span("format"):
+                    result = self._format_result(query, "".join(parts), documents, cost_estimate, capture.usage)
+        except Exception as e:
+            logger.error(f"Error in chat stream: {e}")
+            result = self._error_result(e)
+        
+        trace.finish()
+        latency_tracer.record(trace)
+        result = self._finish_request(trace, result)
+        yield "done", {key: value for key, value in result.items() if key != "response"}
+    
+    def _finish_request(self, trace: RequestTrace, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach stage timings and record request metrics"""
+        result["timings"] = trace.timings()
+        
+        path = "custom_prompt" if result.get("custom_prompt") else "retrieval"
+        CHAT_SECONDS.labels(path).observe(trace.duration_ms / 1000)
+        if result.get("error"):
+            CHAT_ERRORS.inc()
+        return result
+    
+    def _chat(self, query: str, chat_history: List[Dict[str, str]] = None,
+              category_filter: str = None, doc_type_filter: str = None) -> Dict[str, Any]:
+        try:
+            result, documents, cost_estimate = self._prepare_context(query, category_filter, doc_type_filter)
+            if result is not None:
+                return result
             
             # Generate response using RAG
             logger.info("Generating response using DeepSeek...")
-            response = self.deepseek_client.chat_with_rag(
-                query=query,
-                context_documents=filtered_docs,
-                chat_history=chat_history
-            )
+            response, usage = self._generate_response(query, documents, chat_history)
             
-            # Prepare sources information
-            sources = []
-            for doc in filtered_docs:
-                sources.append({
-                    "filename": doc['metadata'].get('filename', 'Unknown'),
-                    "similarity": doc.get('similarity', 0),
-                    "category": doc['metadata'].get('category', 'Unknown'),
-                    "document_type": doc['metadata'].get('document_type', 'Unknown'),
-                    "date": doc['metadata'].get('date', 'Unknown')
-                })
-            
-            return {
-                "response": response,
-                "sources": sources,
-                "error": None,
-                "cost_estimate": cost_estimate,
-                "documents_used": len(filtered_docs)
-            }
+            with latency_tracer.span("format"):
+                return self._format_result(query, response, documents, cost_estimate, usage)
             
         except Exception as e:
             logger.error(f"Error in chat: {e}")
+            return self._error_result(e)
+    
+    def _prepare_context(self, query: str, category_filter: str = None, doc_type_filter: str = None):
+        """Everything before the LLM call
+        
+        Returns (result, documents, cost_estimate); result is set when the
+        request is answered without the LLM (empty query, custom prompt, no matches).
+        """
+        if not query.strip():
             return {
-                "response": f"An error occurred while processing your question: {str(e)}",
+                "response": "Please provide a question about KFG policies.",
                 "sources": [],
-                "error": str(e),
+                "error": None,
                 "cost_estimate": {}
+            }, [], {}
+        
+        CHAT_REQUESTS.inc()
+        
+        # Fast path: curated answers skip vector search and the LLM call entirely
+        if Config.ENABLE_CUSTOM_PROMPT_FASTPATH and not (category_filter or doc_type_filter):
+            with latency_tracer.span("custom_prompt"):
+                custom = CustomPrompts.get_custom_response(
+                    query,
+                    min_score=Config.CUSTOM_PROMPT_MIN_SCORE,
+                    require_full_coverage=Config.CUSTOM_PROMPT_REQUIRE_FULL_COVERAGE
+                )
+            if custom["has_custom_response"]:
+                CUSTOM_PROMPT_HITS.inc()
+                logger.info(f"Answered from custom prompt '{custom['prompt_type']}' (score={custom['score']:.2f})")
+                return {
+                    "response": custom["response"],
+                    "sources": [{
+                        "filename": custom["source"],
+                        "similarity": custom["score"],
+                        "category": "custom_prompt",
+                        "document_type": "Custom Prompt",
+                        "date": "N/A"
+                    }],
+                    "error": None,
+                    "cost_estimate": {},
+                    "documents_used": 0,
+                    "custom_prompt": custom["prompt_type"]
+                }, [], {}
+        
+        RETRIEVAL_REQUESTS.inc()
+        
+        # Search for relevant documents with filtering
+        logger.info(f"Searching for documents related to: {query}")
+        
+        if category_filter:
+            relevant_docs = self.vector_store.search_by_category(query, category_filter, Config.MAX_DOCUMENTS_PER_QUERY)
+        elif doc_type_filter:
+            relevant_docs = self.vector_store.search_by_type(query, doc_type_filter, Config.MAX_DOCUMENTS_PER_QUERY)
+        else:
+            relevant_docs = self.vector_store.search(
+                query, Config.MAX_DOCUMENTS_PER_QUERY, diversify=Config.DIVERSIFY_CHAT_RESULTS
+            )
+        
+        # Filter documents by similarity threshold (vector store already filters by MIN_SIMILARITY_SCORE)
+        # So we can use a lower threshold here for better coverage
+        with latency_tracer.span("filter"):
+            filtered_docs = [
+                doc for doc in relevant_docs 
+                if doc.get('similarity', 0) >= 0.2  # Lower threshold for better coverage
+            ]
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Retrieved {len(relevant_docs)} documents, {len(filtered_docs)} after filtering: " +
+                ", ".join(f"{doc['metadata'].get('filename', 'Unknown')} ({doc.get('similarity', 0):.3f})"
+                          for doc in filtered_docs)
+            )
+        
+        if not filtered_docs:
+            logger.info("No relevant documents found")
+            return {
+                "response": "I couldn't find any relevant policy information for your question. Please try rephrasing your question or ask about a different policy topic.",
+                "sources": [],
+                "error": None,
+                "cost_estimate": {}
+            }, [], {}
+        
+        # Get cost estimate before generating response
+        with latency_tracer.span("cost_estimate"):
+            cost_estimate = self.deepseek_client.get_cost_estimate(query, filtered_docs)
+        
+        return None, filtered_docs, cost_estimate
+    
+    def _generate_response(self, query: str, context_documents: List[Dict[str, Any]],
+                           chat_history: List[Dict[str, str]] = None):
+        """Call the LLM, timing time-to-first-token when the client can stream
+        
+        Returns (response, usage), usage being what the client reported for
+        this call (None if it reported nothing).
+        """
+        capture = UsageCapture()
+        with latency_tracer.span("llm_total"), LLM_SECONDS.time():
+            if getattr(self.deepseek_client, 'chat_with_rag_stream', None) is None:
+                response = capture.run(
+                    self._call_llm,
+                    query=query,
+                    context_documents=context_documents,
+                    chat_history=chat_history
+                )
+                return response, capture.usage
+            
+            trace = latency_tracer.current_trace()
+            start_ns, start = time.time_ns(), time.perf_counter()
+            parts = []
+            for chunk in self._stream_llm(query, context_documents, chat_history, capture):
+                if not parts and trace is not None:
+                    trace.add_span("llm_ttfb", start_ns, (time.perf_counter() - start) * 1000)
+                parts.append(chunk)
+            return "".join(parts), capture.usage
+    
+    def _stream_llm(self, query: str, context_documents: List[Dict[str, Any]],
+                    chat_history: List[Dict[str, str]] = None, capture: UsageCapture = None):
+        """Response chunks from the client's streaming API (one chunk if it has none)"""
+        capture = capture or UsageCapture()
+        stream_fn = getattr(self.deepseek_client, 'chat_with_rag_stream', None)
+        if stream_fn is None:
+            yield capture.run(
+                self._call_llm,
+                query=query,
+                context_documents=context_documents,
+                chat_history=chat_history
+            )
+            return
+        yield from capture.iterate(
+            self._read_stream(stream_fn(query=query, context_documents=context_documents, chat_history=chat_history))
+        )
+    
+    def _call_llm(self, **kwargs) -> str:
+        """One non-streaming LLM call, reporting the reply's usage block"""
+        reply = self.deepseek_client.chat_with_rag(**kwargs)
+        report_usage(extract_token_usage(reply))
+        return self._reply_text(reply)
+    
+    def _read_stream(self, stream):
+        """Text of each streamed chunk; the usage block (sent on the last chunk) is reported"""
+        for chunk in stream:
+            report_usage(extract_token_usage(chunk))
+            text = self._reply_text(chunk)
+            if text:
+                yield text
+    
+    @staticmethod
+    def _reply_text(reply) -> str:
+        """Response text from a plain string, a chat completion (or chunk) or a {"response": ...} dict"""
+        if reply is None or isinstance(reply, str):
+            return reply or ""
+        if isinstance(reply, dict):
+            if "choices" not in reply:
+                return reply.get("response") or reply.get("content") or ""
+            choices = reply["choices"] or [{}]
+            message = choices[0].get("message") or choices[0].get("delta") or {}
+            return message.get("content") or ""
+        choices = getattr(reply, "choices", None)
+        if not choices:
+            return ""
+        message = getattr(choices[0], "message", None) or getattr(choices[0], "delta", None)
+        return getattr(message, "content", None) or ""
+    
+    def _format_sources(self, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Source attribution for the documents sent to the LLM"""
+        sources = []
+        for doc in documents:
+            sources.append({
+                "filename": doc['metadata'].get('filename', 'Unknown'),
+                "similarity": doc.get('similarity', 0),
+                "category": doc['metadata'].get('category', 'Unknown'),
+                "document_type": doc['metadata'].get('document_type', 'Unknown'),
+                "date": doc['metadata'].get('date', 'Unknown')
+            })
+        return sources
+    
+    def _format_result(self, query: str, response: str, documents: List[Dict[str, Any]],
+                       cost_estimate: Dict[str, Any], usage: Dict[str, Any] = None) -> Dict[str, Any]:
+        usage = self._record_usage(query, documents, response, usage)
+        return {
+            "response": response,
+            "sources": self._format_sources(documents),
+            "error": None,
+            "cost_estimate": cost_estimate,
+            "documents_used": len(documents),
+            "usage": usage
+        }
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, Any]:
+        return {
+            "response": f"An error occurred while processing your question: {str(error)}",
+            "sources": [],
+            "error": str(error),
+            "cost_estimate": {}
+        }
+    
+    def _record_usage(self, query: str, context_documents: List[Dict[str, Any]], response: str,
+                      usage: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Record token usage and retrieval size for one LLM call
+        
+        Uses the counts from the reply's usage block (or what the client passed
+        to utils.cost_monitor.report_usage), captured per request rather than
+        read from the shared client; falls back to a 4 chars/token estimate.
+        """
+        context_chars = sum(len(doc.get('document', '')) for doc in context_documents)
+        estimated = not usage
+        if estimated:
+            prompt_tokens = (len(query) + context_chars) // 4
+            completion_tokens = len(response or '') // 4
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_prompt_tokens": 0,
+                "total_tokens": prompt_tokens + completion_tokens
             }
+        
+        model = getattr(self.deepseek_client, 'model', None) or Config.MODEL_NAME
+        get_cost_monitor().record_request(
+            usage["total_tokens"], model=model, usage=usage,
+            documents_used=len(context_documents), context_chars=context_chars, estimated=estimated
+        )
+        return {**usage, "model": model, "cost_usd": calculate_cost(model, usage), "estimated": estimated}
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Request counters including the custom prompt hit rate"""
+        metrics = {
+            "chat_requests": CHAT_REQUESTS.value(),
+            "custom_prompt_hits": CUSTOM_PROMPT_HITS.value(),
+            "retrieval_requests": RETRIEVAL_REQUESTS.value(),
+            "chat_errors": CHAT_ERRORS.value()
+        }
+        metrics["custom_prompt_hit_rate"] = metrics["custom_prompt_hits"] / max(metrics["chat_requests"], 1)
+        return metrics
+    
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 chat latency per stage (ms)"""
+        return latency_tracer.get_percentiles()
     
     def get_policy_categories(self) -> List[str]:
         """Get available policy categories"""
@@ -299,9 +541,14 @@ class KFGChatbot:
             result = self.document_processor.process_document(file_path)
             
             if result and result.get('processing_status') == 'success':
+                document_id = os.path.splitext(filename)[0]
+                
+                # Record metadata in the document catalog
+                self.vector_store.catalog.upsert_document(document_id, result['metadata'])
+                
                 # Add to vector store
                 chunks_added = self.vector_store.add_document(
-                    document_id=os.path.splitext(filename)[0],
+                    document_id=document_id,
                     text=result['content']['cleaned'],
                     metadata=result['metadata']
                 )
@@ -394,7 +641,7 @@ class KFGChatbot:
     def get_cost_analysis(self) -> Dict[str, Any]:
         """Get cost analysis and optimization suggestions"""
         try:
-            cost_stats = cost_monitor.get_usage_summary()
+            cost_stats = get_cost_monitor().get_usage_summary()
             
             # Get collection stats for context
             collection_stats = self.vector_store.get_collection_stats()
@@ -404,6 +651,7 @@ class KFGChatbot:
                 "total_tokens": cost_stats.get('total', {}).get('tokens', 0),
                 "average_tokens_per_request": cost_stats.get('total', {}).get('tokens', 0) / max(cost_stats.get('total', {}).get('requests', 1), 1),
                 "estimated_cost": cost_stats.get('total', {}).get('cost_usd', 0),
+                "by_model": get_cost_monitor().get_cost_breakdown(),
                 "optimization_suggestions": []
             }
             
@@ -426,7 +674,6 @@ class KFGChatbot:
     def get_custom_prompts(self) -> Dict[str, Any]:
         """Get available custom prompts and their details"""
         try:
-            from config.custom_prompts import CustomPrompts
             prompts = CustomPrompts.get_all_prompts()
             
             return {
@@ -446,21 +693,20 @@ class KFGChatbot:
     def add_custom_prompt(self, prompt_key: str, keywords: List[str], response: str, confidence_boost: float = 0.9) -> Dict[str, Any]:
         """Add a new custom prompt dynamically"""
         try:
-            from config.custom_prompts import CustomPrompts
-            
-            # Add new prompt to the custom prompts
-            CustomPrompts.CUSTOM_PROMPTS[prompt_key] = {
+            # Persist the prompt; other workers pick it up on their next version check
+            version = CustomPrompts.add_custom_prompt(prompt_key, {
                 "keywords": keywords,
                 "response": response,
                 "confidence_boost": confidence_boost,
                 "source": "Dynamically Added Custom Policy"
-            }
+            })
             
             return {
                 "success": True,
                 "message": f"Custom prompt '{prompt_key}' added successfully",
                 "prompt_key": prompt_key,
-                "keywords": keywords
+                "keywords": keywords,
+                "version": version
             }
         except Exception as e:
             logger.error(f"Error adding custom prompt: {e}")
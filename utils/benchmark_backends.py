@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Search Backend Benchmark
+Query latency of the flat NumPy index against Chroma (HNSW) on synthetic
+unit vectors at increasing corpus sizes, unfiltered and with a category
+filter. Use the crossover to set Config.FLAT_INDEX_MAX_ROWS.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.backends import FlatIndexBackend, ChromaBackend
+from utils.latency_tracer import percentile
+
+CATEGORIES = ["hr", "finance", "admin", "medical", "travel", "leave", "salary", "uniform", "training", "general"]
+
+
+def synthetic_corpus(size: int, dimensions: int, seed: int = 7) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, dimensions)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return {
+        "ids": [f"doc_{i}_chunk_0" for i in range(size)],
+        "vectors": vectors,
+        "documents": [f"document {i}" for i in range(size)],
+        "metadatas": [{"document_id": f"doc_{i}", "category": CATEGORIES[i % len(CATEGORIES)],
+                       "document_type": "policy"} for i in range(size)]
+    }
+
+
+def build_chroma(corpus: Dict[str, Any], batch_size: int = 5000):
+    import chromadb
+    from chromadb.config import Settings
+    from rag_engine.vector_store.collections import collection_metadata
+
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    name = f"backend_bench_{len(corpus['ids'])}"
+    try:
+        client.delete_collection(name=name)
+    except Exception:
+        pass
+    collection = client.create_collection(name=name, metadata=collection_metadata("Backend benchmark"))
+    for offset in range(0, len(corpus['ids']), batch_size):
+        collection.add(
+            ids=corpus['ids'][offset:offset + batch_size],
+            embeddings=corpus['vectors'][offset:offset + batch_size].tolist(),
+            documents=corpus['documents'][offset:offset + batch_size],
+            metadatas=corpus['metadatas'][offset:offset + batch_size]
+        )
+    return ChromaBackend(collection)
+
+
+def time_queries(backend, queries: np.ndarray, k: int, where: Dict[str, Any] = None) -> Dict[str, float]:
+    backend.query(queries[0], k, where=where)  # warm up
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        backend.query(query, k, where=where)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {"p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95)}
+
+
+def recall_against(backend, exact: FlatIndexBackend, queries: np.ndarray, k: int) -> float:
+    hits = 0
+    for query in queries:
+        truth = {row['id'] for row in exact.query(query, k)}
+        hits += len(truth & {row['id'] for row in backend.query(query, k)})
+    return hits / (len(queries) * k)
+
+
+def benchmark_size(size: int, dimensions: int, k: int, query_count: int, with_chroma: bool) -> Dict[str, Any]:
+    corpus = synthetic_corpus(size, dimensions)
+    queries = synthetic_corpus(query_count, dimensions, seed=size)["vectors"]
+    category = {"category": CATEGORIES[0]}
+
+    start = time.perf_counter()
+    flat = FlatIndexBackend(corpus['ids'], corpus['vectors'], corpus['documents'], corpus['metadatas'])
+    result = {
+        "size": size,
+        "flat": {
+            "load_seconds": time.perf_counter() - start,
+            "memory_mb": flat.memory_bytes() / 1024 / 1024,
+            "unfiltered": time_queries(flat, queries, k),
+            "filtered": time_queries(flat, queries, k, category)
+        }
+    }
+
+    if with_chroma:
+        start = time.perf_counter()
+        chroma = build_chroma(corpus)
+        result["chroma"] = {
+            "load_seconds": time.perf_counter() - start,
+            "unfiltered": time_queries(chroma, queries, k),
+            "filtered": time_queries(chroma, queries, k, category),
+            "recall": recall_against(chroma, flat, queries, k)
+        }
+    return result
+
+
+def recommend_max_rows(results: List[Dict[str, Any]]) -> int:
+    """Largest benchmarked size where the flat index is at least as fast as Chroma (p95, unfiltered)"""
+    best = 0
+    for result in results:
+        if "chroma" in result and result["flat"]["unfiltered"]["p95_ms"] <= result["chroma"]["unfiltered"]["p95_ms"]:
+            best = result["size"]
+    return best
+
+
+def print_table(results: List[Dict[str, Any]]):
+    print(f"\n{'size':>8}  {'flat p50':>9}{'flat p95':>9}{'filt p95':>9}{'MB':>8}  "
+          f"{'chroma p50':>11}{'chroma p95':>11}{'filt p95':>9}{'recall':>8}")
+    print("-" * 86)
+    for result in results:
+        flat = result["flat"]
+        line = (f"{result['size']:>8}  {flat['unfiltered']['p50_ms']:>9.3f}{flat['unfiltered']['p95_ms']:>9.3f}"
+                f"{flat['filtered']['p95_ms']:>9.3f}{flat['memory_mb']:>8.1f}  ")
+        chroma = result.get("chroma")
+        if chroma:
+            line += (f"{chroma['unfiltered']['p50_ms']:>11.3f}{chroma['unfiltered']['p95_ms']:>11.3f}"
+                     f"{chroma['filtered']['p95_ms']:>9.3f}{chroma['recall']:>8.3f}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the flat NumPy index against Chroma")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--dimensions", type=int, default=384, help="Embedding size (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--no-chroma", action="store_true", help="Benchmark the flat index only")
+    parser.add_argument("--output", default="backend_benchmark.json")
+    args = parser.parse_args()
+
+    print("🏁 Search Backend Benchmark")
+    print("=" * 50)
+
+    results = []
+    for size in args.sizes:
+        print(f"   ⏱️  {size} documents...")
+        results.append(benchmark_size(size, args.dimensions, args.k, args.queries, not args.no_chroma))
+    print_table(results)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "dimensions": args.dimensions,
+        "k": args.k,
+        "results": results
+    }
+    if not args.no_chroma:
+        report["recommended_flat_index_max_rows"] = recommend_max_rows(results)
+        print(f"\n✅ Flat index is as fast as Chroma up to {report['recommended_flat_index_max_rows']} rows "
+              f"(Config.FLAT_INDEX_MAX_ROWS = {Config.FLAT_INDEX_MAX_ROWS})")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
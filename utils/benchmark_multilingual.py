@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Cross-lingual Retrieval Benchmark
+Recall and latency of Bangla and English queries from the bundled labelled
+set for each embedding model: the English-only Config.EMBEDDING_MODEL, the
+Config.MULTILINGUAL_EMBEDDING_MODEL and, with --translate-model, the
+translate-then-search round trip a multilingual model makes unnecessary.
+
+Every organized document is embedded once per model (one vector per file,
+as indexed); latency covers query embedding plus an exact search. Query
+languages are also checked against the script-based detector VectorStore
+uses.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.language import detect_language, is_multilingual_model
+from utils.retrieval_eval import load_corpus, load_labelled_queries, label_queries, evaluate
+
+
+class ModelRetriever:
+    """Exact cosine search over one embedding pass of the corpus"""
+
+    def __init__(self, corpus: Dict[str, str], model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.doc_ids = list(corpus)
+        start = time.perf_counter()
+        self.doc_vectors = self._encode([corpus[doc_id] for doc_id in self.doc_ids])
+        self.index_seconds = time.perf_counter() - start
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=32, normalize_embeddings=True, show_progress_bar=False),
+            dtype=np.float32
+        )
+
+    def search(self, query: str, n: int) -> List[str]:
+        scores = self.doc_vectors @ self._encode([query])[0]
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        return [self.doc_ids[i] for i in top[np.argsort(-scores[top])]]
+
+
+def translating(search_fn: Callable[[str, int], List[str]], model_name: str) -> Callable[[str, int], List[str]]:
+    """Translate Bangla queries to English before searching (the round trip being avoided)"""
+    from transformers import pipeline
+    translator = pipeline("translation", model=model_name)
+
+    def search(query: str, n: int) -> List[str]:
+        if detect_language(query) == "Bangla":
+            query = translator(query, max_length=128)[0]['translation_text']
+        return search_fn(query, n)
+    return search
+
+
+def by_language(search_fn: Callable[[str, int], List[str]], labelled: List[Dict[str, Any]],
+                k: int, repeats: int) -> Dict[str, Dict[str, Any]]:
+    """evaluate() separately for each query language"""
+    languages = sorted({item['language'] for item in labelled})
+    search_fn(labelled[0]['query'], k)  # warm up
+    return {
+        language: evaluate(search_fn, [item for item in labelled if item['language'] == language],
+                           k=k, repeats=repeats)
+        for language in languages
+    }
+
+
+def print_table(results: Dict[str, Dict[str, Dict[str, Any]]], k: int):
+    print(f"\n{'config':<58}{'language':<10}{'recall@' + str(k):>10}{'MRR':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    print("-" * 104)
+    for name, languages in results.items():
+        for language, metrics in languages.items():
+            print(f"{name:<58}{language:<10}{metrics[f'recall@{k}']:>10.3f}{metrics['mrr']:>8.3f}"
+                  f"{metrics['latency_p50_ms']:>9.1f}{metrics['latency_p95_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Bangla and English retrieval per embedding model")
+    parser.add_argument("--models", nargs="+", default=[Config.EMBEDDING_MODEL, Config.MULTILINGUAL_EMBEDDING_MODEL])
+    parser.add_argument("--labels", help="Labelled query set JSON (default: bundled set)")
+    parser.add_argument("--translate-model", help="Also time Bangla->English translation first, "
+                                                  "e.g. Helsinki-NLP/opus-mt-bn-en")
+    parser.add_argument("--k", type=int, default=Config.MAX_DOCUMENTS_PER_QUERY)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per query")
+    parser.add_argument("--output", default="multilingual_benchmark.json")
+    args = parser.parse_args()
+
+    print("🌐 Cross-lingual Retrieval Benchmark")
+    print("=" * 50)
+
+    corpus = load_corpus()
+    if not corpus:
+        print(f"❌ No organized documents found in {Config.ORGANIZED_PATH}")
+        sys.exit(1)
+    labelled = label_queries(corpus, load_labelled_queries(args.labels))
+    counts = {}
+    for item in labelled:
+        counts[item['language']] = counts.get(item['language'], 0) + 1
+    detected = sum(1 for item in labelled if detect_language(item['query']) == item['language'])
+    print(f"📚 {len(corpus)} documents, {len(labelled)} queries "
+          f"({', '.join(f'{count} {language}' for language, count in sorted(counts.items()))})")
+    print(f"🔤 Language detection agrees with the labels on {detected}/{len(labelled)} queries")
+
+    results, index_seconds = {}, {}
+    retrievers = {}
+    for model_name in args.models:
+        print(f"   🧮 Embedding corpus with {model_name}...")
+        retriever = ModelRetriever(corpus, model_name)
+        retrievers[model_name] = retriever
+        index_seconds[model_name] = retriever.index_seconds
+        results[model_name] = by_language(retriever.search, labelled, args.k, args.repeats)
+
+    if args.translate_model:
+        english = next((name for name in args.models if not is_multilingual_model(name)), None)
+        if english is None:
+            print("⚠️  --translate-model needs an English-only model in --models; skipping")
+        else:
+            try:
+                search = translating(retrievers[english].search, args.translate_model)
+                bangla = [item for item in labelled if item['language'] == "Bangla"]
+                results[f"{args.translate_model} → {english}"] = by_language(search, bangla, args.k, args.repeats)
+            except Exception as e:
+                print(f"⚠️  Translation model unavailable ({e}); skipping")
+
+    print_table(results, args.k)
+
+    best = max(args.models, key=lambda name: results[name].get("Bangla", {}).get(f"recall@{args.k}", 0.0))
+    print(f"\n✅ Best Bangla recall@{args.k}: {best}")
+    if is_multilingual_model(best):
+        print("   Switch the live index with: python utils/index_versions.py --rebuild --multilingual")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "documents": len(corpus),
+        "k": args.k,
+        "queries_by_language": counts,
+        "language_detection_accuracy": detected / len(labelled),
+        "index_seconds": index_seconds,
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Custom Prompt Matcher Microbenchmark
+Compares the legacy per-keyword substring loop with the compiled PromptMatcher on 10k prompts
+"""
+
+import gc
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.prompt_matcher import PromptMatcher
+
+TOPICS = [
+    "medical", "leave", "allowance", "salary", "increment", "bonus", "travel", "transport",
+    "uniform", "overtime", "festival", "gratuity", "provident", "fund", "recruitment",
+    "transfer", "retirement", "housing", "food", "mobile", "fuel", "driver", "motorcycle"
+]
+QUALIFIERS = ["policy", "rules", "limit", "claim", "bill", "procedure", "entitlement", "rate"]
+
+
+def build_prompts(count: int, seed: int = 7) -> dict:
+    """Synthetic prompt set with 3-5 two/three word keywords per prompt"""
+    rng = random.Random(seed)
+    prompts = {}
+    for i in range(count):
+        keywords = []
+        for _ in range(rng.randint(3, 5)):
+            words = rng.sample(TOPICS, 2) + [rng.choice(QUALIFIERS)]
+            keywords.append(" ".join(words[:rng.randint(2, 3)]) + f" {i}")
+        prompts[f"prompt_{i}"] = {
+            "keywords": keywords,
+            "response": f"Canned answer {i}",
+            "confidence_boost": 0.8,
+            "source": "Benchmark"
+        }
+    return prompts
+
+
+def build_queries(prompts: dict, count: int, seed: int = 11) -> list:
+    """Half the queries hit a prompt keyword, half miss"""
+    rng = random.Random(seed)
+    keys = list(prompts)
+    queries = []
+    for i in range(count):
+        if i % 2 == 0:
+            keyword = rng.choice(prompts[rng.choice(keys)]["keywords"])
+            queries.append(f"What is the {keyword} for officers?")
+        else:
+            queries.append(f"Tell me about {rng.choice(TOPICS)} {rng.choice(QUALIFIERS)} please")
+    return queries
+
+
+def legacy_match(prompts: dict, query: str):
+    """The original CustomPrompts.get_custom_response loop"""
+    query_lower = query.lower()
+    for prompt_key, prompt_data in prompts.items():
+        for keyword in prompt_data["keywords"]:
+            if keyword in query_lower:
+                return prompt_key
+    return None
+
+
+def time_per_query(fn, queries) -> list:
+    gc.collect()
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def report(name: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {name:<22} mean {statistics.mean(timings):10.1f} µs   "
+          f"p50 {statistics.median(timings):10.1f} µs   p95 {p95:10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark custom prompt matching")
+    parser.add_argument("--prompts", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("⏱️  Custom Prompt Matcher Benchmark")
+    print("=" * 50)
+    prompts = build_prompts(args.prompts)
+    queries = build_queries(prompts, args.queries)
+    print(f"Prompts: {len(prompts):,}   Queries: {len(queries):,}")
+
+    start = time.perf_counter()
+    matcher = PromptMatcher(prompts)
+    matcher.best_match("warm up")  # builds failure links
+    print(f"Matcher build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print("\nPer-query latency:")
+    report("legacy substring loop", time_per_query(lambda q: legacy_match(prompts, q), queries))
+    report("compiled matcher", time_per_query(matcher.best_match, queries))
+
+    # Incremental add followed by a query (failure links rebuilt lazily)
+    start = time.perf_counter()
+    matcher.add_prompt("prompt_new", {
+        "keywords": ["night shift allowance"],
+        "response": "New answer",
+        "confidence_boost": 0.9,
+        "source": "Benchmark"
+    })
+    match = matcher.best_match("What is the night shift allowance?")
+    print(f"\nIncremental add + first query: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"(matched: {match['prompt_key'] if match else None})")
+
+
+if __name__ == "__main__":
+    main()
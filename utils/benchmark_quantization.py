@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Vector Storage Precision Benchmark
+Memory saved and recall lost by storing flat index vectors as float16 or
+int8 (Config.VECTOR_STORAGE_DTYPE), each with full-precision rescoring of
+the top candidates and without it (shortlist = k).
+
+Runs on the stored embeddings of the active collection with the bundled
+labelled query set:
+  ann recall@k  - overlap with exact float32 search
+  recall@k      - document recall on the labelled queries
+and reports both as deltas against float32. --synthetic N measures memory and
+ann recall on N random unit vectors instead (no labelled recall).
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.backends import FlatIndexBackend, STORAGE_DTYPES
+from utils.latency_tracer import percentile
+from utils.retrieval_eval import load_corpus, load_labelled_queries, label_queries, evaluate
+
+
+def load_live(collection_name: str, labels_path: str = None) -> Dict[str, Any]:
+    """Stored vectors of the collection plus the labelled queries encoded with its embedding model"""
+    import chromadb
+    from chromadb.config import Settings
+    from utils.tune_hnsw import load_vectors
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(name=collection_name)
+    data = load_vectors(collection)
+
+    labelled = label_queries(load_corpus(), load_labelled_queries(labels_path))
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer((collection.metadata or {}).get("embedding_model", Config.EMBEDDING_MODEL))
+    queries = [item['query'] for item in labelled]
+    encoded = model.encode(queries, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False)
+    data["labelled"] = labelled
+    data["query_vectors"] = {query: np.asarray(vector, dtype=np.float32) for query, vector in zip(queries, encoded)}
+    return data
+
+
+def load_synthetic(size: int, dimensions: int, query_count: int) -> Dict[str, Any]:
+    from utils.benchmark_backends import synthetic_corpus
+    corpus = synthetic_corpus(size, dimensions)
+    queries = synthetic_corpus(query_count, dimensions, seed=size)["vectors"]
+    return {
+        "ids": corpus["ids"],
+        "embeddings": corpus["vectors"],
+        "metadatas": corpus["metadatas"],
+        "labelled": [],
+        "query_vectors": {f"q{i}": vector for i, vector in enumerate(queries)}
+    }
+
+
+def measure(data: Dict[str, Any], exact: FlatIndexBackend, precision: str, multiplier: int,
+            k: int, repeats: int) -> Dict[str, Any]:
+    """Build one flat index at `precision` and score it against exact float32 search"""
+    index = FlatIndexBackend(data['ids'], data['embeddings'], [""] * len(data['ids']), data['metadatas'],
+                             precision=precision, rescore_multiplier=multiplier)
+    n = min(k, len(data['ids']))
+
+    overlaps, latencies = [], []
+    for vector in data['query_vectors'].values():
+        truth = {row['id'] for row in exact.query(vector, n, include_documents=False)}
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rows = index.query(vector, n, include_documents=False)
+            latencies.append((time.perf_counter() - start) * 1000)
+        overlaps.append(len(truth & {row['id'] for row in rows}) / max(len(truth), 1))
+    latencies.sort()
+
+    result = {
+        "storage": precision if precision == "float32" or multiplier > 1 else f"{precision} (no rescore)",
+        "precision": precision,
+        "rescore_multiplier": multiplier if precision != "float32" else None,
+        "memory": index.memory_report(),
+        f"ann_recall@{k}": sum(overlaps) / len(overlaps),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        f"recall@{k}": None
+    }
+
+    if data['labelled']:
+        def search(query: str, top: int) -> List[str]:
+            rows = index.query(data['query_vectors'][query], top, include_documents=False)
+            return list(dict.fromkeys(row['metadata'].get('document_id') for row in rows))
+
+        metrics = evaluate(search, data['labelled'], k=k)
+        result[f"recall@{k}"] = metrics[f'recall@{k}']
+        result["recall_by_language"] = metrics['recall_by_language']
+    return result
+
+
+def add_deltas(results: List[Dict[str, Any]], k: int):
+    """Memory saved and recall deltas of every row against the float32 baseline"""
+    baseline = next(result for result in results if result['precision'] == "float32")
+    for result in results:
+        memory = result['memory']
+        result["memory_saved_pct"] = 100.0 * memory['saved_bytes'] / memory['float32_bytes'] if memory['float32_bytes'] else 0.0
+        result["ann_recall_delta"] = result[f'ann_recall@{k}'] - baseline[f'ann_recall@{k}']
+        if result[f'recall@{k}'] is not None:
+            result["recall_delta"] = result[f'recall@{k}'] - baseline[f'recall@{k}']
+
+
+def print_table(results: List[Dict[str, Any]], k: int):
+    print(f"\n{'storage':<22}{'MB':>8}{'saved':>8}{'ann@' + str(k):>8}{'Δann':>8}"
+          f"{'recall@' + str(k):>10}{'Δrecall':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    print("-" * 91)
+    for result in results:
+        recall = result[f'recall@{k}']
+        recall_text = f"{recall:>10.3f}{result['recall_delta']:>+9.3f}" if recall is not None else f"{'-':>10}{'-':>9}"
+        print(f"{result['storage']:<22}{result['memory']['vector_bytes'] / 1024 / 1024:>8.2f}"
+              f"{result['memory_saved_pct']:>7.0f}%{result[f'ann_recall@{k}']:>8.3f}{result['ann_recall_delta']:>+8.3f}"
+              f"{recall_text}{result['latency_p50_ms']:>9.3f}{result['latency_p95_ms']:>9.3f}")
+
+
+def main():
+    from rag_engine.vector_store.collection_alias import get_collection_alias
+
+    parser = argparse.ArgumentParser(description="Memory and recall of float16 / int8 vector storage")
+    parser.add_argument("--collection", default=get_collection_alias().active(), help="Default: active version")
+    parser.add_argument("--labels", help="Labelled query set JSON (default: bundled set)")
+    parser.add_argument("--synthetic", type=int, help="Use this many random vectors instead of the collection")
+    parser.add_argument("--dimensions", type=int, default=384, help="--synthetic embedding size")
+    parser.add_argument("--queries", type=int, default=200, help="--synthetic query count")
+    parser.add_argument("--k", type=int, default=Config.MAX_DOCUMENTS_PER_QUERY)
+    parser.add_argument("--multiplier", type=int, default=Config.RESCORE_CANDIDATE_MULTIPLIER,
+                        help="Candidates rescored in float32 per result")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--output", default="quantization_benchmark.json")
+    args = parser.parse_args()
+
+    print("🗜️  Vector Storage Precision Benchmark")
+    print("=" * 50)
+
+    if args.synthetic:
+        data = load_synthetic(args.synthetic, args.dimensions, args.queries)
+        source = f"synthetic:{args.synthetic}"
+    else:
+        try:
+            data = load_live(args.collection, args.labels)
+        except Exception as e:
+            print(f"❌ Could not load collection '{args.collection}': {e}")
+            sys.exit(1)
+        source = args.collection
+    if not data['ids']:
+        print(f"❌ No vectors in {source}")
+        sys.exit(1)
+    judged = sum(1 for item in data['labelled'] if item['relevance'])
+    print(f"📚 {len(data['ids'])} vectors from {source}, {len(data['query_vectors'])} queries ({judged} labelled)")
+
+    exact = FlatIndexBackend(data['ids'], data['embeddings'], [""] * len(data['ids']), data['metadatas'])
+    results = []
+    for precision in STORAGE_DTYPES:
+        multipliers = [1] if precision == "float32" else [args.multiplier, 1]
+        for multiplier in multipliers:
+            print(f"   ⏱️  {precision} × {multiplier}")
+            results.append(measure(data, exact, precision, multiplier, args.k, args.repeats))
+    add_deltas(results, args.k)
+    print_table(results, args.k)
+    print(f"\n   Set Config.VECTOR_STORAGE_DTYPE (now '{Config.VECTOR_STORAGE_DTYPE}') and "
+          f"RESCORE_CANDIDATE_MULTIPLIER (now {Config.RESCORE_CANDIDATE_MULTIPLIER})")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "source": source,
+        "vectors": len(data['ids']),
+        "k": args.k,
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark Query Corpus
+HR policy questions shared by the RAG system test, the load test and the
+retrieval benchmarks
+"""
+
+BENCHMARK_QUERIES = [
+    # English queries
+    {
+        'query': 'What is the TA-DA policy for officers?',
+        'language': 'English',
+        'expected_topics': ['TA-DA', 'officer', 'allowance']
+    },
+    {
+        'query': 'What are the salary increment rules for management employees?',
+        'language': 'English',
+        'expected_topics': ['salary', 'increment', 'management']
+    },
+    {
+        'query': 'What is the leave procedure for employees?',
+        'language': 'English',
+        'expected_topics': ['leave', 'procedure', 'employee']
+    },
+    {
+        'query': 'What is the uniform policy for drivers?',
+        'language': 'English',
+        'expected_topics': ['uniform', 'driver', 'policy']
+    },
+    {
+        'query': 'What are the medical bill reimbursement rules?',
+        'language': 'English',
+        'expected_topics': ['medical', 'bill', 'reimbursement']
+    },
+
+    # Bangla queries
+    {
+        'query': 'অফিসারদের জন্য TA-DA নীতি কী?',
+        'language': 'Bangla',
+        'expected_topics': ['TA-DA', 'অফিসার', 'ভাতা']
+    },
+    {
+        'query': 'ব্যবস্থাপনা কর্মীদের জন্য বেতন বৃদ্ধির নিয়ম কী?',
+        'language': 'Bangla',
+        'expected_topics': ['বেতন', 'বৃদ্ধি', 'ব্যবস্থাপনা']
+    },
+    {
+        'query': 'কর্মীদের জন্য ছুটির নিয়ম কী?',
+        'language': 'Bangla',
+        'expected_topics': ['ছুটি', 'নিয়ম', 'কর্মী']
+    }
+]
+
+# Extra phrasings used to build a larger synthetic load-test corpus
+LOAD_TEST_TEMPLATES = [
+    "What is the {topic} policy?",
+    "How does the {topic} rule apply to officers?",
+    "Explain the {topic} procedure for non-management staff",
+    "Who is eligible for {topic}?",
+    "What changed in the latest {topic} circular?"
+]
+
+LOAD_TEST_TOPICS = [
+    "TA-DA", "salary increment", "annual leave", "maternity leave", "driver uniform",
+    "medical bill", "overtime", "festival bonus", "gratuity", "provident fund",
+    "mobile allowance", "fuel allowance", "transfer", "recruitment", "retirement"
+]
+
+
+def load_test_queries() -> list:
+    """Benchmark queries followed by the template x topic expansion"""
+    queries = [item['query'] for item in BENCHMARK_QUERIES]
+    for template in LOAD_TEST_TEMPLATES:
+        for topic in LOAD_TEST_TOPICS:
+            queries.append(template.format(topic=topic))
+    return queries
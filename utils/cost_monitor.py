@@ -6,112 +6,417 @@ Tracks API usage and estimates costs
 
 import json
 import time
+import atexit
+import contextvars
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from config.config import Config
+from utils.metrics import registry
 
-class CostMonitor:
+# Shared metrics
+LLM_REQUESTS = registry.counter("kfg_llm_requests_total", "LLM requests recorded by the cost monitor", ("model",))
+LLM_TOKENS = registry.counter("kfg_llm_tokens_total", "LLM tokens by kind", ("model", "kind"))
+LLM_COST = registry.counter("kfg_llm_cost_usd_total", "Estimated LLM spend in USD", ("model",))
+PENDING_EVENTS = registry.gauge("kfg_usage_pending_events", "Usage events buffered but not yet flushed")
+FLUSH_SECONDS = registry.histogram("kfg_usage_flush_seconds", "Usage log flush latency")
+
+USAGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    day TEXT NOT NULL,
+    month TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    model TEXT,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cached_prompt_tokens INTEGER,
+    estimated INTEGER DEFAULT 0,
+    documents_used INTEGER,
+    context_chars INTEGER
+);
+CREATE TABLE IF NOT EXISTS usage_rollups (
+    period TEXT NOT NULL,
+    period_key TEXT NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, period_key)
+);
+CREATE TABLE IF NOT EXISTS usage_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Columns added to usage_events after the first release of the SQLite log
+EVENT_COLUMNS = {
+    "model": "TEXT",
+    "prompt_tokens": "INTEGER",
+    "completion_tokens": "INTEGER",
+    "cached_prompt_tokens": "INTEGER",
+    "estimated": "INTEGER DEFAULT 0",
+    "documents_used": "INTEGER",
+    "context_chars": "INTEGER"
+}
+
+def extract_token_usage(response):
+    """Read token counts from a chat completion response (dict or SDK object)
+    
+    Returns None when the response carries no usage block. DeepSeek reports
+    context-cache hits as prompt_cache_hit_tokens; OpenAI-style APIs use
+    prompt_tokens_details.cached_tokens.
+    """
+    usage = response.get("usage") if isinstance(response, dict) else getattr(response, "usage", None)
+    if usage is None:
+        return None
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+    
+    prompt_tokens = usage.get("prompt_tokens", 0) or 0
+    completion_tokens = usage.get("completion_tokens", 0) or 0
+    cached = usage.get("prompt_cache_hit_tokens")
+    if cached is None:
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0)
+    
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_prompt_tokens": cached or 0,
+        "total_tokens": usage.get("total_tokens", prompt_tokens + completion_tokens)
+    }
+
+# UsageCapture of the LLM call running in this context (see report_usage)
+_call_usage = contextvars.ContextVar("kfg_call_usage", default=None)
+
+def report_usage(usage):
+    """Hand the usage of the call in progress to the caller's UsageCapture
+    
+    LLM clients call this with the response (or its usage block) instead of
+    keeping it on the shared client, where concurrent requests would read
+    each other's counts. Does nothing outside a capture.
+    """
+    capture = _call_usage.get()
+    if capture is None or not usage:
+        return
+    if isinstance(usage, dict) and {'prompt_tokens', 'completion_tokens'} <= usage.keys():
+        counts = extract_token_usage({"usage": usage})
+    else:
+        counts = extract_token_usage(usage) or extract_token_usage({"usage": usage})
+    capture.usage = counts
+
+class UsageCapture:
+    """Collects the usage reported by one request's LLM calls
+    
+    The capture is set around each call (and each step of a streamed
+    response), so it also works when a stream is advanced from different
+    threads, as the API's thread pool does.
+    """
+    
     def __init__(self):
-        self.usage_file = Path("api_usage.json")
-        self.load_usage()
+        self.usage = None
     
-    def load_usage(self):
-        """Load usage data from file"""
-        if self.usage_file.exists():
+    def run(self, func, *args, **kwargs):
+        token = _call_usage.set(self)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _call_usage.reset(token)
+    
+    def iterate(self, iterable):
+        iterator = self.run(iter, iterable)
+        while True:
+            token = _call_usage.set(self)
             try:
-                with open(self.usage_file, 'r') as f:
-                    self.usage_data = json.load(f)
-            except:
-                self.usage_data = self._init_usage_data()
-        else:
-            self.usage_data = self._init_usage_data()
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _call_usage.reset(token)
+            yield item
+
+def calculate_cost(model, usage):
+    """Cost in USD from token usage and the per-model price table"""
+    pricing = Config.MODEL_PRICING.get(model) or Config.MODEL_PRICING[Config.MODEL_NAME]
+    cached = usage.get("cached_prompt_tokens", 0)
+    uncached = max(usage.get("prompt_tokens", 0) - cached, 0)
+    return (
+        uncached * pricing["input"]
+        + cached * pricing["cached_input"]
+        + usage.get("completion_tokens", 0) * pricing["output"]
+    ) / 1_000_000
+
+class CostMonitor:
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.USAGE_DB_PATH
+        
+        # Pending events are appended in memory and flushed in batches by a background thread
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        
+        self._init_db()
+        
+        self._flusher = threading.Thread(target=self._flush_loop, name="cost-monitor-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+    
+    def _connect(self):
+        """Open a connection (flushes and reads happen on different threads)"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _init_db(self):
+        """Create the usage tables"""
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executescript(USAGE_SCHEMA)
+                existing = {row[1] for row in conn.execute("PRAGMA table_info(usage_events)")}
+                for column, column_type in EVENT_COLUMNS.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE usage_events ADD COLUMN {column} {column_type}")
+        finally:
+            conn.close()
     
     def _init_usage_data(self):
-        """Initialize usage data structure"""
+        """Empty usage summary bucket"""
         return {
-            "total_requests": 0,
-            "total_tokens": 0,
-            "total_cost_usd": 0.0,
-            "daily_usage": {},
-            "monthly_usage": {},
-            "last_reset": datetime.now().isoformat()
+            "requests": 0,
+            "tokens": 0,
+            "cost_usd": 0.0
         }
     
-    def save_usage(self):
-        """Save usage data to file"""
-        with open(self.usage_file, 'w') as f:
-            json.dump(self.usage_data, f, indent=2)
-    
-    def record_request(self, tokens_used, cost_usd=None):
-        """Record an API request"""
-        today = datetime.now().strftime("%Y-%m-%d")
-        month = datetime.now().strftime("%Y-%m")
+    def migrate_legacy_usage(self, usage_file: str = None) -> bool:
+        """Import totals from the old api_usage.json once, then rename it to .json.migrated
         
-        # Update totals
-        self.usage_data["total_requests"] += 1
-        self.usage_data["total_tokens"] += tokens_used
+        An explicit step (python utils/cost_monitor.py --migrate-legacy), so
+        nothing touches a usage file merely by importing or starting the monitor.
+        Returns whether totals were imported.
+        """
+        usage_file = Path(usage_file or Config.LEGACY_USAGE_FILE)
+        if not usage_file.exists():
+            return False
+        try:
+            with open(usage_file, 'r') as f:
+                legacy = json.load(f)
+        except Exception:
+            return False
         
-        # Estimate cost if not provided (DeepSeek pricing: ~$0.002 per 1K tokens)
-        if cost_usd is None:
-            cost_usd = (tokens_used / 1000) * 0.002
+        rows = [("total", "all", legacy.get("total_requests", 0), legacy.get("total_tokens", 0),
+                 legacy.get("total_cost_usd", 0.0))]
+        for day, usage in legacy.get("daily_usage", {}).items():
+            rows.append(("day", day, usage["requests"], usage["tokens"], usage["cost_usd"]))
+        for month, usage in legacy.get("monthly_usage", {}).items():
+            rows.append(("month", month, usage["requests"], usage["tokens"], usage["cost_usd"]))
         
-        self.usage_data["total_cost_usd"] += cost_usd
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                if conn.execute("SELECT 1 FROM usage_meta WHERE key = 'legacy_migrated'").fetchone():
+                    return False
+                self._add_to_rollups(conn, rows)
+                conn.execute("INSERT INTO usage_meta (key, value) VALUES ('legacy_migrated', ?)",
+                             (datetime.now().isoformat(),))
+            usage_file.rename(usage_file.with_suffix(".json.migrated"))
+            return True
+        finally:
+            conn.close()
+    
+    def _add_to_rollups(self, conn, rows):
+        """Incrementally add (period, key, requests, tokens, cost) deltas to the rollups"""
+        conn.executemany(
+            """INSERT INTO usage_rollups (period, period_key, requests, tokens, cost_usd)
+               VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(period, period_key) DO UPDATE SET
+                   requests = requests + excluded.requests,
+                   tokens = tokens + excluded.tokens,
+                   cost_usd = cost_usd + excluded.cost_usd""",
+            rows
+        )
+    
+    def _flush_loop(self):
+        """Background flusher: every COST_FLUSH_INTERVAL seconds or when a batch fills up"""
+        while not self._stopped:
+            self._wake.wait(Config.COST_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️  Cost monitor flush failed: {e}")
+    
+    def flush(self):
+        """Write pending events and their rollup deltas in one transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            
+            # Pre-aggregate the batch so each rollup row is updated once
+            deltas = {}
+            for event in batch:
+                for key in (("total", "all"), ("day", event[1]), ("month", event[2])):
+                    requests, tokens, cost = deltas.get(key, (0, 0, 0.0))
+                    deltas[key] = (requests + 1, tokens + event[3], cost + event[4])
+            
+            conn = self._connect()
+            try:
+                with conn, FLUSH_SECONDS.time():
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.executemany(
+                        "INSERT INTO usage_events (timestamp, day, month, tokens, cost_usd, model, prompt_tokens, "
+                        "completion_tokens, cached_prompt_tokens, estimated, documents_used, context_chars) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        batch
+                    )
+                    self._add_to_rollups(conn, [key + value for key, value in deltas.items()])
+            except Exception:
+                # Keep the events for the next attempt
+                with self._pending_lock:
+                    self._pending = batch + self._pending
+                raise
+            finally:
+                conn.close()
+                PENDING_EVENTS.set(len(self._pending))
+    
+    def close(self):
+        """Stop the flusher and write anything still pending"""
+        self._stopped = True
+        self._wake.set()
+        self.flush()
+    
+    def record_request(self, tokens_used, cost_usd=None, model=None, usage=None,
+                       documents_used=None, context_chars=None, estimated=False):
+        """Record an API request (buffered; no disk I/O on the caller's thread)
         
-        # Update daily usage
-        if today not in self.usage_data["daily_usage"]:
-            self.usage_data["daily_usage"][today] = {
-                "requests": 0,
-                "tokens": 0,
-                "cost_usd": 0.0
-            }
+        usage is the dict from extract_token_usage; when given, tokens and cost
+        come from the API's own counts and the model's price table.
+        """
+        now = datetime.now()
+        model = model or Config.MODEL_NAME
+        usage = usage or {}
         
-        self.usage_data["daily_usage"][today]["requests"] += 1
-        self.usage_data["daily_usage"][today]["tokens"] += tokens_used
-        self.usage_data["daily_usage"][today]["cost_usd"] += cost_usd
+        if usage:
+            tokens_used = usage.get("total_tokens", tokens_used)
+        if cost_usd is None:
+            if usage:
+                cost_usd = calculate_cost(model, usage)
+            else:
+                # No split available: price everything at the input rate
+                cost_usd = calculate_cost(model, {"prompt_tokens": tokens_used})
         
-        # Update monthly usage
-        if month not in self.usage_data["monthly_usage"]:
-            self.usage_data["monthly_usage"][month] = {
-                "requests": 0,
-                "tokens": 0,
-                "cost_usd": 0.0
-            }
+        event = (
+            now.isoformat(), now.strftime("%Y-%m-%d"), now.strftime("%Y-%m"), tokens_used, cost_usd,
+            model, usage.get("prompt_tokens"), usage.get("completion_tokens"),
+            usage.get("cached_prompt_tokens"), int(estimated), documents_used, context_chars
+        )
+        with self._pending_lock:
+            self._pending.append(event)
+            pending = len(self._pending)
         
-        self.usage_data["monthly_usage"][month]["requests"] += 1
-        self.usage_data["monthly_usage"][month]["tokens"] += tokens_used
-        self.usage_data["monthly_usage"][month]["cost_usd"] += cost_usd
+        LLM_REQUESTS.labels(model).inc()
+        LLM_COST.labels(model).inc(cost_usd)
+        if usage:
+            cached = usage.get("cached_prompt_tokens", 0)
+            LLM_TOKENS.labels(model, "prompt").inc(usage.get("prompt_tokens", 0) - cached)
+            LLM_TOKENS.labels(model, "cached_prompt").inc(cached)
+            LLM_TOKENS.labels(model, "completion").inc(usage.get("completion_tokens", 0))
+        else:
+            LLM_TOKENS.labels(model, "unsplit").inc(tokens_used)
+        PENDING_EVENTS.set(pending)
         
-        self.save_usage()
+        if pending >= Config.COST_FLUSH_BATCH_SIZE:
+            self._wake.set()
+    
+    def _read_rollup(self, conn, period, period_key):
+        row = conn.execute(
+            "SELECT requests, tokens, cost_usd FROM usage_rollups WHERE period = ? AND period_key = ?",
+            (period, period_key)
+        ).fetchone()
+        if not row:
+            return self._init_usage_data()
+        return {"requests": row[0], "tokens": row[1], "cost_usd": row[2]}
     
     def get_usage_summary(self):
         """Get current usage summary"""
         today = datetime.now().strftime("%Y-%m-%d")
         month = datetime.now().strftime("%Y-%m")
         
-        today_usage = self.usage_data["daily_usage"].get(today, {
-            "requests": 0,
-            "tokens": 0,
-            "cost_usd": 0.0
-        })
+        self.flush()
+        conn = self._connect()
+        try:
+            return {
+                "total": self._read_rollup(conn, "total", "all"),
+                "today": self._read_rollup(conn, "day", today),
+                "this_month": self._read_rollup(conn, "month", month)
+            }
+        finally:
+            conn.close()
+    
+    def get_cost_breakdown(self, days: int = 30):
+        """Per-model token split and retrieval size for recent requests
         
-        month_usage = self.usage_data["monthly_usage"].get(month, {
-            "requests": 0,
-            "tokens": 0,
-            "cost_usd": 0.0
-        })
+        Used to measure how chunking and context packing change prompt tokens
+        (and cost) per document sent.
+        """
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """SELECT model, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens),
+                          SUM(cached_prompt_tokens), SUM(cost_usd), AVG(documents_used),
+                          AVG(context_chars), SUM(estimated), SUM(documents_used)
+                   FROM usage_events
+                   WHERE day >= date('now', ?)
+                   GROUP BY model""",
+                (f"-{days} days",)
+            ).fetchall()
+        finally:
+            conn.close()
         
-        return {
-            "total": {
-                "requests": self.usage_data["total_requests"],
-                "tokens": self.usage_data["total_tokens"],
-                "cost_usd": self.usage_data["total_cost_usd"]
-            },
-            "today": today_usage,
-            "this_month": month_usage
-        }
+        breakdown = {}
+        for model, requests, prompt, completion, cached, cost, avg_docs, avg_chars, estimated, total_docs in rows:
+            prompt, completion, cached = prompt or 0, completion or 0, cached or 0
+            breakdown[model or "unknown"] = {
+                "requests": requests,
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "cached_prompt_tokens": cached,
+                "cache_hit_rate": cached / prompt if prompt else 0.0,
+                "cost_usd": cost or 0.0,
+                "avg_documents_used": avg_docs or 0.0,
+                "avg_context_chars": avg_chars or 0.0,
+                "avg_prompt_tokens_per_document": prompt / max(total_docs or 0, 1),
+                "estimated_requests": estimated or 0
+            }
+        return breakdown
+    
+    def get_daily_usage(self, days: int = 30):
+        """Daily rollups for the most recent days"""
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT period_key, requests, tokens, cost_usd FROM usage_rollups "
+                "WHERE period = 'day' ORDER BY period_key DESC LIMIT ?",
+                (days,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {day: {"requests": r, "tokens": t, "cost_usd": c} for day, r, t, c in rows}
     
     def print_usage_report(self):
         """Print a formatted usage report"""
@@ -137,36 +442,78 @@ class CostMonitor:
         
         # Cost projections
         if summary['today']['requests'] > 0:
-            avg_tokens_per_request = summary['today']['tokens'] / summary['today']['requests']
-            estimated_monthly_cost = avg_tokens_per_request * 30 * 0.002 / 1000
+            estimated_monthly_cost = summary['today']['cost_usd'] * 30
             print(f"📈 Estimated monthly cost at current usage: ${estimated_monthly_cost:.2f}")
     
     def reset_usage(self):
         """Reset usage data"""
-        self.usage_data = self._init_usage_data()
-        self.save_usage()
+        with self._flush_lock:
+            with self._pending_lock:
+                self._pending = []
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM usage_events")
+                    conn.execute("DELETE FROM usage_rollups")
+            finally:
+                conn.close()
         print("✅ Usage data reset successfully")
 
-# Global cost monitor instance
-cost_monitor = CostMonitor()
+# Cost monitors shared by every caller in the process, keyed by usage database path
+_cost_monitors = {}
+_cost_monitors_lock = threading.Lock()
+
+def get_cost_monitor(db_path: str = None) -> CostMonitor:
+    """Shared monitor for a usage database, created (with its flush thread) on first use"""
+    db_path = db_path or Config.USAGE_DB_PATH
+    with _cost_monitors_lock:
+        if db_path not in _cost_monitors:
+            _cost_monitors[db_path] = CostMonitor(db_path)
+        return _cost_monitors[db_path]
+
+def __getattr__(name):
+    # Old importers use the module-level monitor; it is created on first access
+    if name == "cost_monitor":
+        return get_cost_monitor()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def monitor_api_call(func):
-    """Decorator to monitor API calls"""
+    """Decorator to monitor API calls
+    
+    Token counts come from the response's usage block, or from what the call
+    passed to report_usage(); only if neither exists are they estimated.
+    """
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
+        capture = UsageCapture()
+        result = capture.run(func, *args, **kwargs)
         
-        # Estimate tokens (rough approximation)
-        # This is a simplified estimation - actual token count would come from API response
-        estimated_tokens = len(str(result)) // 4  # Rough estimate: 4 chars per token
+        usage = extract_token_usage(result) or capture.usage
         
-        cost_monitor.record_request(estimated_tokens)
+        if usage:
+            get_cost_monitor().record_request(usage.get("total_tokens", 0), usage=usage,
+                                              model=getattr(args[0], "model", None) if args else None)
+        else:
+            # Rough estimate: 4 chars per token
+            get_cost_monitor().record_request(len(str(result)) // 4, estimated=True)
         
         return result
     return wrapper
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="KFG chatbot API usage and cost report")
+    parser.add_argument("--migrate-legacy", nargs="?", const=Config.LEGACY_USAGE_FILE, metavar="PATH",
+                        help=f"Import totals from a legacy usage JSON file (default: {Config.LEGACY_USAGE_FILE})")
+    args = parser.parse_args()
+    
+    cost_monitor = get_cost_monitor()
+    if args.migrate_legacy:
+        if cost_monitor.migrate_legacy_usage(args.migrate_legacy):
+            print(f"✅ Imported legacy usage from {args.migrate_legacy}")
+        else:
+            print(f"ℹ️  Nothing imported from {args.migrate_legacy} (missing, unreadable or already migrated)")
+    
     # Print usage report
     cost_monitor.print_usage_report()
     
@@ -188,4 +535,4 @@ if __name__ == "__main__":
         elif choice == "3":
             break
         else:
-            print("Invalid choice. Please enter 1, 2, or 3.") 
\ No newline at end of file
+            print("Invalid choice. Please enter 1, 2, or 3.")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Fake DeepSeek Server
+Local OpenAI-compatible /chat/completions stub with configurable latency and
+token rate, so load tests run fully offline and without API cost
+"""
+
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER_WORDS = (
+    "According to the KFG policy the entitlement depends on job group and service length "
+    "and claims must be approved by the reporting manager before submission to HR"
+).split()
+
+
+class FakeLLMSettings:
+    """Timing model: time_to_first_token + completion_tokens / tokens_per_second"""
+
+    def __init__(self, time_to_first_token: float = 0.4, tokens_per_second: float = 60.0,
+                 completion_tokens: int = 150, cache_hit_ratio: float = 0.0):
+        self.time_to_first_token = time_to_first_token
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.cache_hit_ratio = cache_hit_ratio
+
+
+def _usage(settings: FakeLLMSettings, messages: list) -> dict:
+    # Rough estimate: 4 chars per token
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4 + 1
+    cached = int(prompt_tokens * settings.cache_hit_ratio)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": settings.completion_tokens,
+        "total_tokens": prompt_tokens + settings.completion_tokens,
+        "prompt_cache_hit_tokens": cached,
+        "prompt_cache_miss_tokens": prompt_tokens - cached
+    }
+
+
+def _token(i: int) -> str:
+    return FILLER_WORDS[i % len(FILLER_WORDS)] + " "
+
+
+class _FakeDeepSeekHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    settings: FakeLLMSettings = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "deepseek-chat", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        settings = self.settings
+        usage = _usage(settings, request.get("messages", []))
+        model = request.get("model", "deepseek-chat")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        per_token = 1.0 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0.0
+
+        time.sleep(settings.time_to_first_token)
+
+        if not request.get("stream"):
+            time.sleep(per_token * settings.completion_tokens)
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {
+                        "role": "assistant",
+                        "content": "".join(_token(i) for i in range(settings.completion_tokens)).strip()
+                    },
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send_chunk(delta: dict, finish_reason=None, include_usage=False):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            if include_usage:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            send_chunk({"role": "assistant", "content": ""})
+            for i in range(settings.completion_tokens):
+                send_chunk({"content": _token(i)})
+                if per_token:
+                    time.sleep(per_token)
+            send_chunk({}, finish_reason="stop", include_usage=True)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_fake_server(host: str = "127.0.0.1", port: int = 0, settings: FakeLLMSettings = None):
+    """Start the stub in a daemon thread; returns (server, base_url)"""
+    handler = type("FakeDeepSeekHandler", (_FakeDeepSeekHandler,), {"settings": settings or FakeLLMSettings()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-deepseek", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake DeepSeek API for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--ttft", type=float, default=0.4, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--cache-hit-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+
+    settings = FakeLLMSettings(args.ttft, args.tokens_per_second, args.completion_tokens, args.cache_hit_ratio)
+    server, base_url = start_fake_server(args.host, args.port, settings)
+    print(f"🤖 Fake DeepSeek API at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
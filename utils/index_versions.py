@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Index Versions
+Show which versioned collection the collection alias points at, roll back to
+the previous version, or start a blue/green rebuild. Running chatbots follow
+the alias within Config.ALIAS_CHECK_INTERVAL seconds, switching to the
+embedding model each version was built with.
+"""
+
+import os
+import sys
+import argparse
+
+import chromadb
+from chromadb.config import Settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.collection_alias import get_collection_alias
+from rag_engine.vector_store.collections import embedding_model_of
+
+
+def list_versions(client, alias) -> None:
+    state = alias.read()
+    print(f"🔗 Alias '{alias.alias}' → '{alias.active()}'")
+    if state:
+        print(f"   Previous: {state.get('previous') or '-'}")
+        print(f"   Updated:  {state.get('updated_at')}")
+    print("\n📚 Collections:")
+    for collection in client.list_collections():
+        if collection.name == alias.alias or collection.name.startswith(f"{alias.alias}__"):
+            marker = "active" if collection.name == alias.active() else (
+                "previous" if collection.name == alias.previous() else "")
+            print(f"   {collection.name:<48}{collection.count():>8} chunks  {marker:<9}"
+                  f"{embedding_model_of(collection.metadata)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and switch vector index versions")
+    parser.add_argument("--rollback", action="store_true", help="Serve the previous version again")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild into a new version and swap to it")
+    parser.add_argument("--embedding-model", help="Model for the rebuilt version (default: the active version's)")
+    parser.add_argument("--multilingual", action="store_true",
+                        help="Rebuild with Config.MULTILINGUAL_EMBEDDING_MODEL (English + Bangla queries)")
+    args = parser.parse_args()
+
+    print("🗂️  Index Versions")
+    print("=" * 50)
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+    alias = get_collection_alias()
+
+    if args.rollback:
+        previous = alias.previous()
+        if not previous:
+            print("❌ No previous version to roll back to")
+            sys.exit(1)
+        try:
+            client.get_collection(name=previous)
+        except Exception:
+            print(f"❌ Previous version '{previous}' no longer exists")
+            sys.exit(1)
+        alias.rollback()
+        print(f"✅ Rolled back to '{previous}'\n")
+
+    if args.rebuild:
+        from rag_engine.vector_store.vector_store import VectorStore
+        model = Config.MULTILINGUAL_EMBEDDING_MODEL if args.multilingual else args.embedding_model
+        added = VectorStore().rebuild_index(embedding_model=model)
+        if not added:
+            print("❌ Rebuild failed; the active version is unchanged")
+            sys.exit(1)
+        print(f"✅ Rebuilt with {len(added)} documents\n")
+
+    list_versions(client, alias)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Request Latency Tracer
+Per-stage span timing for chat requests, rolling p50/p95/p99 histograms and an
+optional OpenTelemetry-compatible (OTLP/JSON lines) file exporter
+"""
+
+import os
+import sys
+import json
+import math
+import logging
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Trace of the request being handled on the current thread / task
+_current_trace = contextvars.ContextVar("kfg_current_trace", default=None)
+
+
+class RequestTrace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.name = name
+        self.trace_id = os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self.end_ns = None
+        self.duration_ms = None
+        self.spans: List[Dict[str, Any]] = []
+
+    def add_span(self, name: str, start_ns: int, duration_ms: float, attributes: Dict[str, Any] = None):
+        """Record a finished span (time.time_ns start, duration in milliseconds)"""
+        self.spans.append({
+            "name": name,
+            "span_id": os.urandom(8).hex(),
+            "start_ns": start_ns,
+            "duration_ms": duration_ms,
+            "attributes": attributes or {}
+        })
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.end_ns = self.start_ns + int(self.duration_ms * 1e6)
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per stage (repeated stages are summed) plus the request total"""
+        timings: Dict[str, float] = {}
+        for span in self.spans:
+            timings[span["name"]] = round(timings.get(span["name"], 0.0) + span["duration_ms"], 3)
+        if self.duration_ms is not None:
+            timings["total"] = round(self.duration_ms, 3)
+        return timings
+
+
+class OTLPFileExporter:
+    """Appends finished traces as OTLP/JSON `resourceSpans` documents, one per line"""
+
+    def __init__(self, path: str, service_name: str = "kfg-hr-bot"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        encoded = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                encoded.append({"key": key, "value": {"boolValue": value}})
+            elif isinstance(value, int):
+                encoded.append({"key": key, "value": {"intValue": str(value)}})
+            elif isinstance(value, float):
+                encoded.append({"key": key, "value": {"doubleValue": value}})
+            else:
+                encoded.append({"key": key, "value": {"stringValue": str(value)}})
+        return encoded
+
+    def export(self, trace: RequestTrace):
+        spans = [{
+            "traceId": trace.trace_id,
+            "spanId": trace.span_id,
+            "name": trace.name,
+            "kind": 2,  # SPAN_KIND_SERVER
+            "startTimeUnixNano": str(trace.start_ns),
+            "endTimeUnixNano": str(trace.end_ns),
+            "attributes": self._attributes(trace.attributes)
+        }]
+        for span in trace.spans:
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": span["span_id"],
+                "parentSpanId": trace.span_id,
+                "name": span["name"],
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span["start_ns"]),
+                "endTimeUnixNano": str(span["start_ns"] + int(span["duration_ms"] * 1e6)),
+                "attributes": self._attributes(span["attributes"])
+            })
+
+        document = {
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "kfg.latency_tracer"}, "spans": spans}]
+            }]
+        }
+        line = json.dumps(document, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class LatencyTracer:
+    """Collects request traces and keeps a rolling latency window per stage"""
+
+    def __init__(self, window_size: int = None, export_path: str = None):
+        self.window_size = window_size or Config.LATENCY_WINDOW_SIZE
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+        export_path = export_path or Config.TRACE_EXPORT_PATH
+        self.exporter = OTLPFileExporter(export_path) if export_path else None
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Start a request trace and make it current for span() calls on this thread/task"""
+        trace = RequestTrace(name, attributes)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+            trace.finish()
+            self.record(trace)
+
+    @contextmanager
+    def activate(self, trace: RequestTrace):
+        """Make an existing trace current for a block (for requests spanning several calls, e.g. streams)"""
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            _current_trace.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a stage of the current request (no-op outside a trace)"""
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        try:
+            yield attributes
+        finally:
+            trace.add_span(name, start_ns, (time.perf_counter() - start) * 1000, attributes)
+
+    @staticmethod
+    def current_trace() -> Optional[RequestTrace]:
+        return _current_trace.get()
+
+    def record(self, trace: RequestTrace):
+        """Add a finished trace to the histograms and export it"""
+        with self._lock:
+            for stage, value in trace.timings().items():
+                samples = self._samples.get(stage)
+                if samples is None:
+                    samples = self._samples[stage] = deque(maxlen=self.window_size)
+                samples.append(value)
+
+        if self.exporter is not None:
+            try:
+                self.exporter.export(trace)
+            except OSError as e:
+                logger.warning(f"Could not export trace: {e}")
+
+    def get_percentiles(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 (ms) per stage over the rolling window"""
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+
+        stats = {}
+        for stage, values in snapshot.items():
+            if not values:
+                continue
+            stats[stage] = {
+                "count": len(values),
+                "mean": sum(values) / len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": values[-1]
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def print_latency_report(self):
+        """Print a formatted per-stage latency report"""
+        stats = self.get_percentiles()
+        print("⏱️  Chat Latency Report (ms)")
+        print("=" * 70)
+        print(f"{'stage':<20}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        for stage, s in sorted(stats.items(), key=lambda item: -item[1]["p50"]):
+            print(f"{stage:<20}{s['count']:>8}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}{s['max']:>10.1f}")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+# Global tracer instance
+latency_tracer = LatencyTracer()
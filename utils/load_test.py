@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+KFG Chatbot Load Test
+Drives KFGChatbot.chat with N concurrent synthetic users against a local fake
+DeepSeek server and reports throughput, latency percentiles and per-stage
+breakdowns. Results are written as a regression JSON that can be compared
+between releases.
+
+Runs offline: every data path (Chroma, catalog, prompt and text stores, flat
+index and change markers, usage log) points into a scratch directory seeded
+with a small fixture corpus, and the embedding model must already be in the
+local Hugging Face cache. The DeepSeek client module the chatbot imports
+(models/llm/deepseek_client.py) is not part of this tree and nothing reads
+Config.DEEPSEEK_BASE_URL, so the script replaces chatbot.deepseek_client with
+StubLLMClient, which only talks to the local stub.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import itertools
+import threading
+import subprocess
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from utils.benchmark_queries import load_test_queries, LOAD_TEST_TOPICS
+from utils.fake_deepseek_server import FakeLLMSettings, start_fake_server
+from utils.latency_tracer import percentile
+
+RESULTS_VERSION = 1
+
+
+def configure_offline(base_url: str, work_dir: str, custom_prompts: bool):
+    """Point the chatbot at the stub and every data path at work_dir"""
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    Config.DEEPSEEK_BASE_URL = base_url
+    Config.DEEPSEEK_API_KEY = Config.DEEPSEEK_API_KEY or "offline-load-test"
+    Config.TRACE_EXPORT_PATH = None
+    Config.ENABLE_CUSTOM_PROMPT_FASTPATH = custom_prompts
+
+    # Nothing may read or write the real corpus, indexes or usage log
+    Config.CHROMA_DB_PATH = os.path.join(work_dir, "chroma_db")
+    Config.COLLECTION_ALIAS_PATH = os.path.join(Config.CHROMA_DB_PATH, "collection_alias.json")
+    Config.FLAT_INDEX_PATH = os.path.join(work_dir, "vector_index")
+    Config.ORGANIZED_PATH = os.path.join(work_dir, "organized")
+    Config.METADATA_PATH = os.path.join(work_dir, "metadata")
+    Config.CATALOG_DB_PATH = os.path.join(work_dir, "catalog.db")
+    Config.TEXT_STORE_PATH = os.path.join(work_dir, "text_store")
+    Config.PROMPT_STORE_PATH = os.path.join(work_dir, "custom_prompts.db")
+    Config.USAGE_DB_PATH = os.path.join(work_dir, "load_test_usage.db")
+    Config.LEGACY_USAGE_FILE = os.path.join(work_dir, "api_usage.json")
+
+
+def seed_fixture_corpus(work_dir: str) -> int:
+    """Write one organized policy file (with metadata) per load-test topic"""
+    organized_dir = os.path.join(work_dir, "organized")
+    metadata_dir = os.path.join(work_dir, "metadata")
+    os.makedirs(organized_dir, exist_ok=True)
+    os.makedirs(metadata_dir, exist_ok=True)
+
+    for topic in LOAD_TEST_TOPICS:
+        document_id = "load_test_" + topic.lower().replace(" ", "_").replace("-", "_")
+        text = (
+            f"KFG {topic} policy\n\n"
+            f"This policy sets out the {topic} entitlement for all KFG employees. "
+            f"Eligibility depends on job group and length of service. "
+            f"Claims for {topic} must be approved by the reporting manager and submitted to HR "
+            f"within 30 days with the supporting documents.\n"
+        )
+        with open(os.path.join(organized_dir, f"{document_id}_organized.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        metadata = {
+            "filename": f"{document_id}.txt",
+            "category": "hr_policies",
+            "document_type": "policy",
+            "word_count": len(text.split()),
+            "char_count": len(text)
+        }
+        with open(os.path.join(metadata_dir, f"{document_id}_metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+    return len(LOAD_TEST_TOPICS)
+
+
+class StubLLMClient:
+    """Minimal chat client for the fake DeepSeek server (stands in for DeepSeekClient)"""
+
+    def __init__(self, base_url: str, model: str = None, timeout: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model or Config.MODEL_NAME
+        self.timeout = timeout
+
+    def _post(self, payload: dict) -> dict:
+        request = urllib.request.Request(
+            f"{self.base_url}/chat/completions", data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def chat_with_rag(self, query: str, context_documents: list, chat_history: list = None) -> dict:
+        context = "\n\n".join(doc.get("document", "") for doc in context_documents)
+        messages = [{"role": "system", "content": f"Answer from these KFG policies:\n{context}"}]
+        messages.extend(chat_history or [])
+        messages.append({"role": "user", "content": query})
+        # The chatbot reads the text and the usage block from the completion
+        return self._post({"model": self.model, "messages": messages})
+
+    def get_cost_estimate(self, query: str, context_documents: list) -> dict:
+        # Rough estimate: 4 chars per token
+        context_chars = sum(len(doc.get("document", "")) for doc in context_documents)
+        return {"estimated_input_tokens": (len(query) + context_chars) // 4, "model": self.model}
+
+    def test_connection(self) -> bool:
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/models", timeout=self.timeout):
+                return True
+        except OSError:
+            return False
+
+
+def latency_summary(values: list) -> dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1]
+    }
+
+
+def run_load(chatbot, queries: list, users: int, total_requests: int) -> dict:
+    """Run total_requests chats spread over `users` concurrent workers"""
+    query_cycle = itertools.cycle(queries)
+    lock = threading.Lock()
+    remaining = [total_requests]
+    records = []
+
+    def user_loop():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+                query = next(query_cycle)
+            start = time.perf_counter()
+            result = chatbot.chat(query)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                records.append({
+                    "latency_ms": elapsed,
+                    "error": bool(result.get("error")),
+                    "path": "custom_prompt" if result.get("custom_prompt") else "retrieval",
+                    "timings": result.get("timings", {})
+                })
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        for _ in range(users):
+            pool.submit(user_loop)
+    wall_time = time.perf_counter() - start
+
+    stages = {}
+    for record in records:
+        for stage, value in record["timings"].items():
+            stages.setdefault(stage, []).append(value)
+
+    by_path = {}
+    for record in records:
+        by_path.setdefault(record["path"], []).append(record["latency_ms"])
+
+    errors = sum(1 for record in records if record["error"])
+    return {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": errors / max(len(records), 1),
+        "wall_time_s": wall_time,
+        "throughput_rps": len(records) / wall_time if wall_time else 0.0,
+        "latency_ms": latency_summary([record["latency_ms"] for record in records]),
+        "latency_by_path_ms": {path: latency_summary(values) for path, values in by_path.items()},
+        "stages_ms": {stage: latency_summary(values) for stage, values in stages.items()}
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions beyond `tolerance` (fraction) in throughput and latency percentiles"""
+    regressions = []
+    cur, base = current["results"], baseline["results"]
+
+    if base["throughput_rps"] and cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {base['throughput_rps']:.2f} -> {cur['throughput_rps']:.2f} req/s"
+        )
+
+    checks = [("latency", cur["latency_ms"], base["latency_ms"])]
+    for stage, stats in base.get("stages_ms", {}).items():
+        if stage in cur.get("stages_ms", {}):
+            checks.append((f"stage {stage}", cur["stages_ms"][stage], stats))
+
+    for name, cur_stats, base_stats in checks:
+        for key in ("p50", "p95", "p99"):
+            before, after = base_stats.get(key), cur_stats.get(key)
+            # Ignore sub-millisecond noise
+            if before and after and after > before * (1 + tolerance) and after - before > 1.0:
+                regressions.append(f"{name} {key} {before:.1f} -> {after:.1f} ms")
+    return regressions
+
+
+def print_report(results: dict):
+    latency = results["latency_ms"]
+    print(f"\n📊 {results['requests']} requests in {results['wall_time_s']:.1f}s "
+          f"→ {results['throughput_rps']:.2f} req/s, errors {results['error_rate']:.1%}")
+    print(f"   latency p50 {latency.get('p50', 0):.0f} ms   p95 {latency.get('p95', 0):.0f} ms   "
+          f"p99 {latency.get('p99', 0):.0f} ms   max {latency.get('max', 0):.0f} ms")
+
+    for path, stats in results["latency_by_path_ms"].items():
+        print(f"   {path:<14} n={stats['count']:<6} p50 {stats['p50']:.0f} ms   p95 {stats['p95']:.0f} ms")
+
+    print("\n⏱️  Stage breakdown (ms)")
+    print(f"   {'stage':<16}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, stats in sorted(results["stages_ms"].items(), key=lambda item: -item[1]["p50"]):
+        print(f"   {stage:<16}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the KFG chatbot")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent synthetic users")
+    parser.add_argument("--requests", type=int, default=200, help="Total chat requests")
+    parser.add_argument("--ttft", type=float, default=0.4, help="Fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--completion-tokens", type=int, default=150)
+    parser.add_argument("--custom-prompts", action="store_true",
+                        help="Keep the custom prompt fast path on (off by default to load retrieval + LLM)")
+    parser.add_argument("--output", default="load_test_results.json", help="Regression JSON to write")
+    parser.add_argument("--compare", help="Baseline regression JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression (fraction)")
+    args = parser.parse_args()
+
+    print("🏋️  KFG Chatbot Load Test")
+    print("=" * 50)
+
+    settings = FakeLLMSettings(args.ttft, args.tokens_per_second, args.completion_tokens)
+    server, base_url = start_fake_server(settings=settings)
+    print(f"🤖 Fake DeepSeek API at {base_url}")
+
+    work_dir = tempfile.mkdtemp(prefix="kfg_load_test_")
+    configure_offline(base_url, work_dir, args.custom_prompts)
+    print(f"📁 Scratch data in {work_dir} ({seed_fixture_corpus(work_dir)} fixture documents)")
+
+    # Imported after configuration so module-level singletons pick up the overrides
+    from ui.terminal.chatbot import KFGChatbot
+    from utils.latency_tracer import latency_tracer
+
+    chatbot = KFGChatbot()
+    chatbot.deepseek_client = StubLLMClient(base_url)
+    chatbot.process_and_index_documents()
+    queries = load_test_queries()
+    chatbot.chat(queries[0])  # warm up model and connections
+    latency_tracer.reset()
+
+    print(f"👥 {args.users} users, {args.requests} requests, {len(queries)} distinct queries")
+    results = run_load(chatbot, queries, args.users, args.requests)
+    server.shutdown()
+    print_report(results)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "config": {
+            "users": args.users,
+            "requests": args.requests,
+            "fake_llm": vars(settings),
+            "custom_prompts": args.custom_prompts,
+            "embedding_model": Config.EMBEDDING_MODEL,
+            "max_documents_per_query": Config.MAX_DOCUMENTS_PER_QUERY
+        },
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.tolerance)
+        print(f"\n🔁 Compared with {args.compare} ({baseline.get('git_revision', '?')})")
+        if regressions:
+            for regression in regressions:
+                print(f"   ❌ {regression}")
+            sys.exit(1)
+        print("   ✅ No regressions beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
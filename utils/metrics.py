@@ -0,0 +1,336 @@
+"""
+Metrics Registry
+Counters, gauges and histograms shared by the vector store, chatbot and cost
+monitor, exposed in Prometheus text format on a small local HTTP endpoint
+"""
+
+import os
+import sys
+import time
+import bisect
+import logging
+import weakref
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Any, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (embedding and Chroma queries sit at the low end, LLM calls at the top)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _ThreadCells:
+    """One value cell per thread; only the owning thread writes its cell
+
+    The hot path (inc/observe) touches a thread-local list without taking a
+    lock; the lock is taken once per thread when its cell is created and when
+    a scrape sums the cells. Cells of threads that have exited are folded into
+    a base cell then, so short-lived threads (Streamlit reruns, server thread
+    pools) do not grow the cell list.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._base = factory()
+        self._cells: List[Tuple[Any, list]] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> list:
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._factory()
+            with self._lock:
+                self._fold_dead()
+                self._cells.append((weakref.ref(threading.current_thread()), cell))
+            self._local.cell = cell
+        return cell
+
+    def _fold_dead(self):
+        """Add the cells of exited threads into the base cell (caller holds the lock)"""
+        live = []
+        for thread_ref, cell in self._cells:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                live.append((thread_ref, cell))
+            else:
+                for i, value in enumerate(cell):
+                    self._base[i] += value
+        self._cells = live
+
+    def all(self) -> List[list]:
+        with self._lock:
+            self._fold_dead()
+            return [self._base] + [cell for _, cell in self._cells]
+
+    def clear(self):
+        with self._lock:
+            self._base = self._factory()
+            for _, cell in self._cells:
+                cell[:] = self._factory()
+
+
+class _CounterChild:
+    def __init__(self):
+        self._cells = _ThreadCells(lambda: [0.0])
+
+    def inc(self, amount: float = 1.0):
+        self._cells.get()[0] += amount
+
+    def value(self) -> float:
+        return sum(cell[0] for cell in self._cells.all())
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # Cell layout: [count per bucket..., +Inf count, sum]
+        self._cells = _ThreadCells(lambda: [0] * (len(buckets) + 1) + [0.0])
+
+    def observe(self, value: float):
+        cell = self._cells.get()
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of the block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def value(self) -> Dict[str, Any]:
+        totals = [0] * (len(self.buckets) + 1)
+        total_sum = 0.0
+        for cell in self._cells.all():
+            for i in range(len(totals)):
+                totals[i] += cell[i]
+            total_sum += cell[-1]
+
+        cumulative, running = [], 0
+        for count in totals:
+            running += count
+            cumulative.append(running)
+        return {
+            "buckets": list(zip(list(self.buckets) + [float("inf")], cumulative)),
+            "count": running,
+            "sum": total_sum
+        }
+
+
+class Metric:
+    """A named metric family; label values select a child series"""
+
+    def __init__(self, kind: str, name: str, documentation: str,
+                 labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._child(())
+
+    def _new_child(self):
+        if self.kind == "counter":
+            return _CounterChild()
+        if self.kind == "gauge":
+            return _GaugeChild()
+        return _HistogramChild(self._buckets)
+
+    def _child(self, key: Tuple[str, ...]):
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def labels(self, *values, **kwargs):
+        """Child series for the given label values"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return self._child(values)
+
+    # Unlabelled shortcuts
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def value(self):
+        return self._default.value()
+
+    def samples(self) -> List[Tuple[Dict[str, str], Any]]:
+        """(labels, value) for every child series"""
+        with self._lock:
+            children = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child.value()) for key, child in children]
+
+    def reset(self):
+        with self._lock:
+            children = list(self._children.values())
+        for child in children:
+            if isinstance(child, _GaugeChild):
+                child.set(0)
+            else:
+                child._cells.clear()
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(10), " ").replace(chr(34), chr(92) + chr(34))}"'
+        for key, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """Get-or-create registry of metric families"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, kind: str, name: str, documentation: str, labelnames=(), **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Metric(kind, name, documentation, tuple(labelnames), **kwargs)
+            elif metric.kind != kind:
+                raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Metric:
+        return self._register("counter", name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Metric:
+        return self._register("gauge", name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Metric:
+        return self._register("histogram", name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Metric:
+        return self._metrics.get(name)
+
+    def collect(self) -> List[Metric]:
+        with self._lock:
+            return sorted(self._metrics.values(), key=lambda m: m.name)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.samples():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for bound, count in value["buckets"]:
+                    bucket_labels = dict(labels, le=_format_value(bound))
+                    lines.append(f"{metric.name}_bucket{_format_labels(bucket_labels)} {count}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Current values as plain data (for the admin panel)"""
+        snapshot = {}
+        for metric in self.collect():
+            series = []
+            for labels, value in metric.samples():
+                if metric.kind == "histogram":
+                    value = {
+                        "count": value["count"],
+                        "sum": value["sum"],
+                        "mean": value["sum"] / value["count"] if value["count"] else 0.0
+                    }
+                series.append({"labels": labels, "value": value})
+            snapshot[metric.name] = series
+        return snapshot
+
+
+# Global registry shared by every component in the process
+registry = MetricsRegistry()
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int = None, host: str = None) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (once per process)"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            port = Config.METRICS_PORT if port is None else port
+            host = host or Config.METRICS_HOST
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Metrics endpoint listening on http://{host}:{_server.server_address[1]}/metrics")
+        return _server
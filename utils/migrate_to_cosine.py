@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Migrate Vector Collection to Cosine Space
+Copies ids, stored embeddings, documents and metadata from the legacy L2
+collection into the cosine-space collection without re-embedding anything.
+VectorStore runs the same copy at startup when the serving collection is
+empty (Config.AUTO_MIGRATE_LEGACY_COLLECTION); use this to migrate into
+another target, or to drop the source afterwards.
+"""
+
+import os
+import sys
+import argparse
+
+import chromadb
+from chromadb.config import Settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.collections import open_collection, copy_collection
+from rag_engine.vector_store.collection_alias import get_collection_alias
+
+
+def migrate(source_name: str, target_name: str, batch_size: int = 500, drop_source: bool = False) -> dict:
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+
+    source = client.get_collection(name=source_name)
+    source_count = source.count()
+
+    target = open_collection(client, target_name, migrated_from=source_name)
+    space = (target.metadata or {}).get("hnsw:space", "l2")
+    if space != "cosine":
+        raise ValueError(f"Target collection '{target_name}' exists with '{space}' space")
+
+    print(f"📦 Copying {source_count} chunks: '{source_name}' → '{target_name}'")
+    copied = copy_collection(
+        source, target, batch_size, normalize=True,
+        progress=lambda done, total: print(f"   {done}/{total}")
+    )
+
+    target_count = target.count()
+    verified = target_count >= source_count
+    print(f"{'✅' if verified else '❌'} Target now holds {target_count} chunks")
+
+    if drop_source and verified:
+        client.delete_collection(name=source_name)
+        print(f"🗑️  Dropped '{source_name}'")
+
+    return {"copied": copied, "source_count": source_count, "target_count": target_count, "verified": verified}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the legacy L2 collection into the cosine-space collection")
+    parser.add_argument("--source", default=Config.LEGACY_COLLECTION_NAME)
+    parser.add_argument("--target", default=get_collection_alias().active(), help="Default: active version")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--drop-source", action="store_true", help="Delete the source after a verified copy")
+    args = parser.parse_args()
+
+    print("🔁 Cosine Collection Migration")
+    print("=" * 50)
+    try:
+        result = migrate(args.source, args.target, args.batch_size, args.drop_source)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+    if not result["verified"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Retrieval Quality and Speed Benchmark
+Scores retrieval configurations on a labelled query set derived from the
+benchmark queries' expected topics: recall@k, MRR, nDCG@k and per-query latency.
+
+Configurations:
+  chroma            - the production VectorStore.search path
+  vector-single     - one embedding per document (what is indexed today)
+  vector-chunked    - word-window chunks, document score = best chunk
+  hybrid-*          - BM25 and vector rankings merged with reciprocal rank fusion
+  *+rerank          - top candidates re-scored with a cross-encoder
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.bm25 import BM25Index, reciprocal_rank_fusion
+from utils.retrieval_eval import load_corpus, label_queries, evaluate, quality_regressions
+
+
+def chunk_words(text: str, size: int, overlap: int) -> List[str]:
+    """Overlapping word windows"""
+    words = text.split()
+    if len(words) <= size:
+        return [text]
+    step = max(size - overlap, 1)
+    return [" ".join(words[i:i + size]) for i in range(0, len(words) - overlap, step)]
+
+
+class InMemoryRetrievers:
+    """Brute-force retrievers over one embedding pass of the corpus"""
+
+    def __init__(self, corpus: Dict[str, str], model, chunk_size: int, chunk_overlap: int,
+                 reranker=None, rerank_candidates: int = 20):
+        self.model = model
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.doc_ids = list(corpus)
+        self.texts = [corpus[doc_id] for doc_id in self.doc_ids]
+
+        print(f"🧮 Embedding {len(self.doc_ids)} documents...")
+        self.doc_vectors = self._encode(self.texts)
+
+        self.chunk_texts, chunk_owner = [], []
+        for index, text in enumerate(self.texts):
+            for chunk in chunk_words(text, chunk_size, chunk_overlap):
+                self.chunk_texts.append(chunk)
+                chunk_owner.append(index)
+        self.chunk_owner = np.asarray(chunk_owner)
+        print(f"🧮 Embedding {len(self.chunk_texts)} chunks ({chunk_size} words, {chunk_overlap} overlap)...")
+        self.chunk_vectors = self._encode(self.chunk_texts)
+
+        self.bm25 = BM25Index(corpus)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(texts, batch_size=32, normalize_embeddings=True, show_progress_bar=False),
+            dtype=np.float32
+        )
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        return self._encode([query])[0]
+
+    def _rank(self, scores: np.ndarray, n: int) -> List[str]:
+        n = min(n, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n]
+        return [self.doc_ids[i] for i in top[np.argsort(-scores[top])]]
+
+    def vector_single(self, query: str, n: int) -> List[str]:
+        return self._rank(self.doc_vectors @ self._query_vector(query), n)
+
+    def vector_chunked(self, query: str, n: int) -> List[str]:
+        chunk_scores = self.chunk_vectors @ self._query_vector(query)
+        doc_scores = np.full(len(self.doc_ids), -np.inf, dtype=np.float32)
+        np.maximum.at(doc_scores, self.chunk_owner, chunk_scores)
+        return self._rank(doc_scores, n)
+
+    def hybrid(self, vector_fn):
+        def search(query: str, n: int) -> List[str]:
+            depth = max(n, self.rerank_candidates)
+            keyword = [doc_id for doc_id, _ in self.bm25.search(query, depth)]
+            return reciprocal_rank_fusion([vector_fn(query, depth), keyword])[:n]
+        return search
+
+    def reranked(self, base_fn):
+        def search(query: str, n: int) -> List[str]:
+            candidates = base_fn(query, max(n, self.rerank_candidates))
+            if not candidates:
+                return []
+            position = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+            pairs = [(query, self.texts[position[doc_id]][:2000]) for doc_id in candidates]
+            scores = self.reranker.predict(pairs, show_progress_bar=False)
+            order = np.argsort(-np.asarray(scores))
+            return [candidates[i] for i in order[:n]]
+        return search
+
+
+def chroma_search_fn():
+    from rag_engine.vector_store.vector_store import VectorStore
+    vector_store = VectorStore()
+    if vector_store.collection.count() == 0:
+        raise RuntimeError("vector collection is empty")
+
+    def search(query: str, n: int) -> List[str]:
+        results = vector_store.search(query, n, collapse_duplicates=False)
+        return [result['metadata'].get('document_id') for result in results]
+    return search
+
+
+def print_table(results: Dict[str, Dict], k: int):
+    print(f"\n{'config':<26}{'recall@' + str(k):>10}{'MRR':>8}{'nDCG@' + str(k):>9}{'p50 ms':>9}{'p95 ms':>9}")
+    print("-" * 71)
+    for name, metrics in results.items():
+        print(f"{name:<26}{metrics[f'recall@{k}']:>10.3f}{metrics['mrr']:>8.3f}{metrics[f'ndcg@{k}']:>9.3f}"
+              f"{metrics['latency_p50_ms']:>9.1f}{metrics['latency_p95_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval quality and latency")
+    parser.add_argument("--k", type=int, default=Config.MAX_DOCUMENTS_PER_QUERY)
+    parser.add_argument("--chunk-size", type=int, default=200, help="Words per chunk for chunked configs")
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--rerank-model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--rerank-candidates", type=int, default=20)
+    parser.add_argument("--no-rerank", action="store_true")
+    parser.add_argument("--no-chroma", action="store_true", help="Skip the production Chroma path")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per query")
+    parser.add_argument("--labels-out", help="Write the derived labelled set to this JSON file")
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    parser.add_argument("--compare", help="Baseline benchmark JSON; exit 1 if quality drops")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Allowed absolute metric drop")
+    args = parser.parse_args()
+
+    print("🎯 Retrieval Benchmark")
+    print("=" * 50)
+
+    corpus = load_corpus()
+    if not corpus:
+        print(f"❌ No organized documents found in {Config.ORGANIZED_PATH}")
+        sys.exit(1)
+    labelled = label_queries(corpus)
+    judged = sum(1 for item in labelled if item['relevance'])
+    print(f"📚 {len(corpus)} documents, {len(labelled)} queries ({judged} with relevant documents)")
+    if args.labels_out:
+        with open(args.labels_out, "w", encoding="utf-8") as f:
+            json.dump(labelled, f, indent=2, ensure_ascii=False)
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(Config.EMBEDDING_MODEL)
+
+    reranker = None
+    if not args.no_rerank:
+        try:
+            from sentence_transformers import CrossEncoder
+            reranker = CrossEncoder(args.rerank_model)
+        except Exception as e:
+            print(f"⚠️  Reranker unavailable ({e}); skipping rerank configs")
+
+    retrievers = InMemoryRetrievers(corpus, model, args.chunk_size, args.chunk_overlap,
+                                    reranker, args.rerank_candidates)
+    configs = {
+        "vector-single": retrievers.vector_single,
+        "vector-chunked": retrievers.vector_chunked,
+        "hybrid-single": retrievers.hybrid(retrievers.vector_single),
+        "hybrid-chunked": retrievers.hybrid(retrievers.vector_chunked),
+    }
+    if reranker is not None:
+        for name in list(configs):
+            configs[f"{name}+rerank"] = retrievers.reranked(configs[name])
+    if not args.no_chroma:
+        try:
+            configs = {"chroma": chroma_search_fn(), **configs}
+        except Exception as e:
+            print(f"⚠️  Chroma path unavailable ({e}); skipping")
+
+    results = {}
+    for name, search_fn in configs.items():
+        search_fn(labelled[0]['query'], args.k)  # warm up
+        results[name] = evaluate(search_fn, labelled, k=args.k, repeats=args.repeats)
+    print_table(results, args.k)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "documents": len(corpus),
+        "k": args.k,
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        failed = False
+        for name, metrics in results.items():
+            if name in baseline:
+                for regression in quality_regressions(metrics, baseline[name], args.tolerance):
+                    print(f"   ❌ {name}: {regression}")
+                    failed = True
+        if failed:
+            sys.exit(1)
+        print("   ✅ Retrieval quality holds against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Retrieval Evaluation Helpers
+Labelled query sets, ranking metrics (recall@k, MRR, nDCG) and a timed
+evaluation loop shared by the retrieval benchmark and index tuning tools
+"""
+
+import os
+import re
+import sys
+import math
+import json
+import time
+from typing import Callable, Dict, List, Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.document_processing.corpus_scanner import get_corpus_scanner
+from utils.benchmark_queries import BENCHMARK_QUERIES
+from utils.latency_tracer import percentile
+
+# Labelled query set bundled with the index tuning tools
+LABELLED_QUERIES_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_data', 'labelled_queries.json')
+
+
+def load_corpus(organized_path: str = None) -> Dict[str, str]:
+    """document_id -> text for every organized document"""
+    organized_path = organized_path or Config.ORGANIZED_PATH
+    corpus = {}
+    for entry in get_corpus_scanner(organized_path).snapshot().organized_files():
+        with open(entry.path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if text.strip():
+            corpus[entry.name.replace('_organized.txt', '')] = text
+    return corpus
+
+
+def load_labelled_queries(path: str = None) -> List[Dict[str, Any]]:
+    """Query entries (query, language, expected_topics, relevant) from a labelled set file"""
+    with open(path or LABELLED_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['queries'] if isinstance(data, dict) else data
+
+
+def _topic_pattern(topic: str):
+    # Word-start match; Bangla words keep their inflected endings (অফিসার -> অফিসারদের)
+    return re.compile(r'(?<![\w\u0980-\u09FF])' + re.escape(topic.lower()))
+
+
+def label_queries(corpus: Dict[str, str], queries: List[Dict[str, Any]] = None,
+                  min_topic_fraction: float = 0.67) -> List[Dict[str, Any]]:
+    """Derive graded relevance labels from each query's expected_topics
+
+    A document is relevant when it mentions at least min_topic_fraction of the
+    topics; its grade is the fraction mentioned (used as nDCG gain). Queries
+    that carry explicit `relevant` document ids keep them as grade 1.0.
+    """
+    queries = queries if queries is not None else BENCHMARK_QUERIES
+    lowered = {doc_id: text.lower() for doc_id, text in corpus.items()}
+    labelled = []
+    for item in queries:
+        relevance = {doc_id: 1.0 for doc_id in item.get('relevant', []) if doc_id in corpus}
+        topics = item.get('expected_topics', [])
+        if topics:
+            patterns = [_topic_pattern(topic) for topic in topics]
+            for doc_id, text in lowered.items():
+                fraction = sum(1 for pattern in patterns if pattern.search(text)) / len(patterns)
+                if fraction >= min_topic_fraction:
+                    relevance[doc_id] = max(relevance.get(doc_id, 0.0), fraction)
+        labelled.append({
+            'query': item['query'],
+            'language': item.get('language', 'English'),
+            'relevance': relevance
+        })
+    return labelled
+
+
+def recall_at_k(ranked: List[str], relevance: Dict[str, float], k: int) -> float:
+    if not relevance:
+        return 0.0
+    return len(set(ranked[:k]) & relevance.keys()) / min(len(relevance), k)
+
+
+def reciprocal_rank(ranked: List[str], relevance: Dict[str, float]) -> float:
+    for position, doc_id in enumerate(ranked, 1):
+        if doc_id in relevance:
+            return 1.0 / position
+    return 0.0
+
+
+def ndcg_at_k(ranked: List[str], relevance: Dict[str, float], k: int) -> float:
+    dcg = sum(relevance.get(doc_id, 0.0) / math.log2(position + 1)
+              for position, doc_id in enumerate(ranked[:k], 1))
+    ideal = sorted(relevance.values(), reverse=True)[:k]
+    idcg = sum(gain / math.log2(position + 1) for position, gain in enumerate(ideal, 1))
+    return dcg / idcg if idcg else 0.0
+
+
+def evaluate(search_fn: Callable[[str, int], List[str]], labelled: List[Dict[str, Any]],
+             k: int = 5, repeats: int = 1) -> Dict[str, Any]:
+    """Run search_fn(query, k) -> ranked document ids over the labelled set
+
+    Queries without any relevant document are timed but excluded from quality
+    metrics. Latency is per call in milliseconds.
+    """
+    latencies, recalls, mrrs, ndcgs = [], [], [], []
+    per_language: Dict[str, List[float]] = {}
+    for item in labelled:
+        ranked = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            ranked = search_fn(item['query'], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        if not item['relevance']:
+            continue
+        recall = recall_at_k(ranked, item['relevance'], k)
+        recalls.append(recall)
+        mrrs.append(reciprocal_rank(ranked, item['relevance']))
+        ndcgs.append(ndcg_at_k(ranked, item['relevance'], k))
+        per_language.setdefault(item.get('language', 'English'), []).append(recall)
+
+    latencies.sort()
+    mean = lambda values: sum(values) / len(values) if values else 0.0
+    return {
+        'queries': len(labelled),
+        'judged_queries': len(recalls),
+        f'recall@{k}': mean(recalls),
+        'mrr': mean(mrrs),
+        f'ndcg@{k}': mean(ndcgs),
+        'recall_by_language': {language: mean(values) for language, values in per_language.items()},
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p95_ms': percentile(latencies, 95),
+        'latency_mean_ms': mean(latencies)
+    }
+
+
+def quality_regressions(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.02) -> List[str]:
+    """Quality metrics that dropped by more than `tolerance` (absolute)"""
+    regressions = []
+    for key, before in baseline.items():
+        if not (key.startswith('recall@') or key.startswith('ndcg@') or key == 'mrr'):
+            continue
+        after = current.get(key)
+        if after is not None and after < before - tolerance:
+            regressions.append(f"{key} {before:.3f} -> {after:.3f}")
+    return regressions
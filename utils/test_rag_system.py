@@ -9,6 +9,7 @@ import json
 from ..config.config import Config
 from ..ui.terminal.chatbot import KFGChatbot
 from ..rag_engine.vector_store.vector_store import VectorStore
+from .benchmark_queries import BENCHMARK_QUERIES
 
 def main():
     print("🧪 KFG Policy RAG System Test")
@@ -39,51 +40,7 @@ def main():
         return
     
     # Test queries in both English and Bangla
-    test_queries = [
-        # English queries
-        {
-            'query': 'What is the TA-DA policy for officers?',
-            'language': 'English',
-            'expected_topics': ['TA-DA', 'officer', 'allowance']
-        },
-        {
-            'query': 'What are the salary increment rules for management employees?',
-            'language': 'English',
-            'expected_topics': ['salary', 'increment', 'management']
-        },
-        {
-            'query': 'What is the leave procedure for employees?',
-            'language': 'English',
-            'expected_topics': ['leave', 'procedure', 'employee']
-        },
-        {
-            'query': 'What is the uniform policy for drivers?',
-            'language': 'English',
-            'expected_topics': ['uniform', 'driver', 'policy']
-        },
-        {
-            'query': 'What are the medical bill reimbursement rules?',
-            'language': 'English',
-            'expected_topics': ['medical', 'bill', 'reimbursement']
-        },
-        
-        # Bangla queries
-        {
-            'query': 'অফিসারদের জন্য TA-DA নীতি কী?',
-            'language': 'Bangla',
-            'expected_topics': ['TA-DA', 'অফিসার', 'ভাতা']
-        },
-        {
-            'query': 'ব্যবস্থাপনা কর্মীদের জন্য বেতন বৃদ্ধির নিয়ম কী?',
-            'language': 'Bangla',
-            'expected_topics': ['বেতন', 'বৃদ্ধি', 'ব্যবস্থাপনা']
-        },
-        {
-            'query': 'কর্মীদের জন্য ছুটির নিয়ম কী?',
-            'language': 'Bangla',
-            'expected_topics': ['ছুটি', 'নিয়ম', 'কর্মী']
-        }
-    ]
+    test_queries = BENCHMARK_QUERIES
     
     print(f"\n🔍 Testing {len(test_queries)} queries...")
     print("=" * 60)
@@ -159,8 +116,8 @@ def main():
     print("=" * 40)
     
     try:
-        from cost_monitor import cost_monitor
-        usage_summary = cost_monitor.get_usage_summary()
+        from cost_monitor import get_cost_monitor
+        usage_summary = get_cost_monitor().get_usage_summary()
         
         print(f"Total requests: {usage_summary['total']['requests']}")
         print(f"Total tokens: {usage_summary['total']['tokens']:,}")
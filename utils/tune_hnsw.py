@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+HNSW Index Tuning
+Sweeps hnsw:M / construction_ef / search_ef over the stored embeddings of the
+live collection and reports recall against p95 query latency.
+
+Each profile is built in an in-memory Chroma client from the stored vectors
+(no re-embedding). Two recall figures are reported:
+  ann recall@k  - overlap with an exact brute-force search (what HNSW gives up)
+  recall@k      - document recall on the bundled labelled query set
+
+--apply copies the live collection into a new version built with the chosen
+profile and swaps the collection alias to it; the profile is recorded in the
+collection metadata and reused by later rebuilds.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from config.config import Config
+from rag_engine.vector_store.collections import (
+    collection_metadata, copy_collection, describe_hnsw, hnsw_params_from
+)
+from rag_engine.vector_store.collection_alias import get_collection_alias
+from rag_engine.vector_store.text_store import get_text_store
+from utils.latency_tracer import percentile
+from utils.retrieval_eval import load_corpus, load_labelled_queries, label_queries, evaluate
+
+
+def load_vectors(collection, batch_size: int = 500) -> Dict[str, Any]:
+    """All ids, stored embeddings and metadata of a collection"""
+    ids, embeddings, metadatas = [], [], []
+    total = collection.count()
+    for offset in range(0, total, batch_size):
+        batch = collection.get(limit=batch_size, offset=offset, include=['embeddings', 'metadatas'])
+        ids.extend(batch['ids'])
+        embeddings.extend(batch['embeddings'])
+        metadatas.extend(batch['metadatas'])
+    return {"ids": ids, "embeddings": np.asarray(embeddings, dtype=np.float32), "metadatas": metadatas}
+
+
+def exact_top_k(vectors: np.ndarray, query_vectors: Dict[str, np.ndarray], k: int) -> Dict[str, set]:
+    """Brute-force cosine top-k chunk positions per query (stored vectors are unit-length)"""
+    n = min(k, len(vectors))
+    truth = {}
+    for query, vector in query_vectors.items():
+        scores = vectors @ vector
+        truth[query] = set(np.argpartition(-scores, n - 1)[:n].tolist())
+    return truth
+
+
+def profile_grid(m_values: List[int], construction_values: List[int], search_values: List[int]) -> List[Dict[str, int]]:
+    return [
+        {"hnsw:M": m, "hnsw:construction_ef": construction_ef, "hnsw:search_ef": search_ef}
+        for m, construction_ef, search_ef in itertools.product(m_values, construction_values, search_values)
+    ]
+
+
+def measure_profile(client, params: Dict[str, int], data: Dict[str, Any], query_vectors: Dict[str, np.ndarray],
+                    truth: Dict[str, set], labelled: List[Dict[str, Any]], k: int, repeats: int) -> Dict[str, Any]:
+    """Build one in-memory index with `params` and score it"""
+    name = f"hnsw_tune_{params['hnsw:M']}_{params['hnsw:construction_ef']}_{params['hnsw:search_ef']}"
+    collection = client.create_collection(name=name, metadata={"hnsw:space": "cosine", **params})
+    position = {chunk_id: i for i, chunk_id in enumerate(data['ids'])}
+
+    try:
+        start = time.perf_counter()
+        for offset in range(0, len(data['ids']), 1000):
+            collection.add(
+                ids=data['ids'][offset:offset + 1000],
+                embeddings=data['embeddings'][offset:offset + 1000].tolist(),
+                metadatas=data['metadatas'][offset:offset + 1000]
+            )
+        build_seconds = time.perf_counter() - start
+
+        ann_recalls = {}
+
+        def search(query: str, n: int) -> List[str]:
+            results = collection.query(query_embeddings=[query_vectors[query].tolist()],
+                                       n_results=min(n, len(data['ids'])), include=['metadatas'])
+            hits = {position[chunk_id] for chunk_id in results['ids'][0]}
+            ann_recalls[query] = len(hits & truth[query]) / max(len(truth[query]), 1)
+            document_ids = [metadata.get('document_id') for metadata in results['metadatas'][0]]
+            return list(dict.fromkeys(document_ids))
+
+        search(labelled[0]['query'], k)  # warm up
+        metrics = evaluate(search, labelled, k=k, repeats=repeats)
+    finally:
+        client.delete_collection(name=name)
+
+    return {
+        "profile": describe_hnsw(params),
+        "params": params,
+        "build_seconds": build_seconds,
+        f"ann_recall@{k}": sum(ann_recalls.values()) / len(ann_recalls),
+        f"recall@{k}": metrics[f'recall@{k}'],
+        "latency_p50_ms": metrics['latency_p50_ms'],
+        "latency_p95_ms": metrics['latency_p95_ms']
+    }
+
+
+def choose_profile(results: List[Dict[str, Any]], k: int, target_recall: float) -> Dict[str, Any]:
+    """Fastest profile (p95) reaching the ANN recall target, else the most accurate one"""
+    key = f"ann_recall@{k}"
+    passing = [result for result in results if result[key] >= target_recall]
+    if passing:
+        return min(passing, key=lambda result: (result['latency_p95_ms'], -result[f'recall@{k}']))
+    return max(results, key=lambda result: (result[key], -result['latency_p95_ms']))
+
+
+def apply_profile(client, name: str, chosen: Dict[str, Any], k: int) -> bool:
+    """Copy the live collection into a new version with the chosen profile and swap the alias
+
+    HNSW parameters are fixed at creation, so the profile needs a new
+    collection; the replaced version stays available for rollback.
+    """
+    live = client.get_collection(name=name)
+    metadata = live.metadata or {}
+    alias = get_collection_alias()
+    version = alias.new_version_name()
+    target = client.create_collection(name=version, metadata=collection_metadata(
+        metadata.get("description", "KFG Policy Documents - Enhanced Organization"),
+        chosen['params'],
+        embedding_model=metadata.get("embedding_model"),
+        rebuilt_from=name,
+        hnsw_tuned_at=datetime.now().isoformat(),
+        hnsw_tuned_ann_recall=round(chosen[f'ann_recall@{k}'], 4),
+        hnsw_tuned_p95_ms=round(chosen['latency_p95_ms'], 3)
+    ))
+
+    print(f"📦 Copying {live.count()} chunks into '{version}'...")
+    copy_collection(live, target)
+    text_store = get_text_store() if Config.USE_TEXT_STORE else None
+    if text_store is not None:
+        # Bodies are stored per collection version
+        text_store.copy_prefix(f"{name}/", f"{version}/")
+    if target.count() < live.count():
+        print("❌ Copy is incomplete; live collection left unchanged")
+        client.delete_collection(name=version)
+        if text_store is not None:
+            text_store.delete_prefix(f"{version}/")
+        return False
+
+    state = alias.swap(version)
+    print(f"🔀 '{alias.alias}' now points at '{version}' (previous: '{state['previous']}')")
+    retired = state.get("retired")
+    if retired and retired not in (state["active"], state["previous"]):
+        client.delete_collection(name=retired)
+        if text_store is not None:
+            text_store.delete_prefix(f"{retired}/")
+        print(f"🗑️  Dropped retired collection '{retired}'")
+    return True
+
+
+def print_table(results: List[Dict[str, Any]], k: int, chosen: Dict[str, Any]):
+    print(f"\n{'profile':<38}{'ann@' + str(k):>8}{'recall@' + str(k):>10}{'p50 ms':>9}{'p95 ms':>9}{'build s':>9}")
+    print("-" * 83)
+    for result in results:
+        marker = " ◀" if result is chosen else ""
+        print(f"{result['profile']:<38}{result[f'ann_recall@{k}']:>8.3f}{result[f'recall@{k}']:>10.3f}"
+              f"{result['latency_p50_ms']:>9.2f}{result['latency_p95_ms']:>9.2f}{result['build_seconds']:>9.2f}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters: recall vs p95 latency")
+    parser.add_argument("--collection", default=get_collection_alias().active(), help="Default: active version")
+    parser.add_argument("--labels", help="Labelled query set JSON (default: bundled set)")
+    parser.add_argument("--k", type=int, default=Config.MAX_DOCUMENTS_PER_QUERY)
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--search-ef", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--target-recall", type=float, default=0.95, help="ANN recall the chosen profile must reach")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--output", default="hnsw_tuning.json")
+    parser.add_argument("--apply", action="store_true", help="Swap in a copy of the collection built with the chosen profile")
+    args = parser.parse_args()
+
+    print("🧭 HNSW Tuning")
+    print("=" * 50)
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+    try:
+        live = client.get_collection(name=args.collection)
+    except Exception:
+        print(f"❌ Collection '{args.collection}' not found")
+        sys.exit(1)
+    data = load_vectors(live)
+    if not data['ids']:
+        print(f"❌ Collection '{args.collection}' is empty")
+        sys.exit(1)
+    current = hnsw_params_from(live.metadata)
+    print(f"📚 {len(data['ids'])} chunks in '{args.collection}' (current profile: {describe_hnsw(current)})")
+
+    labelled = label_queries(load_corpus(), load_labelled_queries(args.labels))
+    judged = sum(1 for item in labelled if item['relevance'])
+    print(f"🏷️  {len(labelled)} labelled queries ({judged} with relevant documents)")
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer((live.metadata or {}).get("embedding_model", Config.EMBEDDING_MODEL))
+    queries = [item['query'] for item in labelled]
+    encoded = model.encode(queries, normalize_embeddings=True, convert_to_numpy=True, show_progress_bar=False)
+    query_vectors = {query: np.asarray(vector, dtype=np.float32) for query, vector in zip(queries, encoded)}
+    truth = exact_top_k(data['embeddings'], query_vectors, args.k)
+
+    scratch = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    grid = profile_grid(args.m, args.construction_ef, args.search_ef)
+    results = []
+    for params in grid:
+        print(f"   ⏱️  {describe_hnsw(params)}")
+        results.append(measure_profile(scratch, params, data, query_vectors, truth, labelled, args.k, args.repeats))
+
+    chosen = choose_profile(results, args.k, args.target_recall)
+    print_table(results, args.k, chosen)
+    print(f"\n✅ Chosen profile: {chosen['profile']}")
+    print(f"   Set in Config: HNSW_M = {chosen['params']['hnsw:M']}, "
+          f"HNSW_CONSTRUCTION_EF = {chosen['params']['hnsw:construction_ef']}, "
+          f"HNSW_SEARCH_EF = {chosen['params']['hnsw:search_ef']}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "collection": args.collection,
+        "chunks": len(data['ids']),
+        "k": args.k,
+        "target_recall": args.target_recall,
+        "current_profile": describe_hnsw(current),
+        "chosen_profile": chosen['profile'],
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results written to {args.output}")
+
+    if args.apply:
+        if chosen['params'] == current:
+            print("ℹ️  Live collection already uses the chosen profile")
+        elif not apply_profile(client, args.collection, chosen, args.k):
+            sys.exit(1)
+        else:
+            print(f"✅ Serving a copy of '{args.collection}' built with {chosen['profile']}")
+
+
+if __name__ == "__main__":
+    main()